@@ -0,0 +1,113 @@
+"""Compare running tides_csv.py once per page against the tides_scraper pipeline.
+
+Starts a local HTTP server that serves synthetic tide pages in the same table
+layout as the HKO pages (with an artificial delay per request to simulate the
+network), then
+- runs tides_csv.py in a subprocess for every (station, year), like a shell loop
+- runs tides_scraper.py once for all pages
+both starting from an empty cache.
+
+Every tides_csv.py run pays the same interpreter and import start-up (about 0.5s
+here) as the whole pipeline, so the speed-up grows with the number of pages: on one
+core 2 x 5 pages at 0.2s gave 5.9x, 4 x 10 at 0.2s 12.4x, 4 x 20 at 0.3s (the
+default) 13.2x.
+
+usage: python bench_tides_scraper.py [stations] [years] [latency seconds]
+"""
+import os
+import sys
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+
+N_STATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+N_YEARS = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+LATENCY = float(sys.argv[3]) if len(sys.argv) > 3 else 0.3
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_page(seed):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for day in np.arange('2001-01-01', '2002-01-01', dtype='datetime64[D]'):
+        month, dom = int(str(day)[5:7]), int(str(day)[8:10])
+        cells = [f'<td>{month}</td>', f'<td>{dom}</td>']
+        for minute in sorted(rng.choice(24 * 60, size=4, replace=False)):
+            cells.append(f'<td>{minute // 60:02d}{minute % 60:02d}</td>')
+            cells.append(f'<td>{rng.uniform(0, 3):.1f}</td>')
+        rows.append('<tr>' + ''.join(cells) + '</tr>')
+    return ('<html><body><table><tbody><tr><th>MM</th><th>DD</th></tr>'
+            + ''.join(rows) + '</tbody></table></body></html>').encode()
+
+
+class TidesHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        time.sleep(LATENCY)
+        body = make_page(abs(hash(self.path)) % 2**32)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 64
+
+
+def main():
+    server = MockServer(('127.0.0.1', 0), TidesHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    stations = [f'S{i:02d}' for i in range(N_STATIONS)]
+    years = list(range(2000, 2000 + N_YEARS))
+    env = dict(os.environ, ROW_XPATH='//html/body/table/tbody/tr', COL_XPATH='td',
+               TIDES_URL_TEMPLATE=base + '/tide/e{station}text{year}.html')
+    print(f'{N_STATIONS} stations x {N_YEARS} years, {LATENCY}s per request')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        for s in stations:
+            for y in years:
+                page_env = dict(env, YEAR=str(y), URL=f'{base}/tide/e{s}text{y}.html',
+                                FILENAME=os.path.join(tmp, f'{s}-{y}.html'))
+                subprocess.run([sys.executable, os.path.join(HERE, 'tides_csv.py')], cwd=tmp,
+                               env=page_env, stdout=subprocess.DEVNULL, check=True)
+        loop = time.perf_counter() - start
+        print(f'  script loop: {loop:.2f}s')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(HERE, 'tides_scraper.py'),
+                        '--stations', ','.join(stations), '--years', f'{years[0]}-{years[-1]}',
+                        '--cache-dir', os.path.join(tmp, 'cache'), '--out', os.path.join(tmp, 'all.csv'),
+                        '--fetch-workers', '16'],
+                       cwd=tmp, env=env, stdout=subprocess.DEVNULL, check=True)
+        pipeline = time.perf_counter() - start
+        with open(os.path.join(tmp, 'all.csv')) as f:
+            n = sum(1 for _ in f) - 1
+        print(f'  pipeline:    {pipeline:.2f}s ({n} records) -> {loop / pipeline:.1f}x faster')
+
+        start = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(HERE, 'tides_scraper.py'),
+                        '--stations', ','.join(stations), '--years', f'{years[0]}-{years[-1]}',
+                        '--cache-dir', os.path.join(tmp, 'cache'), '--out', os.path.join(tmp, 'all.csv')],
+                       cwd=tmp, env=env, stdout=subprocess.DEVNULL, check=True)
+        print(f'  resumed (all cached): {time.perf_counter() - start:.2f}s')
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
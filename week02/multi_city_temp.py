@@ -1,6 +1,6 @@
 import dotenv
 import os
-from scraping_utils import get_url, parse
+from scraping_utils import get_url, parse, cache_stats
 dotenv.load_dotenv()
 
 url = os.getenv('MULTICITY_URL');
@@ -13,6 +13,5 @@ for i in range(1, 10):
     city = tree['city']['cityName']
     print(tree['city']['climate']['climateMonth'][0].keys())
 
-    
-
-
+# pages are revalidated instead of re-downloaded on later runs
+print(cache_stats())
@@ -0,0 +1,118 @@
+"""Parse an HKO-style tide table page into NumPy arrays.
+
+Each table row is: month, day, then up to four (HHMM, height) column pairs.
+Compared with the loop in tides_csv.py / plot_tides.py this
+- compiles the column XPath once instead of evaluating os.getenv('COL_XPATH') per row;
+  the scripts build it from their own environment with table_xpaths()
+- walks the rows with etree.iterparse and clears them as it goes, so a large
+  archive page never has to be held as a full DOM
+- collects the raw strings and converts them in bulk to datetime64[m] / float arrays
+  instead of building a datetime.datetime per record
+- only prints rows when verbose=True
+
+usage:
+    row_tag, col_xpath = table_xpaths(os.getenv('ROW_XPATH'), os.getenv('COL_XPATH'))
+    times, heights = parse_tide_table('crawled-page-2024.html', 2024, row_tag=row_tag, col_xpath=col_xpath)
+"""
+import io
+
+import numpy as np
+from lxml import etree
+
+ROW_TAG = 'tr'
+COL_XPATH = etree.XPath('td')
+
+
+def table_xpaths(row_xpath=None, col_xpath=None):
+    """(row_tag, compiled col_xpath) from ROW_XPATH / COL_XPATH style strings; None keeps the default.
+
+    The rows are the last step of ROW_XPATH (e.g. //html/body/table/tbody/tr -> tr).
+    """
+    row_tag = (row_xpath or '').rstrip('/').split('/')[-1] or ROW_TAG
+    return row_tag, etree.XPath(col_xpath) if col_xpath else COL_XPATH
+
+
+def _open_source(source):
+    """A path, a file object, or the page itself (str / bytes)."""
+    if isinstance(source, bytes):
+        return io.BytesIO(source)
+    # a saved page may start with a UTF-8 byte order mark before the first tag
+    if isinstance(source, str) and source.lstrip('\ufeff \t\r\n').startswith('<'):
+        return io.BytesIO(source.encode('UTF8'))
+    return source
+
+
+def _text(cell):
+    # plain <td>text</td> cells are the common case; itertext() only for nested markup
+    if len(cell):
+        return ''.join(cell.itertext()).strip()
+    return (cell.text or '').strip()
+
+
+def _to_float(texts):
+    """Bulk float conversion; blank or malformed cells become NaN instead of failing the page."""
+    try:
+        return np.array(texts).astype(np.float64)
+    except ValueError:
+        pass
+    values = np.empty(len(texts), dtype=np.float64)
+    for i, text in enumerate(texts):
+        try:
+            values[i] = float(text)
+        except ValueError:
+            values[i] = np.nan
+    return values
+
+
+def iter_rows(source, row_tag=ROW_TAG, col_xpath=COL_XPATH):
+    """Yield the stripped column texts of each row, freeing rows once they are read."""
+    for _, row in etree.iterparse(_open_source(source), events=('end',), tag=row_tag, html=True):
+        yield [_text(column) for column in col_xpath(row)]
+
+        # drop the row and everything before it
+        row.clear(keep_tail=True)
+        parent = row.getparent()
+        if parent is not None:
+            while row.getprevious() is not None:
+                del parent[0]
+
+
+def parse_tide_table(source, year, verbose=False, row_tag=ROW_TAG, col_xpath=COL_XPATH, with_text=False):
+    """Return (times, heights): datetime64[m] and float64 arrays in page order.
+
+    A record with a time but a blank or unreadable height gets NaN. With with_text=True
+    the height cells are also returned as they appear on the page (times, heights, texts).
+    """
+    months, days, hhmm, heights = [], [], [], []
+    row_num = 0
+    for columns in iter_rows(source, row_tag, col_xpath):
+        # skip empty and header rows
+        if len(columns) < 4 or not (columns[0].isdigit() and columns[1].isdigit()):
+            continue
+        row_num += 1
+        if verbose:
+            print(f'Row {row_num}: {" ".join(columns)}')
+
+        for i in range(2, len(columns) - 1, 2):
+            if columns[i] != '':
+                months.append(columns[0])
+                days.append(columns[1])
+                hhmm.append(columns[i])
+                heights.append(columns[i + 1])
+
+    if not hhmm:
+        empty = np.array([], dtype='datetime64[m]'), np.array([], dtype=np.float64)
+        return empty + (np.array([], dtype=str),) if with_text else empty
+
+    month = np.array(months, dtype=np.int64)
+    day = np.array(days, dtype=np.int64)
+    clock = np.array(hhmm, dtype=np.int64)
+    dates = (np.datetime64(f'{year:04d}-01', 'M') + (month - 1)).astype('datetime64[D]') + (day - 1)
+    times = dates.astype('datetime64[m]') + (clock // 100) * 60 + clock % 100
+    values = _to_float(heights)
+    if verbose:
+        for t, v in zip(times, heights):
+            print(f'{t} - {v}')
+    if with_text:
+        return times, values, np.array(heights)
+    return times, values
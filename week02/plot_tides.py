@@ -1,11 +1,8 @@
-import requests
-from lxml import html
-
 import dotenv
 import os
-import datetime
 import matplotlib.pyplot as plt
-from scraping_utils import get_url, parse
+from scraping_utils import get_url
+from parse_tide_table import parse_tide_table, table_xpaths
 
 # load the environment variables
 dotenv.load_dotenv()
@@ -13,46 +10,19 @@ dotenv.load_dotenv()
 year = int(os.getenv('YEAR', 2024))
 filename = os.getenv('FILENAME', "crawled-page-{year}.html").format(year=year)
 
-# get page
-page = get_url(os.getenv('URL'), filename)
-
-# parse the page to html
-tree = parse(page, 'html')
-
-data = []
-
-# initialize row counter
-row_num = 0
+# print every row and record while parsing (VERBOSE=1)
+verbose = os.getenv('VERBOSE', '0') == '1'
 
-for row in tree.xpath(os.getenv('ROW_XPATH')):
-    columns = row.xpath(os.getenv('COL_XPATH'))
-    columns = [column.text_content() for column in columns]
-    columns = [column.strip() for column in columns]
-    row_string = " ".join(columns).strip()
+# table layout from .env (ROW_XPATH / COL_XPATH)
+row_tag, col_xpath = table_xpaths(os.getenv('ROW_XPATH'), os.getenv('COL_XPATH'))
 
-    # skip empty rows
-    if row_string.strip() == "":
-        continue
-
-    row_num += 1
-
-    print(f'Row {row_num}: {row_string}')
-
-    month = int(columns[0])
-    day = int(columns[1])
-            
-    for i in range(2, len(columns), 2):
-        if columns[i] != "":
-            # get the time in HHMM format
-            hour = columns[i][:2]
-            minute = columns[i][2:]
+# get page
+page = get_url(os.getenv('URL'), filename)
 
-            dt = datetime.datetime(year,month,day,int(hour),int(minute))
-            value = columns[i+1]
-            print(f'{dt} - {value}')
-            data.append((dt, value))            
+# parse the table rows into datetime64 / float arrays
+times, heights = parse_tide_table(page, year, verbose=verbose, row_tag=row_tag, col_xpath=col_xpath)
 
 # plot
 fig, ax = plt.subplots()
-ax.plot([record[0] for record in data], [float(record[1]) for record in data])
-plt.show()
\ No newline at end of file
+ax.plot(times, heights)
+plt.show()
@@ -2,29 +2,159 @@ import requests
 import os
 from lxml import html
 import json
+import gzip
+import hashlib
+import threading
+import time
+from requests.adapters import HTTPAdapter
 
+# set useragent for requests
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3',
+    'Accept-Encoding': 'gzip, deflate'}
 
-def get_url(url, filename):
-    if not os.path.exists(filename):
-        
-        # set useragent for requests
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'}
-        
-        # fetch the page if it doesn't exist
-        page = requests.get(url, headers=headers)
+# on-disk HTTP cache: one gzip body + one json metadata file per URL
+CACHE_DIR = os.getenv('SCRAPE_CACHE_DIR', '.http-cache')
 
+# seconds a cached page is used without asking the server again;
+# after that it is revalidated with If-None-Match / If-Modified-Since
+DEFAULT_TTL = float(os.getenv('SCRAPE_TTL', 24 * 3600))
+
+TIMEOUT = (5, 30)  # connect, read
+
+_session = None
+_session_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stale': 0,
+          'bytes_downloaded': 0, 'bytes_saved': 0}
+
+
+def get_session():
+    """One pooled keep-alive session shared by every get_url call (and thread)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers.update(HEADERS)
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+    return _session
+
+
+def _count(key, n=1):
+    with _stats_lock:
+        _stats[key] += n
+
+
+def cache_stats():
+    """hits (fresh), misses (downloaded), revalidated (304), stale (served after an error), bytes."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _cache_paths(url, cache_dir):
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    base = os.path.join(cache_dir, key[:2], key)
+    return base + '.gz', base + '.json'
+
+
+def _read_cache(url, cache_dir):
+    body_path, meta_path = _cache_paths(url, cache_dir)
+    try:
+        with open(meta_path, 'r', encoding='UTF8') as f:
+            meta = json.load(f)
+        with open(body_path, 'rb') as f:
+            body = gzip.decompress(f.read())
+    except (OSError, ValueError, EOFError):
+        return None, None
+    return meta, body
+
+
+def _write_cache(url, cache_dir, meta, body=None):
+    body_path, meta_path = _cache_paths(url, cache_dir)
+    os.makedirs(os.path.dirname(body_path), exist_ok=True)
+    suffix = f'.{os.getpid()}.{threading.get_ident()}.tmp'
+    # write to a temporary file and rename so readers never see half a file
+    if body is not None:
+        with open(body_path + suffix, 'wb') as f:
+            f.write(gzip.compress(body, compresslevel=6))
+        os.replace(body_path + suffix, body_path)
+    with open(meta_path + suffix, 'w', encoding='UTF8') as f:
+        json.dump(meta, f)
+    os.replace(meta_path + suffix, meta_path)
+
+
+def fetch(url, ttl=None, cache_dir=CACHE_DIR):
+    """Return the page text for url, using the on-disk cache.
+
+    Fresh entries (younger than ttl) are served without a request. Older ones are
+    revalidated with ETag / Last-Modified; a 304 reuses the stored body. If the
+    request fails and a cached copy exists, the stale copy is returned.
+    """
+    ttl = DEFAULT_TTL if ttl is None else ttl
+    meta, body = _read_cache(url, cache_dir)
+    now = time.time()
+    if meta is not None and now - meta['fetched_at'] < ttl:
+        _count('hits')
+        return body.decode(meta['encoding'] or 'UTF8', errors='replace')
+
+    headers = {}
+    if meta is not None:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+    try:
+        response = get_session().get(url, headers=headers, timeout=TIMEOUT)
+        if response.status_code != 304:
+            response.raise_for_status()
+    except requests.RequestException:
+        if meta is None:
+            raise
+        _count('stale')
+        return body.decode(meta['encoding'] or 'UTF8', errors='replace')
+
+    if response.status_code == 304:
+        # not modified: only the timestamp (and possibly new validators) change
+        _count('revalidated')
+        _count('bytes_saved', len(body))
+        meta['fetched_at'] = now
+        meta['etag'] = response.headers.get('ETag', meta.get('etag'))
+        meta['last_modified'] = response.headers.get('Last-Modified', meta.get('last_modified'))
+        _write_cache(url, cache_dir, meta)
+        return body.decode(meta['encoding'] or 'UTF8', errors='replace')
+
+    _count('misses')
+    _count('bytes_downloaded', len(response.content))
+    meta = {'url': url, 'fetched_at': now, 'encoding': response.encoding or response.apparent_encoding,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')}
+    _write_cache(url, cache_dir, meta, response.content)
+    return response.text
+
+
+def get_url(url, filename=None, ttl=None):
+    """Fetch url through the HTTP cache and also save the page to filename.
+
+    An existing filename from before the cache existed is only used when the
+    page cannot be fetched at all.
+    """
+    try:
+        page = fetch(url, ttl)
+    except requests.RequestException:
+        if filename and os.path.exists(filename):
+            # if the page exists, read it from the file
+            with open(filename, 'r', encoding='UTF8') as f:
+                return f.read()
+        raise
+
+    if filename:
         # save the page to a file
         with open(filename, 'w', encoding='UTF8') as f:
-            f.write(page.text)
-
-        page = page.text
+            f.write(page)
 
-    else:
-        # if the page exists, read it from the file
-        with open(filename, 'r', encoding='UTF8') as f:
-            page = f.read() 
-            
     return page
 
 def parse(page, mode = 'html'):
@@ -32,4 +162,4 @@ def parse(page, mode = 'html'):
         case 'html':
             return html.fromstring(page)
         case 'json':
-            return json.loads(page)
\ No newline at end of file
+            return json.loads(page)
@@ -0,0 +1,34 @@
+"""Check parse_tide_table on small hand-written pages.
+
+usage: python -m pytest -q test_parse_tide_table.py
+"""
+import numpy as np
+
+from parse_tide_table import parse_tide_table
+
+PAGE = """<html><body><table><tbody>
+<tr><td>MM</td><td>DD</td><td>Time</td><td>Height(m)</td><td>Time</td><td>Height(m)</td></tr>
+<tr><td>1</td><td>1</td><td>0532</td><td>1.20</td><td>1147</td><td>2.05</td></tr>
+<tr><td>1</td><td>2</td><td>0610</td><td></td><td>1230</td><td>1.90</td></tr>
+<tr><td>1</td><td>3</td><td>0655</td><td>1.10</td><td></td><td></td></tr>
+</tbody></table></body></html>"""
+
+
+def test_records_in_page_order():
+    times, heights = parse_tide_table(PAGE, 2024)
+    assert times.dtype == np.dtype('datetime64[m]')
+    assert list(np.datetime_as_string(times)) == [
+        '2024-01-01T05:32', '2024-01-01T11:47', '2024-01-02T06:10', '2024-01-02T12:30', '2024-01-03T06:55']
+
+
+def test_blank_height_keeps_the_rest_of_the_page():
+    times, heights, texts = parse_tide_table(PAGE, 2024, with_text=True)
+    assert len(times) == len(heights) == len(texts) == 5
+    assert np.isnan(heights[2])
+    assert np.array_equal(np.delete(heights, 2), [1.20, 2.05, 1.90, 1.10])
+    assert list(texts) == ['1.20', '2.05', '', '1.90', '1.10']
+
+
+def test_empty_page():
+    times, heights, texts = parse_tide_table('<table></table>', 2024, with_text=True)
+    assert len(times) == len(heights) == len(texts) == 0
@@ -1,10 +1,8 @@
-import requests
-from lxml import html
-
 import dotenv
 import os
-import datetime
-from scraping_utils import get_url, parse
+import numpy as np
+from scraping_utils import get_url
+from parse_tide_table import parse_tide_table, table_xpaths
 
 # load the environment variables
 dotenv.load_dotenv()
@@ -13,80 +11,25 @@ dotenv.load_dotenv()
 year = int(os.getenv('YEAR', 2024))
 filename = os.getenv('FILENAME', "crawled-page-{year}.html").format(year=year)
 
-# get page
-page = get_url(os.getenv('URL'), filename)
-
-# parse the page to html
-tree = parse(page, 'html')
-
-# initialize the data list
-data = []
-
-# initialize row counter
-row_num = 0
-
-# iterate over the rows
-for row in tree.xpath(os.getenv('ROW_XPATH')):
-
-    # get the columns
-    columns = row.xpath(os.getenv('COL_XPATH'))
-
-    # get the text content of each column
-    columns = [column.text_content() for column in columns]
-
-    # strip whitespace from each column
-    columns = [column.strip() for column in columns]
-
-    # join the columns into a single string
-    row_string = " ".join(columns).strip()
+# print every row and record while parsing (VERBOSE=1)
+verbose = os.getenv('VERBOSE', '0') == '1'
 
-    # skip empty rows
-    if row_string.strip() == "":
-        continue
+# table layout from .env (ROW_XPATH / COL_XPATH)
+row_tag, col_xpath = table_xpaths(os.getenv('ROW_XPATH'), os.getenv('COL_XPATH'))
 
-    # increment the row counter
-    row_num += 1
-
-    # print the row
-    print(f'Row {row_num}: {row_string}')
-
-    # get the month and day
-    month = int(columns[0])
-    day = int(columns[1])
-
-    # get the time and value
-    for i in range(2, len(columns), 2):
-
-        # check if the column is not empty
-        if columns[i] != "":
-            
-            # get the time in HHMM format
-            hour = columns[i][:2]
-            minute = columns[i][2:]
-
-            # create the datetime object
-            dt = datetime.datetime(year,month,day,int(hour),int(minute))
-
-            # get the value
-            value = columns[i+1]
-
-            # print the datetime and value
-            print(f'{dt} - {value}')
+# get page
+page = get_url(os.getenv('URL'), filename)
 
-            # append the datetime and value to the data list
-            data.append((dt, value))
+# parse the table rows; keep the height cells as written on the page for the csv
+times, _, heights = parse_tide_table(page, year, verbose=verbose, row_tag=row_tag,
+                                     col_xpath=col_xpath, with_text=True)
 
+# format all timestamps at once: 2024-01-01T05:32 -> 2024-01-01 05:32
+dates = np.char.replace(np.datetime_as_string(times, unit='m'), 'T', ' ')
 
 with open('tides.csv', 'w') as f:
     f.write("Date,Height\n")
     # create csv file
-    for record in data:
-        
-        # print the record for debugging purposes
-        print(f'{record[0].strftime("%Y-%m-%d %H:%M")},{record[1]}')
-
-        # open the csv file
-        
+    f.writelines(f'{date},{height}\n' for date, height in zip(dates, heights))
 
-            # write the record to the csv file
-        f.write(f'{record[0].strftime("%Y-%m-%d %H:%M")},{record[1]}\n')
\ No newline at end of file
+print(f'{len(times)} records written to tides.csv')
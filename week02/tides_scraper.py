@@ -0,0 +1,155 @@
+"""Scrape tide tables for many stations and years in one run.
+
+tides_csv.py / plot_tides.py fetch and parse a single YEAR page. This pipeline:
+- fetches every (station, year) page through scraping_utils.fetch with a bounded
+  thread pool; its HTTP cache (kept in --cache-dir) is the only copy of each page, so an
+  interrupted run resumes where it stopped and older pages are only revalidated
+- parses the pages in a process pool with parse_tide_table (one page per task;
+  in-process on a single core)
+- merges everything into one dataset sorted by station and time
+
+usage:
+    python tides_scraper.py --stations CLK,QUB,TBT --years 1990-2024 --out tides_all.csv
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+import dotenv
+import numpy as np
+from parse_tide_table import parse_tide_table, table_xpaths
+import scraping_utils
+
+# load the environment variables
+dotenv.load_dotenv()
+
+# {station} and {year} are filled in per page, e.g. CLK = Chek Lap Kok
+URL_TEMPLATE = os.getenv('TIDES_URL_TEMPLATE', 'https://www.hko.gov.hk/tide/e{station}text{year}.html')
+CACHE_DIR = os.getenv('TIDES_CACHE_DIR', 'tides-cache')
+FETCH_WORKERS = 8
+# table layout for parse_tide_table (ROW_XPATH / COL_XPATH in .env)
+ROW_XPATH = os.getenv('ROW_XPATH')
+COL_XPATH = os.getenv('COL_XPATH')
+
+
+def parse_years(spec):
+    """'2020' -> [2020], '1990-2024' -> [1990, ..., 2024], '2001,2005' -> [2001, 2005]"""
+    years = []
+    for part in spec.split(','):
+        if '-' in part:
+            start, end = part.split('-')
+            years.extend(range(int(start), int(end) + 1))
+        elif part:
+            years.append(int(part))
+    return years
+
+
+def fetch_page(station, year, cache_dir=CACHE_DIR):
+    """Fetch one page through the HTTP cache. Returns (station, year, page text)."""
+    # the cache writes each entry to a temporary name and renames it, so an
+    # interrupted download is never mistaken for a cached page on the next run
+    page = scraping_utils.fetch(URL_TEMPLATE.format(station=station, year=year), cache_dir=cache_dir)
+    return station, year, page
+
+
+def fetch_all(stations, years, cache_dir=CACHE_DIR, workers=FETCH_WORKERS):
+    """Fetch every (station, year) page. Returns ([(station, year, page)], number downloaded)."""
+    jobs = [(s, y) for s in stations for y in years]
+    before = scraping_utils.cache_stats()['misses']
+    pages = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(fetch_page, s, y, cache_dir) for s, y in jobs]
+        for fut in as_completed(futures):
+            try:
+                pages.append(fut.result())
+            except Exception as e:
+                print(f'Fetch failed: {e}')
+    return pages, scraping_utils.cache_stats()['misses'] - before
+
+
+def parse_page(page, year, row_xpath=ROW_XPATH, col_xpath=COL_XPATH):
+    """Parse one page (text or path) into (datetime64[m] array, float32 height array)."""
+    row_tag, col = table_xpaths(row_xpath, col_xpath)
+    times, heights = parse_tide_table(page, year, row_tag=row_tag, col_xpath=col)
+    return times, heights.astype(np.float32)
+
+
+def _parse_job(station, year, page):
+    times, heights = parse_page(page, year)
+    return station, times, heights
+
+
+def _parse_results(pages, workers):
+    """Yield (station, times, heights) per page; a page that fails to parse is reported and skipped."""
+    if workers == 1:
+        # one core (or one page): a process pool would only add start-up and pickling time
+        for s, y, page in pages:
+            try:
+                yield _parse_job(s, y, page)
+            except Exception as e:
+                print(f'Parse failed: {e}')
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_parse_job, s, y, page) for s, y, page in pages]
+        for fut in as_completed(futures):
+            try:
+                yield fut.result()
+            except Exception as e:
+                print(f'Parse failed: {e}')
+
+
+def parse_all(pages, workers=None):
+    """Parse pages (in a process pool when there is more than one core) and merge into arrays sorted by (station, time)."""
+    workers = min(workers or os.cpu_count() or 1, max(len(pages), 1))
+    stations, times, heights = [], [], []
+    for station, t, h in _parse_results(pages, workers):
+        stations.append(np.full(len(t), station))
+        times.append(t)
+        heights.append(h)
+    if not times:
+        return np.array([], dtype=str), np.array([], dtype='datetime64[m]'), np.array([], dtype=np.float32)
+    station = np.concatenate(stations)
+    t = np.concatenate(times)
+    h = np.concatenate(heights)
+    order = np.lexsort((t, station))
+    return station[order], t[order], h[order]
+
+
+def write_csv(path, station, times, heights):
+    """Write the merged dataset with one buffered write per column block."""
+    dates = np.char.replace(np.datetime_as_string(times, unit='m'), 'T', ' ')
+    lines = np.char.add(np.char.add(np.char.add(np.char.add(station, ','), dates), ','),
+                        np.char.mod('%.2f', heights))
+    with open(path, 'w') as f:
+        f.write('Station,Date,Height\n')
+        if len(lines):
+            f.write('\n'.join(lines))
+            f.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scrape tide tables for many stations and years')
+    parser.add_argument('--stations', default=os.getenv('STATIONS', 'CLK'), help='comma separated station codes')
+    parser.add_argument('--years', default=os.getenv('YEAR', '2024'), help="e.g. 2024, 1990-2024 or 2001,2005")
+    parser.add_argument('--out', default='tides_all.csv', help='merged CSV output')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='HTTP cache directory for the fetched pages')
+    parser.add_argument('--fetch-workers', type=int, default=FETCH_WORKERS, help='concurrent downloads')
+    parser.add_argument('--parse-workers', type=int, default=None, help='parser processes (default: all cores)')
+    args = parser.parse_args()
+
+    stations = [s.strip() for s in args.stations.split(',') if s.strip()]
+    years = parse_years(args.years)
+
+    start = time.perf_counter()
+    pages, fetched = fetch_all(stations, years, args.cache_dir, args.fetch_workers)
+    fetch_time = time.perf_counter() - start
+    print(f'{len(pages)} pages ready ({fetched} downloaded, {len(pages) - fetched} from cache) in {fetch_time:.1f}s')
+
+    station, times, heights = parse_all(pages, args.parse_workers)
+    write_csv(args.out, station, times, heights)
+    print(f'{len(times)} records -> {args.out} in {time.perf_counter() - start:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
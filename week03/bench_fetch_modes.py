@@ -0,0 +1,81 @@
+"""对比 weather_timeseries_fetch 的线程模式与 async 模式的吞吐（cities/sec）。
+
+启动一个本地 mock HTTP 服务（每个请求人为延迟 LATENCY 秒，模拟网络往返），
+把 API_BASE 指向它，然后分别用两种模式采集同一批合成坐标。
+
+用法: python bench_fetch_modes.py [城市数] [延迟秒]
+"""
+import sys
+import json
+import time
+import logging
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import weather_timeseries_fetch as wtf
+
+N_CITIES = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+LATENCY = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+
+
+class MockOWMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        qs = parse_qs(urlparse(self.path).query)
+        time.sleep(LATENCY)
+        body = json.dumps({
+            'dt': int(time.time()),
+            'main': {'temp': 20.0, 'humidity': 50, 'pressure': 1013},
+            'wind': {'speed': 3.0, 'deg': 90},
+            'clouds': {'all': 10},
+            'weather': [{'main': 'Clear', 'description': 'clear sky'}],
+            'coord': {'lat': float(qs['lat'][0]), 'lon': float(qs['lon'][0])},
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # 默认 5，高并发连接会被拒而触发重试
+
+
+def make_cities(n):
+    return [{'name': f'city-{i}', 'lat': -60 + (i * 0.37) % 120, 'lon': -180 + (i * 0.73) % 360}
+            for i in range(n)]
+
+
+def bench(mode, cities):
+    start = time.perf_counter()
+    rows = wtf.collect(cities, mode=mode)
+    elapsed = time.perf_counter() - start
+    print(f'{mode:>6}: {len(rows)}/{len(cities)} rows in {elapsed:.2f}s -> {len(rows) / elapsed:.1f} cities/sec')
+
+
+def main():
+    logging.getLogger().setLevel(logging.ERROR)
+    server = MockServer(('127.0.0.1', 0), MockOWMHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    wtf.API_BASE = f'http://127.0.0.1:{server.server_address[1]}/data/2.5/weather'
+    # 基准测试不受 API 配额限制
+    wtf.RATE_LIMIT = 1e6
+    wtf.RATE_BURST = 10 ** 6
+
+    cities = make_cities(N_CITIES)
+    print(f'{N_CITIES} cities, mock latency {LATENCY * 1000:.0f} ms, '
+          f'threads={wtf.CONCURRENCY}, async concurrency={wtf.ASYNC_CONCURRENCY}')
+    bench('thread', cities)
+    bench('async', cities)
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
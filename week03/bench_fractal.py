@@ -0,0 +1,66 @@
+"""各种 Mandelbrot 计算方式的速度对比（pixels/sec）。
+
+用法: python bench_fractal.py [边长] [max_iter]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+import fractal_engine
+from mandelbrot import mandelbrot_set_slow
+
+SIZE = int(sys.argv[1]) if len(sys.argv) > 1 else 800
+MAX_ITER = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+VIEW = (-2.0, 1.0, -1.5, 1.5)
+
+
+def masked_numpy(xmin, xmax, ymin, ymax, width, height, max_iter):
+    # test.py 原来的写法：每轮对 Z[mask] 做花式索引拷贝
+    x = np.linspace(xmin, xmax, width)
+    y = np.linspace(ymin, ymax, height)
+    X, Y = np.meshgrid(x, y)
+    C = X + 1j * Y
+    Z = np.zeros_like(C)
+    img = np.zeros(C.shape, dtype=float)
+    for i in range(max_iter):
+        mask = np.abs(Z) <= 2
+        Z[mask] = Z[mask] ** 2 + C[mask]
+        img[mask & (img == 0)] = i
+    img[img == 0] = max_iter
+    return img
+
+
+def bench(name, fn, pixels):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f'{name:<34} {elapsed:8.3f}s  {pixels / elapsed / 1e6:8.2f} Mpx/s')
+
+
+def zoom_frames(cache, n=30, size=400):
+    # 先放大再缩回（往返动画），回程的帧与去程重叠
+    zs = np.geomspace(1, 0.1, n // 2)
+    for z in np.concatenate([zs, zs[::-1]]):
+        fractal_engine.render(-2 * z, 1.2 * z, -1.5 * z, 1.5 * z, size, size, MAX_ITER, tile=64, cache=cache)
+
+
+def main():
+    px = SIZE * SIZE
+    workers = os.cpu_count() or 1
+    print(f'{SIZE}x{SIZE}, max_iter={MAX_ITER}, {workers} cores')
+    small = min(SIZE, 200)
+    bench(f'python loop ({small}x{small})', lambda: mandelbrot_set_slow(*VIEW, small, small, MAX_ITER), small * small)
+    bench('numpy masked (test.py)', lambda: masked_numpy(*VIEW, SIZE, SIZE, MAX_ITER), px)
+    bench('engine float64', lambda: fractal_engine.render(*VIEW, SIZE, SIZE, MAX_ITER), px)
+    bench('engine float32', lambda: fractal_engine.render(*VIEW, SIZE, SIZE, MAX_ITER, dtype=np.float32), px)
+    bench(f'engine tiles x{workers} procs', lambda: fractal_engine.render(*VIEW, SIZE, SIZE, MAX_ITER, workers=workers), px)
+    cache = fractal_engine.TileCache()
+    bench('zoom 30 frames in+out, no cache', lambda: zoom_frames(None), 30 * 400 * 400)
+    bench('zoom 30 frames in+out, tile cache', lambda: zoom_frames(cache), 30 * 400 * 400)
+    print(f'tile cache: {cache.hits} hits / {cache.misses} misses')
+
+
+if __name__ == '__main__':
+    main()
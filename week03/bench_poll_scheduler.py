@@ -0,0 +1,78 @@
+"""检查 poll_scheduler 的自适应采集：与每轮请求全部城市相比，省下多少请求、是否漏行。
+
+用合成的站点模拟（不发网络请求）: 每个站点按自己的周期（加上发布时间的随机抖动）
+产生新的 dt，观测在 LAG 秒后才能查到。同一时间线上分别跑
+- 全量: 每轮请求全部城市（ADAPTIVE_POLL=0 的行为）
+- 自适应: 每轮只请求 PollScheduler.plan 给出的城市
+比较两者拿到的 (city, dt) 行数；自适应少拿任何一行即以非零状态退出。
+
+用法: python bench_poll_scheduler.py [采集间隔秒 ...]   (默认 300 600 900)
+"""
+import bisect
+import random
+import sys
+
+from poll_scheduler import PollScheduler
+
+N_CITIES = 30
+HOURS = 48
+PERIODS = [600, 900, 1200, 1800, 3600]  # 站点更新周期（秒）
+JITTER = 30                             # 每次发布时间的随机偏移（秒）
+LAG = 10                                # 观测发布后多久才能通过 API 查到
+START = 1_000_000
+SEEDS = range(10)                       # 每个间隔模拟几组随机站点
+
+
+def make_stations(seed=1):
+    rng = random.Random(seed)
+    stations = {}
+    for i in range(N_CITIES):
+        period = rng.choice(PERIODS)
+        t = START - period + rng.randrange(period)
+        times = []
+        while t < START + HOURS * 3600 + period:
+            times.append(t)
+            t += period + rng.uniform(-JITTER, JITTER)
+        stations[f'city-{i}'] = [int(x) for x in times]
+    return stations
+
+
+def latest(times, now):
+    """now 时刻 API 返回的 dt。"""
+    return times[bisect.bisect_right(times, now - LAG) - 1]
+
+
+def simulate(stations, interval, adaptive):
+    cities = [{'name': n} for n in stations]
+    scheduler = PollScheduler(state_file=None)
+    rows, requests = set(), 0
+    for k in range(HOURS * 3600 // interval):
+        now = START + k * interval
+        due = scheduler.plan(cities, now)[0] if adaptive else cities
+        got = [{'city': c['name'], 'timestamp_unix': latest(stations[c['name']], now)} for c in due]
+        requests += len(due)
+        rows |= {(r['city'], r['timestamp_unix']) for r in got}
+        if adaptive:
+            scheduler.update(due, got, now)
+    return rows, requests
+
+
+def main():
+    intervals = [int(a) for a in sys.argv[1:]] or [300, 600, 900]
+    ok = True
+    for interval in intervals:
+        full_n = n = full_req = req = lost = 0
+        for seed in SEEDS:
+            stations = make_stations(seed)
+            full_rows, r0 = simulate(stations, interval, adaptive=False)
+            rows, r1 = simulate(stations, interval, adaptive=True)
+            full_n, n, full_req, req = full_n + len(full_rows), n + len(rows), full_req + r0, req + r1
+            lost += len(full_rows - rows)
+        ok &= lost == 0
+        print(f'interval {interval:>4}s: requests {req}/{full_req} ({1 - req / full_req:.0%} saved), '
+              f'rows {n}/{full_n}, lost {lost}')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
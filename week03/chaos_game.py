@@ -0,0 +1,144 @@
+"""向量化的混沌游戏 (chaos game) / IFS 点生成器。
+
+原来的 sierpinksi_matplot_animation.py 每帧用 Python 循环调用 500 次 np.random.randint。
+这里一次性生成整块随机映射下标，再用前缀扫描 (Hillis-Steele, log2(chunk) 轮) 计算仿射递推
+    x_{k+1} = A[i_k] @ x_k + b[i_k]
+每轮都是整块 NumPy 运算，千万级点数也只需要几十次数组操作。
+所有映射收缩比相同（普通多边形混沌游戏）时改用分段 cumsum，更快。
+
+支持任意多边形（每步向随机顶点移动 ratio）和一般 IFS（如 Barnsley 蕨类，带概率）。
+"""
+import numpy as np
+
+CHUNK = 1 << 18  # 每块点数，限制扫描时的临时内存
+
+
+def polygon_maps(vertices, ratio=0.5):
+    """多边形混沌游戏：x' = ratio * x + (1 - ratio) * v，返回 (A, b)。"""
+    v = np.asarray(vertices, dtype=float)
+    A = np.repeat(np.eye(2)[None] * ratio, len(v), axis=0)
+    b = (1 - ratio) * v
+    return A, b
+
+
+def sierpinski_maps():
+    return polygon_maps([[0.5, np.sqrt(3) / 2], [0, 0], [1, 0]], 0.5)
+
+
+def barnsley_fern():
+    """Barnsley 蕨类的 4 个仿射映射及其概率。"""
+    A = np.array([
+        [[0.0, 0.0], [0.0, 0.16]],
+        [[0.85, 0.04], [-0.04, 0.85]],
+        [[0.2, -0.26], [0.23, 0.22]],
+        [[-0.15, 0.28], [0.26, 0.24]],
+    ])
+    b = np.array([[0.0, 0.0], [0.0, 1.6], [0.0, 1.6], [0.0, 0.44]])
+    probs = np.array([0.01, 0.85, 0.07, 0.07])
+    return A, b, probs
+
+
+def _uniform_points(r, bx, by, x):
+    """所有映射都是 r*I + b（同一收缩比的多边形混沌游戏）时的快速路径。
+
+    x_k = r^(k+1) * x + sum_{j<=k} r^(k-j) * b_j。把序列切成长 L 的小段，段内用
+    r^-(j+1) 加权后 cumsum 一次求出，段与段之间只需传递起点；L 取到 r^-L 不溢出为止。
+    """
+    m = len(bx)
+    L = int(min(512, 300 / max(-np.log10(r), 1e-3)))
+    nb = -(-m // L)
+    pad = nb * L - m
+    j = np.arange(1, L + 1)
+    w = r ** -j.astype(float)
+    decay = r ** j.astype(float)
+    pts = np.empty((nb, L, 2))
+    for col, b in enumerate((bx, by)):
+        blk = np.concatenate([b, np.zeros(pad)]).reshape(nb, L)
+        pts[:, :, col] = np.cumsum(blk * w, axis=1) * decay
+    start = np.asarray(x, dtype=float)
+    for k in range(nb):
+        pts[k] += decay[:, None] * start
+        start = pts[k, -1]
+    return pts.reshape(-1, 2)[:m]
+
+
+def _affine_scan(a11, a12, a21, a22, bx, by):
+    """一般 2x2 仿射映射的前缀组合：结束后第 k 项 = M_k ∘ ... ∘ M_0。
+
+    按分量存储，每轮都是逐元素运算，比 (n, 2, 2) 的 matmul 快得多。
+    """
+    n = len(a11)
+    s = 1
+    while s < n:
+        p11, p12, p21, p22, pbx, pby = a11[:-s], a12[:-s], a21[:-s], a22[:-s], bx[:-s], by[:-s]
+        q11, q12, q21, q22 = a11[s:], a12[s:], a21[s:], a22[s:]
+        n11 = q11 * p11 + q12 * p21
+        n12 = q11 * p12 + q12 * p22
+        n21 = q21 * p11 + q22 * p21
+        n22 = q21 * p12 + q22 * p22
+        nbx = q11 * pbx + q12 * pby + bx[s:]
+        nby = q21 * pbx + q22 * pby + by[s:]
+        a11[s:], a12[s:], a21[s:], a22[s:], bx[s:], by[s:] = n11, n12, n21, n22, nbx, nby
+        s *= 2
+    return a11, a12, a21, a22, bx, by
+
+
+def chaos_points(maps, n_points, probs=None, chunk=CHUNK, seed=None, x0=(0.0, 0.0), burn_in=32):
+    """按块产出混沌游戏的点，每块 shape (m, 2)。
+
+    maps 为 (A, b)，A: (k, 2, 2)，b: (k, 2)。前 burn_in 个点（尚未落到吸引子上）被丢弃。
+    """
+    A_maps, b_maps = (np.asarray(m, dtype=float) for m in maps[:2])
+    # 所有映射都是同一个 r*I 时走 cumsum 快速路径
+    r = A_maps[0, 0, 0]
+    uniform = bool(np.all(A_maps == np.eye(2) * r)) and 0 < r < 1
+    rng = np.random.default_rng(seed)
+    x = np.asarray(x0, dtype=float)
+    remaining = n_points + burn_in
+    skip = burn_in
+    while remaining > 0:
+        m = min(chunk, remaining)
+        if probs is None:
+            idx = rng.integers(0, len(A_maps), size=m)
+        else:
+            idx = rng.choice(len(A_maps), size=m, p=probs)
+        bx, by = b_maps[idx, 0], b_maps[idx, 1]
+        if uniform:
+            pts = _uniform_points(r, bx, by, x)
+        else:
+            a11, a12, a21, a22, bx, by = _affine_scan(
+                A_maps[idx, 0, 0], A_maps[idx, 0, 1], A_maps[idx, 1, 0], A_maps[idx, 1, 1], bx, by)
+            pts = np.empty((m, 2))
+            pts[:, 0] = a11 * x[0] + a12 * x[1] + bx
+            pts[:, 1] = a21 * x[0] + a22 * x[1] + by
+        x = pts[-1].copy()
+        remaining -= m
+        if skip:
+            pts = pts[skip:]
+            skip = 0
+        if len(pts):
+            yield pts
+
+
+class DensityImage:
+    """把点累加进 2-D 直方图，用 log 亮度显示，点数再多内存也固定。"""
+
+    def __init__(self, extent, bins=(800, 800)):
+        self.extent = extent  # (xmin, xmax, ymin, ymax)
+        self.bins = bins
+        self.counts = np.zeros(bins[::-1], dtype=np.int64)
+        self.total = 0
+
+    def add(self, pts):
+        # 直接算像素下标再 bincount，比 np.histogram2d 快很多
+        xmin, xmax, ymin, ymax = self.extent
+        nx, ny = self.bins
+        ix = ((pts[:, 0] - xmin) * (nx / (xmax - xmin))).astype(np.int64)
+        iy = ((pts[:, 1] - ymin) * (ny / (ymax - ymin))).astype(np.int64)
+        ok = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+        flat = iy[ok] * nx + ix[ok]
+        self.counts += np.bincount(flat, minlength=nx * ny).reshape(ny, nx)
+        self.total += len(pts)
+
+    def image(self):
+        return np.log1p(self.counts)
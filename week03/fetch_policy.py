@@ -0,0 +1,136 @@
+"""天气采集脚本共用的重试策略与熔断器。
+
+原来的 fetch_city 对任何异常都按 1s/2s/4s 退避重试，包括 401/403/404 这类重试也不会
+成功的错误（见 onecall_fetch.log：每个城市都在订阅错误上白等 7 秒）。这里统一处理:
+- 可重试: 5xx、超时/连接错误、429（优先按 Retry-After 等待）
+- 终止: 401/403/404 等其余 4xx，以及解析响应时的意外异常（terminal=True），立即放弃
+- 熔断: 连续 BREAKER_THRESHOLD 次终止错误后打开熔断器，之后的请求直接跳过，
+  整轮采集在毫秒级结束；任何一次成功都会把连续计数清零
+- 计数: stats() 返回各种结果的次数，便于写进日志
+
+线程池与 asyncio 两种模式共用同一个实例，内部用锁保护计数。
+"""
+import threading
+import time
+from collections import Counter
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+RETRYABLE_STATUS = {408, 425, 429}  # 另外所有 5xx 都可重试
+BREAKER_THRESHOLD = 3  # 连续多少次终止错误后熔断
+MAX_WAIT = 60          # 单次等待上限（秒），包括 Retry-After
+
+
+def classify(status: Optional[int]) -> str:
+    """status 为 None 表示网络异常（超时、连接失败、响应不完整）。返回 'retry' 或 'terminal'。"""
+    if status is None or status >= 500 or status in RETRYABLE_STATUS:
+        return 'retry'
+    return 'terminal'
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After 可以是秒数，也可以是 HTTP 日期；无法解析时返回 None。"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """连续终止错误计数器；达到阈值后保持打开，直到 reset()。"""
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD):
+        self.threshold = threshold
+        self.consecutive = 0
+        self.is_open = False
+
+    def success(self):
+        self.consecutive = 0
+
+    def terminal(self) -> bool:
+        """记录一次终止错误，返回熔断器是否因此刚刚打开。"""
+        self.consecutive += 1
+        if not self.is_open and self.consecutive >= self.threshold:
+            self.is_open = True
+            return True
+        return False
+
+    def reset(self):
+        self.consecutive = 0
+        self.is_open = False
+
+
+class RetryPolicy:
+    """决定一次失败后是重试（等多久）还是放弃，并统计结果。
+
+    用法（同步与异步相同，只是等待方式不同）:
+        if not policy.allow(): 放弃
+        成功 -> policy.success()
+        失败 -> outcome, wait = policy.failure(attempt, status, retry_after)
+                outcome == 'retry' 时等待 wait 秒后重试，否则放弃；
+                'tripped' 表示这次终止错误刚刚打开了熔断器（只出现一次）
+    每轮采集开始时调用 reset()，stats() 因此是单轮的计数，熔断也只作用于当前这一轮。
+    """
+
+    def __init__(self, retries: int = 3, backoff: float = 2, max_wait: float = MAX_WAIT,
+                 breaker_threshold: int = BREAKER_THRESHOLD):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_wait = max_wait
+        self.breaker = CircuitBreaker(breaker_threshold)
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.breaker.is_open
+
+    def allow(self) -> bool:
+        """熔断器打开时不再发请求。"""
+        with self._lock:
+            if self.breaker.is_open:
+                self.counts['short_circuit'] += 1
+                return False
+            self.counts['attempt'] += 1
+            return True
+
+    def success(self):
+        with self._lock:
+            self.counts['ok'] += 1
+            self.breaker.success()
+
+    def failure(self, attempt: int, status: Optional[int] = None,
+                retry_after: Optional[str] = None, terminal: bool = False) -> Tuple[str, float]:
+        """返回 (outcome, wait)；outcome 为 'retry'、'terminal'、'tripped' 或 'exhausted'（重试次数用完）。"""
+        with self._lock:
+            if terminal or classify(status) == 'terminal':
+                self.counts['terminal'] += 1
+                self.counts['error' if status is None else f'status_{status}'] += 1
+                if self.breaker.terminal():
+                    self.counts['breaker_trips'] += 1
+                    return 'tripped', 0.0
+                return 'terminal', 0.0
+            self.counts['timeout' if status is None else f'status_{status}'] += 1
+            if attempt >= self.retries:
+                self.counts['exhausted'] += 1
+                return 'exhausted', 0.0
+            self.counts['retry'] += 1
+            wait = parse_retry_after(retry_after) if status == 429 else None
+            if wait is None:
+                wait = self.backoff ** (attempt - 1)
+            return 'retry', min(wait, self.max_wait)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+            self.breaker.reset()
@@ -0,0 +1,221 @@
+"""Mandelbrot 逃逸时间计算引擎（mandelbrot.py 与 test.py 共用）。
+
+- escape_time_grid(): NumPy 原地迭代，每轮把已逃逸的点从活动数组中剔除
+- render(): 把画面切成 tile，可用多进程并行计算
+- dtype=np.float32 时用单精度，速度更快但深度放大会出现块状失真
+- TileCache: 缩放动画中相邻帧重叠的区域直接复用已算好的 tile
+
+返回值与 mandelbrot.py 中逐像素的 mandelbrot(c, max_iter) 一致：
+|z| 第一次超过 2 时的迭代次数，从未逃逸则为 max_iter。
+"""
+import math
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+TILE = 256          # tile 边长（像素）
+ZOOM_LEVELS = 4     # 缓存模式下每个 2 倍缩放区间内的离散像素尺寸数
+
+
+def escape_time_grid(x, y, max_iter, dtype=np.float64):
+    """对网格 x (宽) × y (高) 计算逃逸次数，返回 shape (len(y), len(x)) 的 int32 数组。"""
+    x = np.asarray(x, dtype=dtype)
+    y = np.asarray(y, dtype=dtype)
+    h, w = len(y), len(x)
+    counts = np.full(h * w, max_iter, dtype=np.int32)
+    cr = np.tile(x, h)
+    ci = np.repeat(y, w)
+    idx = np.arange(h * w)
+    zr = np.zeros_like(cr)
+    zi = np.zeros_like(ci)
+    zr2 = np.empty_like(cr)
+    zi2 = np.empty_like(ci)
+    for n in range(1, max_iter + 1):
+        # zr2/zi2 是 z_{n-1} 的平方，先用它们判断逃逸
+        np.multiply(zr, zr, out=zr2)
+        np.multiply(zi, zi, out=zi2)
+        escaped = (zr2 + zi2) > 4
+        if escaped.any():
+            counts[idx[escaped]] = n - 1
+            keep = ~escaped
+            idx, cr, ci, zr, zi, zr2, zi2 = (a[keep] for a in (idx, cr, ci, zr, zi, zr2, zi2))
+            if idx.size == 0:
+                break
+        # z_n = z_{n-1}^2 + c，全部原地计算
+        zi *= zr
+        zi *= 2
+        zi += ci
+        np.subtract(zr2, zi2, out=zr)
+        zr += cr
+    return counts.reshape(h, w)
+
+
+def _tile_job(args):
+    x, y, max_iter, dtype = args
+    return escape_time_grid(x, y, max_iter, dtype)
+
+
+def _map_tiles(jobs, workers):
+    if workers and workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_tile_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    return [_tile_job(j) for j in jobs]
+
+
+class TileCache:
+    """按 (缩放级别, tile 行, tile 列, max_iter, dtype) 缓存 tile 的 LRU。"""
+
+    def __init__(self, max_tiles=2048):
+        self.max_tiles = max_tiles
+        self.tiles = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        tile = self.tiles.get(key)
+        if tile is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.tiles.move_to_end(key)
+        return tile
+
+    def put(self, key, tile):
+        self.tiles[key] = tile
+        self.tiles.move_to_end(key)
+        while len(self.tiles) > self.max_tiles:
+            self.tiles.popitem(last=False)
+
+
+def _render_direct(xmin, xmax, ymin, ymax, width, height, max_iter, dtype, workers, tile):
+    x = np.linspace(xmin, xmax, width)
+    y = np.linspace(ymin, ymax, height)
+    jobs, slots = [], []
+    for r in range(0, height, tile):
+        for c in range(0, width, tile):
+            jobs.append((x[c:c + tile], y[r:r + tile], max_iter, dtype))
+            slots.append((r, c))
+    out = np.empty((height, width), dtype=np.int32)
+    for (r, c), t in zip(slots, _map_tiles(jobs, workers)):
+        out[r:r + t.shape[0], c:c + t.shape[1]] = t
+    return out
+
+
+def _render_cached(xmin, xmax, ymin, ymax, width, height, max_iter, dtype, workers, tile, cache):
+    # 把像素尺寸向下取整到离散级别，tile 对齐到全局格点 i*step，
+    # 这样相邻的缩放帧 / 平移帧落在同一组 tile 上即可复用
+    step_req = min((xmax - xmin) / max(width - 1, 1), (ymax - ymin) / max(height - 1, 1))
+    level = math.floor(math.log2(step_req) * ZOOM_LEVELS)
+    step = 2.0 ** (level / ZOOM_LEVELS)
+    ix = np.rint(np.linspace(xmin, xmax, width) / step).astype(np.int64)
+    iy = np.rint(np.linspace(ymin, ymax, height) / step).astype(np.int64)
+    tx0, tx1 = ix[0] // tile, ix[-1] // tile
+    ty0, ty1 = iy[0] // tile, iy[-1] // tile
+    dtype_name = np.dtype(dtype).name
+    grid = {}
+    jobs, keys = [], []
+    for ty in range(ty0, ty1 + 1):
+        for tx in range(tx0, tx1 + 1):
+            key = (level, ty, tx, max_iter, dtype_name)
+            t = cache.get(key)
+            if t is None:
+                xs = (tx * tile + np.arange(tile)) * step
+                ys = (ty * tile + np.arange(tile)) * step
+                jobs.append((xs, ys, max_iter, dtype))
+                keys.append(key)
+            else:
+                grid[(ty, tx)] = t
+    for key, t in zip(keys, _map_tiles(jobs, workers)):
+        cache.put(key, t)
+        grid[(key[1], key[2])] = t
+    mosaic = np.empty(((ty1 - ty0 + 1) * tile, (tx1 - tx0 + 1) * tile), dtype=np.int32)
+    for (ty, tx), t in grid.items():
+        r, c = (ty - ty0) * tile, (tx - tx0) * tile
+        mosaic[r:r + tile, c:c + tile] = t
+    # 最近邻采样回请求的分辨率
+    return mosaic[np.ix_(iy - ty0 * tile, ix - tx0 * tile)]
+
+
+def render(xmin, xmax, ymin, ymax, width, height, max_iter,
+           dtype=np.float64, workers=1, tile=TILE, cache=None):
+    """计算 (height, width) 的逃逸次数图，行对应 y 从 ymin 到 ymax。
+
+    workers > 1 时按 tile 多进程计算；传入 TileCache 时走格点对齐 + 缓存路径
+    （像素尺寸会向下取整到 2^(k/ZOOM_LEVELS)，结果是最近邻采样）。
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if cache is None:
+        return _render_direct(xmin, xmax, ymin, ymax, width, height, max_iter, dtype, workers, tile)
+    return _render_cached(xmin, xmax, ymin, ymax, width, height, max_iter, dtype, workers, tile, cache)
+
+
+def make_lut(cmap_name='twilight', size=256):
+    """把 matplotlib 色图采样成 (size, 3) 的 uint8 查找表。"""
+    import matplotlib.pyplot as plt
+    rgba = plt.colormaps.get_cmap(cmap_name)(np.linspace(0, 1, size))
+    return (rgba[:, :3] * 255).astype(np.uint8)
+
+
+def colorize(counts, max_iter, lut):
+    """逃逸次数 -> RGB uint8 图像（行序翻转为 y 轴向上）。"""
+    idx = counts.astype(np.int64)
+    idx *= len(lut) - 1
+    idx //= max(max_iter, 1)
+    return lut[idx[::-1]]
+
+
+def zoom_views(center, start_width, zoom_per_frame, n_frames, aspect=1.0):
+    """以 center 为中心按几何级数放大，逐帧产出 (xmin, xmax, ymin, ymax)。"""
+    cx, cy = center
+    w = start_width
+    for _ in range(n_frames):
+        h = w * aspect
+        yield cx - w / 2, cx + w / 2, cy - h / 2, cy + h / 2
+        w *= zoom_per_frame
+
+
+def export_zoom(out, n_frames=1000, size=(640, 480), max_iter=200, fps=30,
+                center=(-0.743643887037151, 0.131825904205330), start_width=3.0,
+                zoom_per_frame=0.985, cmap_name='twilight', workers=1, max_iter_growth=0.0):
+    """逐帧计算并直接编码的深度缩放导出，内存占用与帧数无关。
+
+    out 以 .mp4 等视频扩展名结尾时通过管道把 rgb24 原始帧送给 ffmpeg；
+    否则视为目录，写出 PNG 序列 frame_00000.png ...
+    max_iter_growth > 0 时每帧按比例增加迭代次数，越深的放大需要越多迭代。
+    """
+    import shutil
+    import subprocess
+    width, height = size
+    lut = make_lut(cmap_name)
+    to_png = os.path.splitext(out)[1] == ''
+    proc = None
+    if to_png:
+        os.makedirs(out, exist_ok=True)
+    else:
+        ffmpeg = shutil.which('ffmpeg')
+        if ffmpeg is None:
+            raise RuntimeError('视频导出需要 ffmpeg；或把 out 设为目录以输出 PNG 序列')
+        proc = subprocess.Popen(
+            [ffmpeg, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+             '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+             '-c:v', 'libx264', '-pix_fmt', 'yuv420p', out],
+            stdin=subprocess.PIPE)
+    try:
+        views = zoom_views(center, start_width, zoom_per_frame, n_frames, aspect=height / width)
+        for i, (xmin, xmax, ymin, ymax) in enumerate(views):
+            iters = int(max_iter * (1 + max_iter_growth) ** i)
+            counts = render(xmin, xmax, ymin, ymax, width, height, iters, workers=workers)
+            rgb = colorize(counts, iters, lut)
+            if proc is not None:
+                proc.stdin.write(np.ascontiguousarray(rgb).tobytes())
+            else:
+                import matplotlib.image as mimage
+                mimage.imsave(os.path.join(out, f'frame_{i:05d}.png'), rgb)
+    finally:
+        if proc is not None:
+            proc.stdin.close()
+            proc.wait()
+    return out
@@ -1,3 +1,5 @@
+from collections import OrderedDict
+
 import matplotlib.pyplot as plt
 import numpy as np
 
@@ -35,9 +37,147 @@ def koch_snowflake(order, scale=10):
     x, y = points.real, points.imag
     return x, y
 
-x, y = koch_snowflake(order=7)
+ZR = 0.5 - 0.5j * np.sqrt(3) / 3
+
+# 每个 (order, scale) 只计算一次，高阶从已缓存的最高低阶继续细分；
+# 只保留最近用到的 CACHE_LEVELS 个，第 k 阶有 3·4^k 个点，高阶不能无限制地攒着
+CACHE_LEVELS = 4
+_cache = OrderedDict()
+
+
+def _remember(key, pts):
+    _cache[key] = pts
+    _cache.move_to_end(key)
+    while len(_cache) > CACHE_LEVELS:
+        _cache.popitem(last=False)
+
+
+def _subdivide(p1, p2):
+    """把边 p1->p2 各分成 4 段，返回新的 (起点, 终点)。"""
+    dp = p2 - p1
+    a = p1 + dp / 3
+    b = p1 + dp * ZR
+    c = p1 + dp / 3 * 2
+    starts = np.empty(len(p1) * 4, dtype=np.complex128)
+    ends = np.empty_like(starts)
+    starts[::4], starts[1::4], starts[2::4], starts[3::4] = p1, a, b, c
+    ends[::4], ends[1::4], ends[2::4], ends[3::4] = a, b, c, p2
+    return starts, ends
+
+
+def koch_points(order, scale=10):
+    """与 koch_snowflake 相同的点（复数数组），但对每一阶做记忆化。"""
+    key = (order, scale)
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    lower = [k for (k, s) in _cache if s == scale and k < order]
+    if lower:
+        k = max(lower)
+        pts = _cache[(k, scale)]
+    else:
+        k = 0
+        angles = np.array([0, 120, 240]) + 90
+        pts = scale / np.sqrt(3) * np.exp(np.deg2rad(angles) * 1j)
+    while k < order:
+        pts, _ = _subdivide(pts, np.roll(pts, -1))
+        k += 1
+    _remember(key, pts)
+    return pts
+
+
+def koch_chunks(order, scale=10, chunk_edges=4096, base_order=None):
+    """分块产出 order 阶雪花的点，不分配完整的 3·4^order 数组。
+
+    从较低的 base_order（默认让每块约 chunk_edges * 4^(order-base) 个点）取出一段边，
+    在局部细分到目标阶后 yield，拼起来与 koch_points(order) 完全一致。
+    """
+    if base_order is None:
+        base_order = max(0, order - 6)
+    base_order = min(base_order, order)
+    base = koch_points(base_order, scale)
+    ends_all = np.roll(base, -1)
+    for i in range(0, len(base), chunk_edges):
+        starts, ends = base[i:i + chunk_edges], ends_all[i:i + chunk_edges]
+        for _ in range(order - base_order):
+            starts, ends = _subdivide(starts, ends)
+        yield starts
+
+
+def koch_lod(max_order, xlim, ylim, pixel, scale=10):
+    """只在可见区域内细分，边长小于一个像素后停止，返回 x, y。
+
+    视口外的边保持当前的粗糙程度（仍然构成闭合多边形，可直接 fill），
+    所以点数取决于屏幕上可见的细节，而不是 4^max_order。
+    """
+    starts = koch_points(0, scale)
+    ends = np.roll(starts, -1)
+    (x0, x1), (y0, y1) = sorted(xlim), sorted(ylim)
+    for _ in range(max_order):
+        length = np.abs(ends - starts)
+        # 一条边之后的所有细分都落在以它为直径附近的范围内
+        margin = length * 0.5
+        lo_x = np.minimum(starts.real, ends.real) - margin
+        hi_x = np.maximum(starts.real, ends.real) + margin
+        lo_y = np.minimum(starts.imag, ends.imag) - margin
+        hi_y = np.maximum(starts.imag, ends.imag) + margin
+        visible = (hi_x >= x0) & (lo_x <= x1) & (hi_y >= y0) & (lo_y <= y1)
+        split = visible & (length > pixel)
+        if not split.any():
+            break
+        s_new, e_new = _subdivide(starts[split], ends[split])
+        # 保持边的顺序：被细分的边在原位置展开成 4 条
+        counts = np.where(split, 4, 1)
+        pos = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        n = counts.sum()
+        new_starts = np.empty(n, dtype=np.complex128)
+        new_ends = np.empty(n, dtype=np.complex128)
+        keep = ~split
+        new_starts[pos[keep]] = starts[keep]
+        new_ends[pos[keep]] = ends[keep]
+        sub_pos = (pos[split][:, None] + np.arange(4)).ravel()
+        # _subdivide 输出按边交错排列，与 sub_pos 的展开顺序一致
+        new_starts[sub_pos] = s_new
+        new_ends[sub_pos] = e_new
+        starts, ends = new_starts, new_ends
+    return starts.real, starts.imag
+
+
+MAX_ORDER = 12  # LOD 模式下允许的最大阶数（放大时才会真正细分到这么深）
+
+if __name__ == '__main__':
+    fig, ax = plt.subplots(figsize=(8, 8))
+    ax.set_aspect('equal')
+    x, y = koch_snowflake(order=3)
+    ax.set_xlim(x.min() - 0.5, x.max() + 0.5)
+    ax.set_ylim(y.min() - 0.5, y.max() + 0.5)
+    patch, = ax.fill(x, y)
+
+    last_view = [None]
+
+    def refresh():
+        # 根据当前视口和像素大小重新生成多边形；视口没变就不重算
+        xlim, ylim = ax.get_xlim(), ax.get_ylim()
+        pixel = (xlim[1] - xlim[0]) / max(ax.bbox.width, 1)
+        view = (xlim, ylim, pixel)
+        if view == last_view[0]:
+            return
+        last_view[0] = view
+        x, y = koch_lod(MAX_ORDER, xlim, ylim, pixel)
+        patch.set_xy(np.column_stack([x, y]))
+        fig.canvas.draw_idle()
+
+    # 平移 / 缩放会先后改 x、y 两个范围：两个回调只重启同一个单次定时器，
+    # 等两边都改完后只刷新一次
+    timer = fig.canvas.new_timer(interval=10)
+    timer.single_shot = True
+    timer.add_callback(refresh)
+
+    def schedule(_ax):
+        timer.stop()
+        timer.start()
 
-plt.figure(figsize=(8, 8))
-plt.axis('equal')
-plt.fill(x, y)
-plt.show()
\ No newline at end of file
+    ax.callbacks.connect('xlim_changed', schedule)
+    ax.callbacks.connect('ylim_changed', schedule)
+    refresh()
+    plt.show()
\ No newline at end of file
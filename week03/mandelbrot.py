@@ -1,5 +1,6 @@
 import numpy as np
 import matplotlib.pyplot as plt
+import fractal_engine
 
 def mandelbrot(c, max_iter):
     z = 0
@@ -9,11 +10,17 @@ def mandelbrot(c, max_iter):
         n += 1
     return n
 
-def mandelbrot_set(xmin, xmax, ymin, ymax, width, height, max_iter):
+def mandelbrot_set_slow(xmin, xmax, ymin, ymax, width, height, max_iter):
+    # 逐像素调用 mandelbrot()，保留作对照
     r1 = np.linspace(xmin, xmax, width)
     r2 = np.linspace(ymin, ymax, height)
     return (r1, r2, np.array([[mandelbrot(complex(r, i), max_iter) for r in r1] for i in r2]))
 
+def mandelbrot_set(xmin, xmax, ymin, ymax, width, height, max_iter, workers=None):
+    r1 = np.linspace(xmin, xmax, width)
+    r2 = np.linspace(ymin, ymax, height)
+    return (r1, r2, fractal_engine.render(xmin, xmax, ymin, ymax, width, height, max_iter, workers=workers))
+
 def display(xmin, xmax, ymin, ymax, width, height, max_iter):
     r1, r2, mandelbrot_image = mandelbrot_set(xmin, xmax, ymin, ymax, width, height, max_iter)
     plt.imshow(mandelbrot_image, extent=(xmin, xmax, ymin, ymax), cmap='hot')
@@ -21,5 +28,5 @@ def display(xmin, xmax, ymin, ymax, width, height, max_iter):
     plt.title("Mandelbrot Set")
     plt.show()
 
-if __name__ == "__main__":
+if __name__ == "__main__":  # 多进程 tile 计算需要这个保护
     display(-2.0, 1.0, -1.5, 1.5, 2000, 2000, 100)
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""按观测更新节奏安排采集：只请求可能已有新数据的城市。
+
+OpenWeatherMap current weather 的 dt（观测时间）每个站点大约 10 分钟以上才前进一次，
+run_once 却每轮请求全部城市，重复的观测最后又被 dedupe_and_trim / SegmentStore 丢掉。
+PollScheduler 为每个城市记录:
+- last_dt: 最近一次拿到的观测时间
+- deltas: 最近几次 dt 前进的间隔；跳过某轮时看到的间隔是真实周期的整数倍，
+  所以取这些间隔（按 STEP 取整）的最大公约数作为周期估计，例如 1200 与 1800 -> 600
+- next_due: 预计下一次观测出现的时间，未到时本轮跳过该城市
+
+dt 没有前进（来早了，通常是发布略晚）时，RECHECK_SEC 秒后（即下一轮）再查。以下城市总是会被请求:
+- 还没观测到 MIN_OBSERVATIONS 次 dt 前进的城市（周期未学好之前跳过会漏数据）
+- 上一轮请求失败的城市
+- 超过 MAX_PERIOD 没有请求过的城市（估计出错也不会长期漏数据）
+状态保存在 STATE_FILE 中，进程重启后沿用。
+"""
+import json
+import math
+import os
+import time
+from typing import Any, Dict, List, Tuple
+
+STATE_FILE = 'weather_poll_state.json'
+DEFAULT_PERIOD = 600    # 没有观测历史时假定的更新周期（秒）
+MIN_PERIOD = 300        # 周期估计的上下限
+MAX_PERIOD = 3600       # 同时也是单个城市两次请求之间的最长间隔
+HISTORY = 5             # 保留最近几次 dt 间隔
+MIN_OBSERVATIONS = 3    # 至少观测到几次 dt 前进后才开始跳过
+STEP = 60               # 求公约数前把间隔取整到 STEP 秒，吸收发布时间的抖动
+RECHECK_SEC = 60         # dt 未前进时，隔多久再查
+
+
+class PollScheduler:
+    def __init__(self, state_file: str = STATE_FILE):
+        self.state_file = state_file
+        self.state: Dict[str, Dict[str, Any]] = {}
+        self.totals = {'polled': 0, 'skipped': 0, 'changed': 0, 'unchanged': 0, 'failed': 0}
+        self._load()
+
+    def _load(self):
+        if not self.state_file or not os.path.isfile(self.state_file):
+            return
+        try:
+            with open(self.state_file, encoding='utf-8') as f:
+                self.state = json.load(f)
+        except (OSError, ValueError):
+            self.state = {}  # 状态文件损坏时从头估计，不影响采集
+
+    def save(self):
+        if not self.state_file:
+            return
+        tmp = self.state_file + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.state_file)
+
+    def period(self, name: str) -> float:
+        deltas = self.state.get(name, {}).get('deltas')
+        if not deltas:
+            return DEFAULT_PERIOD
+        g = 0
+        for d in deltas:
+            g = math.gcd(g, int(round(d / STEP)) * STEP)
+        # 抖动大时公约数会很小，被 MIN_PERIOD 兜住：多请求几次，但不会漏数据
+        return min(MAX_PERIOD, max(MIN_PERIOD, g))
+
+    def is_due(self, name: str, now: float) -> bool:
+        st = self.state.get(name)
+        if st is None or len(st['deltas']) < MIN_OBSERVATIONS:
+            return True
+        return now >= st['next_due'] or now - st['last_fetch'] >= MAX_PERIOD
+
+    def plan(self, cities: List[Dict[str, Any]], now: float = None) -> Tuple[List[Dict[str, Any]], int]:
+        """返回 (本轮要请求的城市, 跳过的城市数)。"""
+        now = time.time() if now is None else now
+        due = [c for c in cities if self.is_due(c['name'], now)]
+        skipped = len(cities) - len(due)
+        self.totals['polled'] += len(due)
+        self.totals['skipped'] += skipped
+        return due, skipped
+
+    def update(self, polled: List[Dict[str, Any]], rows: List[Dict[str, Any]], now: float = None) -> Dict[str, int]:
+        """用本轮结果更新各城市状态，返回本轮的 changed/unchanged/failed 计数。"""
+        now = time.time() if now is None else now
+        by_city = {r['city']: r for r in rows}
+        counts = {'changed': 0, 'unchanged': 0, 'failed': 0}
+        for c in polled:
+            name = c['name']
+            row = by_city.get(name)
+            if row is None:
+                counts['failed'] += 1  # 不记录，下一轮照常请求
+                continue
+            dt = int(row['timestamp_unix'])
+            st = self.state.setdefault(name, {'last_dt': None, 'deltas': []})
+            st['last_fetch'] = now
+            if st['last_dt'] is None or dt > st['last_dt']:
+                if st['last_dt'] is not None:
+                    st['deltas'] = (st['deltas'] + [dt - st['last_dt']])[-HISTORY:]
+                st['last_dt'] = dt
+                counts['changed'] += 1
+                # 预计下一次观测时间（发布时间有抖动，提前 STEP 秒）；已经过了就按复查间隔再来
+                st['next_due'] = max(dt + self.period(name) - STEP, now + RECHECK_SEC)
+            else:
+                counts['unchanged'] += 1
+                st['next_due'] = now + RECHECK_SEC
+        for k, v in counts.items():
+            self.totals[k] += v
+        self.save()
+        return counts
@@ -1,6 +1,7 @@
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.animation import FuncAnimation
+from chaos_game import chaos_points, polygon_maps, DensityImage
 
 # create a figure
 fig = plt.figure(figsize=(7, 7))
@@ -18,6 +19,12 @@ vertices = [[0.5, np.sqrt(3)/2], [0, 0], [1, 0]]
 max_runs = 20
 iters = 500 # number of iterations per run
 
+# 'classic': 原来的逐点 Python 循环; 'scatter': 向量化引擎 + 单个复用的 scatter;
+# 'density': 向量化引擎 + 2-D 直方图密度图（适合 10^7 以上的点数）
+mode = 'density'
+points_per_frame = 500_000  # scatter / density 模式每帧新增的点数
+ratio = 0.5                 # 每步向顶点移动的比例，换成其他多边形时可调整
+
 # draw equilateral triangle
 triangle = plt.Polygon(vertices, fill=None)
 
@@ -67,8 +74,39 @@ def update(frame):
         # remove oldest one from the list
         runs.pop(0)
 
+# 向量化引擎：无限长的点流，每帧取一块
+stream = chaos_points(polygon_maps(vertices, ratio), n_points=10**15, chunk=points_per_frame)
+
+# scatter 模式只保留一个 artist，每帧替换坐标和颜色
+points = ax.scatter([], [], s=0.2, linewidths=0)
+
+# density 模式：点累加进直方图，只更新图像数据
+density = DensityImage((-0.2, 1.2, -0.2, 1.2), bins=(700, 700))
+image = ax.imshow(density.image(), extent=density.extent, origin='lower', cmap='magma', visible=False)
+
+def update_scatter(frame):
+    frame = frame % max_loop
+    points.set_offsets(next(stream))
+    points.set_color(plt.cm.viridis(frame/max_loop))
+    triangle.set_edgecolor(plt.cm.viridis(1 - frame/max_loop))
+    return points, triangle
+
+def update_density(frame):
+    density.add(next(stream))
+    img = density.image()
+    image.set_data(img)
+    image.set_clim(0, img.max())
+    ax.set_title(f'{density.total:,} points', y=0.95)
+    return image,
+
 # create the animation
-animation = FuncAnimation(fig, update, interval=10, cache_frame_data=False)
+if mode == 'density':
+    image.set_visible(True)
+    animation = FuncAnimation(fig, update_density, interval=10, cache_frame_data=False)
+elif mode == 'scatter':
+    animation = FuncAnimation(fig, update_scatter, interval=10, cache_frame_data=False)
+else:
+    animation = FuncAnimation(fig, update, interval=10, cache_frame_data=False)
 
 # show the plot
 plt.show()
\ No newline at end of file
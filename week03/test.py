@@ -5,30 +5,29 @@ def mandelbrot_animation():
     import numpy as np
     fig, ax = plt.subplots(figsize=(8,8))
     ax.axis('off')
-    def mandelbrot(xmin, xmax, ymin, ymax, width, height, max_iter):
-        x = np.linspace(xmin, xmax, width)
-        y = np.linspace(ymin, ymax, height)
-        X, Y = np.meshgrid(x, y)
-        C = X + 1j * Y
-        Z = np.zeros_like(C)
-        img = np.zeros(C.shape, dtype=float)
-        for i in range(max_iter):
-            mask = np.abs(Z) <= 2
-            Z[mask] = Z[mask] ** 2 + C[mask]
-            img[mask & (img==0)] = i
-        img[img==0] = max_iter
-        return img
+    # 精确逐像素计算（不走 TileCache：缓存路径是取整到离散缩放级别后的最近邻采样）
+    from fractal_engine import render
     ims = []
     # 动画参数：逐步缩放到细节区域
     zooms = np.linspace(1, 0.1, 60)
     for z in zooms:
         xmin, xmax = -2*z, 1.2*z
         ymin, ymax = -1.5*z, 1.5*z
-        img = mandelbrot(xmin, xmax, ymin, ymax, 400, 400, 50)
+        img = render(xmin, xmax, ymin, ymax, 400, 400, 50)
         im = ax.imshow(img, cmap='twilight', extent=[xmin, xmax, ymin, ymax], animated=True)
         ims.append([im])
     ani = animation.ArtistAnimation(fig, ims, interval=100, blit=True, repeat_delay=1000)
     plt.show()
+
+# --- Mandelbrot 深度缩放导出（流式，不保留 matplotlib artist）---
+def mandelbrot_zoom_export(out='mandelbrot_zoom.mp4', n_frames=1000):
+    import shutil
+    from fractal_engine import export_zoom
+    if out.endswith('.mp4') and shutil.which('ffmpeg') is None:
+        print('未检测到 ffmpeg，改为输出 PNG 序列')
+        out = 'mandelbrot_zoom_frames'
+    export_zoom(out, n_frames=n_frames, max_iter_growth=0.002)
+    print(f'已生成 {out} ({n_frames} 帧)')
 # --- 分形神经元/树状动画粒子系统 ---
 
 import matplotlib.pyplot as plt
@@ -36,6 +35,7 @@ import matplotlib.animation as animation
 import numpy as np
 from matplotlib.patches import FancyArrowPatch
 from matplotlib import colors as mcolors
+import shutil
 
 def draw_branch(ax, x, y, angle, depth, max_depth, branch_length, branch_angle, color_map, lines, dots, color_idx):
     if depth > max_depth:
@@ -55,60 +55,83 @@ def draw_branch(ax, x, y, angle, depth, max_depth, branch_length, branch_angle,
         lines.append(((x, y), (cx, cy), (x2, y2), color_idx, depth))
         draw_branch(ax, x2, y2, theta, depth+1, max_depth, branch_length*0.8, branch_angle, color_map, lines, dots, color_idx+1)
 
-def animate_neuron_tree():
+def precompute_tree(lines, dots, max_depth, n_samples=20):
+    """把所有分支的贝塞尔曲线一次性算成 (N, n_samples, 2) 数组，颜色也一次算好。"""
+    arr = np.array([(x1, y1, cx, cy, x2, y2, cidx, depth)
+                    for (x1, y1), (cx, cy), (x2, y2), cidx, depth in lines], dtype=float)
+    p1, ctrl, p2 = arr[:, None, 0:2], arr[:, None, 2:4], arr[:, None, 4:6]
+    t = np.linspace(0, 1, n_samples)[None, :, None]
+    curves = (1-t)**2 * p1 + 2*(1-t)*t * ctrl + t**2 * p2
+    line_colors = get_colors(arr[:, 7], max_depth, arr[:, 6])
+    term = np.array([(x, y, cidx, depth) for x, y, cidx, depth in dots], dtype=float).reshape(-1, 4)
+    return {
+        'curves': curves,
+        'line_colors': line_colors,
+        'ends': arr[:, 4:6],
+        'term_xy': term[:, 0:2],
+        'term_colors': get_colors(term[:, 3], max_depth, term[:, 2]),
+        'term_depth': term[:, 3],
+    }
+
+def get_colors(depth, max_depth, base_idx):
+    # 越向外越浅，HSV色相+亮度渐变（向量化版本）
+    hsv = np.empty((len(depth), 3))
+    hsv[:, 0] = (base_idx % 100) / 100
+    hsv[:, 1] = 0.7
+    hsv[:, 2] = np.clip(0.3 + 0.7 * (depth / max_depth), 0, 1)
+    return mcolors.hsv_to_rgb(hsv)
+
+def animate_neuron_tree(max_depth=7, n_roots=4, outfile=None, fps=15, frames=101):
+    """outfile 不为空时不弹窗口，直接渲染成 mp4/gif（可用于很深的树）。"""
+    from matplotlib.collections import LineCollection
+    if outfile:
+        plt.switch_backend('Agg')
     fig, ax = plt.subplots(figsize=(10, 10))
     ax.set_facecolor('black')
     ax.axis('off')
+    ax.set_xlim(-3, 3)
+    ax.set_ylim(-3, 3)
     np.random.seed(42)
     # 生成所有分支和末端点
     lines, dots = [], []
     color_map = plt.get_cmap('hsv')
-    n_roots = 4
-    max_depth = 7
     for i in range(n_roots):
         angle = i * 2 * np.pi / n_roots + np.random.uniform(-0.2, 0.2)
         draw_branch(ax, 0, 0, angle, 0, max_depth, 1.0, np.pi/4, color_map, lines, dots, i*10)
     total = len(lines)
-    def get_color(depth, max_depth, base_idx):
-        # 越向外越浅，HSV色相+亮度渐变
-        h = (base_idx % 100) / 100
-        s = 0.7
-        v = 0.3 + 0.7 * (depth / max_depth)
-        return mcolors.hsv_to_rgb((h, s, v))
+    tree = precompute_tree(lines, dots, max_depth)
+    # 只有一个 LineCollection 和一个 scatter，每帧只揭示前 n 条分支
+    branches = LineCollection([], linewidths=0.8, alpha=0.85)
+    ax.add_collection(branches)
+    points = ax.scatter([], [], s=9, alpha=0.95, linewidths=0)
     def update(frame):
-        ax.clear()
-        ax.set_facecolor('black')
-        ax.axis('off')
-        n = int(total * frame / 100)
-        # 记录已画过的末端点，避免重复
-        drawn_dots = set()
-        for (x1, y1), (cx, cy), (x2, y2), cidx, depth in lines[:n]:
-            color = get_color(depth, max_depth, cidx)
-            t = np.linspace(0, 1, 20)
-            bx = (1-t)**2 * x1 + 2*(1-t)*t*cx + t**2 * x2
-            by = (1-t)**2 * y1 + 2*(1-t)*t*cy + t**2 * y2
-            ax.plot(bx, by, color=color, lw=0.8, alpha=0.85)
-            # 每个分支的末端都画圆点
-            if frame == 100 or n == total or (x2, y2) not in drawn_dots:
-                ax.plot(x2, y2, 'o', color=color, markersize=3, alpha=0.95)
-                drawn_dots.add((x2, y2))
-        # 末端点（递归终止点）
-        for x, y, cidx, depth in dots:
-            if n > total * (depth/(max_depth+1)):
-                color = get_color(depth, max_depth, cidx)
-                ax.plot(x, y, 'o', color=color, markersize=3, alpha=0.95)
-        ax.set_xlim(-3, 3)
-        ax.set_ylim(-3, 3)
-        return []
-    ani = animation.FuncAnimation(fig, update, frames=101, interval=60, blit=False, repeat=False)
-    plt.show()
+        n = int(total * frame / (frames - 1))
+        branches.set_segments(tree['curves'][:n])
+        branches.set_color(tree['line_colors'][:n])
+        # 每个分支的末端都画圆点，再加上已"长到"的递归终止点
+        term = n > total * (tree['term_depth'] / (max_depth+1))
+        points.set_offsets(np.concatenate([tree['ends'][:n], tree['term_xy'][term]]))
+        points.set_color(np.concatenate([tree['line_colors'][:n], tree['term_colors'][term]]))
+        return branches, points
+    ani = animation.FuncAnimation(fig, update, frames=frames, interval=60, blit=True, repeat=False)
+    if outfile:
+        writer = 'pillow' if outfile.endswith('.gif') else 'ffmpeg'
+        ani.save(outfile, writer=writer, fps=fps)
+        plt.close(fig)
+        print(f'已生成 {outfile} ({total} 条分支)')
+    else:
+        plt.show()
 
 
 # --- 主程序 ---
 if __name__ == '__main__':
-    print("请选择模式：1-分形神经元动画  2-Mandelbrot set 动画")
-    mode = input("输入1或2：").strip()
+    print("请选择模式：1-分形神经元动画  2-Mandelbrot set 动画  3-Mandelbrot 缩放视频导出  4-神经元动画导出（深层树，无窗口）")
+    mode = input("输入1、2、3或4：").strip()
     if mode == '2':
         mandelbrot_animation()
+    elif mode == '3':
+        mandelbrot_zoom_export()
+    elif mode == '4':
+        animate_neuron_tree(max_depth=9, outfile='neuron_tree.mp4' if shutil.which('ffmpeg') else 'neuron_tree.gif')
     else:
         animate_neuron_tree()
\ No newline at end of file
@@ -1,13 +1,11 @@
-import pandas as pd
-from pathlib import Path
 import sys
+from weather_store import load_timeseries
 
-CSV = Path('city_weather_timeseries.csv')
-if not CSV.exists():
+df = load_timeseries()
+if df is None:
     print('缺少 city_weather_timeseries.csv，请先运行 weather_timeseries_fetch.py')
     sys.exit(1)
 
-df = pd.read_csv(CSV)
 if df.empty:
     print('文件为空')
     sys.exit(0)
@@ -0,0 +1,197 @@
+"""weather_anim_matplotlib.py 的增量渲染器。
+
+原版 update(i) 每帧 ax.clear() 后重新 scatter TRAIL_LEN 次并新建注释。这里:
+- 每个时间戳的投影坐标 / 温度 / 点大小只在 precompute_frames() 中计算一次
+- 固定 TRAIL_LEN 个 PathCollection（尾巴 + 当前帧）和两个注释，每帧只 set_offsets/set_array/set_alpha
+- 所有动态元素都在坐标轴内部，可以开启 blit
+- render_parallel() 把帧区间分给多个进程各自编码，再用 ffmpeg concat 拼接
+
+交互/单进程: python weather_anim_matplotlib.py --fast
+多进程导出:   python weather_anim_fast.py --workers 8 --fps 4 --outfile weather_animation
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+def to_mollweide_lon(lon):
+    """经度转换到 [-180, 180) 再转弧度（mollweide 需要）。"""
+    lon = ((lon + 180) % 360) - 180
+    return np.radians(lon)
+
+
+def precompute_frames(df) -> List[Dict[str, Any]]:
+    """按 timestamp_unix 分组，一次性算好每帧需要的数组。"""
+    frames = []
+    df = df.sort_values('timestamp_unix')
+    for ts, g in df.groupby('timestamp_unix'):
+        temp = g['temp'].to_numpy(dtype=float)
+        lon = to_mollweide_lon(g['lon'].to_numpy(dtype=float))
+        lat = np.radians(g['lat'].to_numpy(dtype=float))
+        frame = {
+            'ts': int(ts),
+            'offsets': np.column_stack([lon, lat]),
+            'temp': temp,
+            'size': g['wind_speed'].fillna(0).to_numpy(dtype=float) + 1,
+            'label': datetime.fromtimestamp(int(ts), tz=timezone.utc).strftime('%Y-%m-%d %H:%M UTC'),
+        }
+        if np.isfinite(temp).any():
+            cities = g['city'].to_numpy()
+            i_min, i_max = int(np.nanargmin(temp)), int(np.nanargmax(temp))
+            frame['extremes'] = [
+                ((lon[i], lat[i]), f'{cities[i]} {temp[i]:.1f}°C') for i in (i_min, i_max)
+            ]
+        frames.append(frame)
+    return frames
+
+
+def make_figure(cmap, norm):
+    """mollweide 投影 + 全局色标的画布布局，weather_anim_matplotlib.py 与工作进程共用。"""
+    import matplotlib.pyplot as plt
+    from matplotlib import cm
+    fig = plt.figure(figsize=(10, 5))
+    ax = fig.add_subplot(111, projection='mollweide')
+    sm = cm.ScalarMappable(norm=norm, cmap=cmap)
+    cbar = fig.colorbar(sm, ax=ax, orientation='vertical', pad=0.08, fraction=0.05)
+    cbar.set_label('Temperature (°C)')
+    plt.subplots_adjust(top=0.9, bottom=0.05)
+    return fig, ax
+
+
+class FastRenderer:
+    def __init__(self, fig, ax, frames, cmap, norm, trail_len=5):
+        self.fig = fig
+        self.ax = ax
+        self.frames = frames
+        self.trail_len = max(1, trail_len)
+        ax.clear()
+        ax.set_title('全球城市天气 (Matplotlib)')
+        ax.grid(True, alpha=0.3)
+        empty = np.empty((0, 2))
+        # pool[-1] 是当前帧，其余是由淡到浓的尾巴
+        self.pool = [
+            ax.scatter(empty[:, 0], empty[:, 1], c=[], cmap=cmap, norm=norm, edgecolor='none', animated=True)
+            for _ in range(self.trail_len)
+        ]
+        self.label = ax.text(0.02, 0.96, '', transform=ax.transAxes, fontsize=9, animated=True)
+        bbox = dict(boxstyle='round,pad=0.2', fc='black', alpha=0.4)
+        self.notes = [
+            ax.annotate('', xy=(0, 0), xytext=(3, -8), textcoords='offset points',
+                        fontsize=8, color='white', bbox=bbox, animated=True)
+            for _ in range(2)
+        ]
+
+    def artists(self):
+        return self.pool + [self.label] + self.notes
+
+    def init(self):
+        return self.artists()
+
+    def update(self, i):
+        tail = self.trail_len - 1
+        for k, coll in enumerate(self.pool):
+            idx = i - tail + k
+            if idx < 0:
+                coll.set_offsets(np.empty((0, 2)))
+                coll.set_array(np.empty(0))
+                continue
+            f = self.frames[idx]
+            if k == tail:
+                alpha, scale = 0.9, 8.5
+            else:
+                # 与原版一致：尾巴透明度线性递增 0.25 -> 0.65
+                steps = min(tail, i)
+                alpha, scale = 0.25 + 0.4 * ((idx - (i - steps) + 1) / steps), 7.0
+            coll.set_offsets(f['offsets'])
+            coll.set_array(f['temp'])
+            coll.set_sizes(f['size'] * scale)
+            coll.set_alpha(alpha)
+        f = self.frames[i]
+        self.label.set_text(f['label'])
+        for note, ext in zip(self.notes, f.get('extremes', [])):
+            note.xy = ext[0]
+            note.set_text(ext[1])
+        for note in self.notes[len(f.get('extremes', [])):]:
+            note.set_text('')
+        return self.artists()
+
+
+def _render_chunk(frames, first, out, fps, trail_len, vmin, vmax, cmap_name, dpi):
+    """工作进程：frames 前 first 帧只作为尾巴上下文，不写入视频。"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib import colors as mcolors
+    from matplotlib.animation import FFMpegWriter
+    cmap = plt.colormaps.get_cmap(cmap_name)
+    norm = mcolors.Normalize(vmin=vmin, vmax=vmax)
+    fig, ax = make_figure(cmap, norm)
+    renderer = FastRenderer(fig, ax, frames, cmap, norm, trail_len)
+    for a in renderer.artists():
+        a.set_animated(False)
+    writer = FFMpegWriter(fps=fps)
+    with writer.saving(fig, out, dpi):
+        for i in range(first, len(frames)):
+            renderer.update(i)
+            writer.grab_frame()
+    plt.close(fig)
+    return out
+
+
+def render_parallel(frames, out, fps, trail_len, vmin, vmax, cmap_name='turbo', workers=None, dpi=100):
+    """按帧区间并行渲染 mp4 片段，再用 ffmpeg concat（流拷贝，不重新编码）拼接。"""
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise RuntimeError('并行渲染需要 ffmpeg')
+    workers = workers or os.cpu_count() or 1
+    n = len(frames)
+    bounds = np.linspace(0, n, min(workers, n) + 1).astype(int)
+    tmpdir = tempfile.mkdtemp(prefix='weather_anim_')
+    try:
+        jobs = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for j, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+                ctx = max(0, start - trail_len + 1)
+                part = os.path.join(tmpdir, f'part_{j:04d}.mp4')
+                jobs.append(pool.submit(_render_chunk, frames[ctx:stop], start - ctx, part,
+                                        fps, trail_len, vmin, vmax, cmap_name, dpi))
+            parts = [job.result() for job in jobs]
+        listing = os.path.join(tmpdir, 'parts.txt')
+        with open(listing, 'w') as f:
+            f.writelines(f"file '{p}'\n" for p in parts)
+        subprocess.run([ffmpeg, '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+                        '-i', listing, '-c', 'copy', out], check=True)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description='全球城市天气动画：多进程 mp4 导出')
+    parser.add_argument('--fps', type=int, default=1, help='输出视频帧率')
+    parser.add_argument('--trail', type=int, default=5, help='轨迹尾巴长度（含当前帧）')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='渲染进程数')
+    parser.add_argument('--outfile', type=str, default='weather_animation', help='输出文件名（自动加 .mp4）')
+    args = parser.parse_args()
+
+    from weather_store import load_timeseries
+    df = load_timeseries()
+    if df is None or df.empty:
+        raise SystemExit('缺少 city_weather_timeseries.csv 或数据为空')
+    frames = precompute_frames(df)
+    out = str(Path(args.outfile).with_suffix('.mp4'))
+    render_parallel(frames, out, max(1, args.fps), max(1, args.trail),
+                    df['temp'].min(), df['temp'].max(), workers=args.workers)
+    print(f'已生成 {out} ({len(frames)} 帧, {args.workers} 进程 + ffmpeg 拼接)')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,17 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from pathlib import Path
 from datetime import datetime, timezone
 import shutil
 import numpy as np
-from matplotlib import cm, colors as mcolors
+from matplotlib import colors as mcolors
 import argparse
+from weather_store import load_timeseries
+from weather_anim_fast import make_figure, to_mollweide_lon
 
-CSV = Path('city_weather_timeseries.csv')
-if not CSV.exists():
+df = load_timeseries()
+if df is None:
     raise SystemExit('缺少 city_weather_timeseries.csv')
-
-df = pd.read_csv(CSV)
 if df.empty:
     raise SystemExit('数据为空')
 
@@ -31,13 +30,8 @@ min_t = df['temp'].min(); max_t = df['temp'].max()
 cmap = plt.colormaps.get_cmap('turbo')
 norm = mcolors.Normalize(vmin=min_t, vmax=max_t)
 
-fig = plt.figure(figsize=(10,5))
-ax = fig.add_subplot(111, projection='mollweide')  # 简单全球投影
-# 全局色标（只绘制一次）
-sm = cm.ScalarMappable(norm=norm, cmap=cmap)
-cbar = fig.colorbar(sm, ax=ax, orientation='vertical', pad=0.08, fraction=0.05)
-cbar.set_label('Temperature (°C)')
-plt.subplots_adjust(top=0.9, bottom=0.05)
+# mollweide 全球投影 + 全局色标（只绘制一次），与多进程导出共用同一布局
+fig, ax = make_figure(cmap, norm)
 sc = None
 
 # CLI 参数
@@ -46,19 +40,13 @@ parser.add_argument('--fps', type=int, default=1, help='输出视频帧率')
 parser.add_argument('--trail', type=int, default=5, help='轨迹尾巴长度（含当前帧）')
 parser.add_argument('--format', choices=['auto','mp4','gif'], default='auto', help='输出格式')
 parser.add_argument('--outfile', type=str, default=None, help='输出文件名（自动加扩展名）')
+parser.add_argument('--fast', action='store_true', help='使用增量渲染器（固定 artist 池 + blit）')
 args = parser.parse_args()
 
 # 轨迹长度与帧率
 TRAIL_LEN = max(1, args.trail)
 FPS = max(1, args.fps)
 
-# 将经纬度转换为弧度（mollweide需要）
-
-def to_mollweide_lon(lon):
-    # 转换范围 [-180,180] -> 弧度
-    lon = ((lon + 180) % 360) - 180
-    return np.radians(lon)
-
 def init():
     ax.set_title('全球城市天气 (Matplotlib)')
     ax.grid(True, alpha=0.3)
@@ -113,7 +101,14 @@ def update(i):
 
     return [scatter]
 
-ani = animation.FuncAnimation(fig, update, init_func=init, frames=len(frames), interval=int(1000/FPS), blit=False)
+if args.fast:
+    from weather_anim_fast import FastRenderer, precompute_frames
+    fast_frames = precompute_frames(df)
+    renderer = FastRenderer(fig, ax, fast_frames, cmap, norm, TRAIL_LEN)
+    ani = animation.FuncAnimation(fig, renderer.update, init_func=renderer.init, frames=len(fast_frames),
+                                  interval=int(1000/FPS), blit=True)
+else:
+    ani = animation.FuncAnimation(fig, update, init_func=init, frames=len(frames), interval=int(1000/FPS), blit=False)
 
 # 优先尝试 mp4 (ffmpeg), 否则回退 GIF
 ffmpeg_path = shutil.which('ffmpeg')
@@ -0,0 +1,126 @@
+"""按小时分段的 Parquet 存储，替代 city_weather_timeseries.csv 的整文件重写。
+
+目录结构:
+    city_weather_timeseries/
+        hour=1726819200/part-1726820105123456789-3f2a9c1e.parquet
+        hour=1726822800/...
+
+- 追加: 每批数据按 timestamp_unix 所在小时拆开，各写一个新的 part 文件，开销只与批大小有关
+- 去重: 内存中维护 (timestamp_unix, city) 索引，已存在的行直接跳过
+- 截断: 整个过期的小时目录直接删除，不需要重写其余数据
+
+读取端 (top_metrics.py / weather_anim_matplotlib.py) 通过 load_timeseries() 加载，
+按 WEATHER_STORAGE 选择后端（与 weather_timeseries_fetch.py 相同）；parquet 模式下
+存储目录不存在时回退到 CSV。
+"""
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple
+
+STORE_DIR = 'city_weather_timeseries'
+CSV_FALLBACK = 'city_weather_timeseries.csv'
+SEGMENT_SEC = 3600  # 每个分段覆盖的秒数
+STORAGE = os.getenv('WEATHER_STORAGE', 'csv')  # csv 或 parquet，与采集脚本一致
+
+
+def _segment_start(ts: int) -> int:
+    return int(ts) // SEGMENT_SEC * SEGMENT_SEC
+
+
+class SegmentStore:
+    def __init__(self, root: str = STORE_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index: Set[Tuple[int, str]] = set()
+        self._load_index()
+
+    def segments(self) -> List[int]:
+        """返回现有分段的起始时间（升序）。"""
+        out = []
+        for d in self.root.glob('hour=*'):
+            try:
+                out.append(int(d.name.split('=', 1)[1]))
+            except ValueError:
+                continue
+        return sorted(out)
+
+    def _segment_dir(self, start: int) -> Path:
+        return self.root / f'hour={start}'
+
+    def _load_index(self):
+        # 启动时只读两列建立索引；之后的追加只更新内存
+        import pyarrow.parquet as pq
+        for start in self.segments():
+            for part in self._segment_dir(start).glob('*.parquet'):
+                t = pq.read_table(part, columns=['timestamp_unix', 'city'])
+                self.index.update(zip(t.column('timestamp_unix').to_pylist(), t.column('city').to_pylist()))
+
+    def append(self, rows: List[Dict[str, Any]]) -> int:
+        """追加一批行，返回实际写入的行数（重复行被跳过）。"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        by_segment: Dict[int, List[Dict[str, Any]]] = {}
+        for r in rows:
+            key = (int(r['timestamp_unix']), r['city'])
+            if key in self.index:
+                continue
+            self.index.add(key)
+            by_segment.setdefault(_segment_start(key[0]), []).append(r)
+        written = 0
+        # 纳秒时间戳 + 随机后缀：同一毫秒内（或多个进程）的两次追加不会写到同一个文件名
+        stamp = f'{time.time_ns()}-{uuid.uuid4().hex[:8]}'
+        for start, seg_rows in by_segment.items():
+            d = self._segment_dir(start)
+            d.mkdir(exist_ok=True)
+            tmp = d / f'.part-{stamp}.parquet.tmp'
+            pq.write_table(pa.Table.from_pylist(seg_rows), tmp)
+            # 先写临时文件再改名，读取端不会读到半个文件
+            os.replace(tmp, d / f'part-{stamp}.parquet')
+            written += len(seg_rows)
+        return written
+
+    def expire(self, max_hours: int) -> int:
+        """删除完全早于 (最新时间 - max_hours) 的分段，返回删除的分段数。"""
+        if not self.index:
+            return 0
+        latest = max(ts for ts, _ in self.index)
+        cutoff = latest - max_hours * 3600
+        dropped = 0
+        for start in self.segments():
+            if start + SEGMENT_SEC > cutoff:
+                break
+            shutil.rmtree(self._segment_dir(start), ignore_errors=True)
+            dropped += 1
+        if dropped:
+            self.index = {k for k in self.index if k[0] >= _segment_start(cutoff)}
+        return dropped
+
+    def read(self):
+        return read_segments(self.root)
+
+
+def read_segments(root: str = STORE_DIR):
+    """读出全部分段为 DataFrame，按 (timestamp_unix, city) 排序。"""
+    import pandas as pd
+    parts = sorted(Path(root).glob('hour=*/*.parquet'))
+    if not parts:
+        return pd.DataFrame()
+    df = pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+    return df.sort_values(['timestamp_unix', 'city'], ignore_index=True)
+
+
+def load_timeseries(store_dir: str = STORE_DIR, csv_path: str = CSV_FALLBACK, storage: str = None):
+    """按 storage（默认 WEATHER_STORAGE）读取：csv 只读 CSV；parquet 读分段存储，没有时回退到 CSV。
+
+    都不存在返回 None。
+    """
+    import pandas as pd
+    storage = storage or STORAGE
+    if storage == 'parquet' and Path(store_dir).is_dir() and any(Path(store_dir).glob('hour=*/*.parquet')):
+        return read_segments(store_dir)
+    if Path(csv_path).exists():
+        return pd.read_csv(csv_path)
+    return None
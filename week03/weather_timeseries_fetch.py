@@ -5,22 +5,31 @@ import math
 import json
 import queue
 import threading
+import asyncio
 import logging
 from datetime import datetime, timezone
 from typing import List, Dict, Any
 import requests
+from fetch_policy import RetryPolicy, BREAKER_THRESHOLD
 
 API_KEY = os.getenv('OWM_API_KEY', 'e7441b7cdf76e4af17a8a38db45e88ce')  # 可用环境变量覆盖
 OUTPUT_CSV = 'city_weather_timeseries.csv'
+STORAGE = os.getenv('WEATHER_STORAGE', 'csv')  # csv: 单个 CSV; parquet: 按小时分段存储 (weather_store.py)
 LOG_FILE = 'weather_fetch.log'
 INTERVAL_SEC = 900  # 每次采集间隔（秒）: 15 分钟，可调整
 MAX_RUNS = 4        # 运行轮数；设为 None 表示无限循环
 CONCURRENCY = 6     # 并发线程数
-RETRY = 3           # 单请求重试次数
+RETRY = 3           # 单请求重试次数（只重试 5xx/超时/429，见 fetch_policy.py）
 BACKOFF = 2         # 退避基数
 TIMEOUT = 10        # HTTP 超时
 MAX_HOURS_KEEP = 72  # 仅保留最近多少小时数据
 PID_FILE = 'weather_timeseries.pid'
+API_BASE = os.getenv('OWM_API_BASE', 'https://api.openweathermap.org/data/2.5/weather')
+FETCH_MODE = os.getenv('FETCH_MODE', 'thread')  # thread: 线程池; async: asyncio + aiohttp
+ASYNC_CONCURRENCY = 64  # async 模式下同时在途的请求上限
+RATE_LIMIT = 50.0       # 令牌桶: 每秒最多请求数（按 API 配额调整）
+RATE_BURST = 50         # 令牌桶容量（允许的突发请求数）
+ADAPTIVE_POLL = os.getenv('ADAPTIVE_POLL', '0') == '1'  # 1: 只请求 dt 可能已前进的城市 (poll_scheduler.py)
 
 # 30 城市列表（与基础脚本一致）
 CITIES = [
@@ -72,52 +81,146 @@ logging.basicConfig(
 )
 
 session = requests.Session()
+# 线程与 async 模式共用：401/403/404 不重试，连续 BREAKER_THRESHOLD 次后整轮熔断；每轮开始时 reset()
+policy = RetryPolicy(RETRY, BACKOFF, breaker_threshold=BREAKER_THRESHOLD)
+
+
+def build_url(city: Dict[str, Any]) -> str:
+    return f"{API_BASE}?lat={city['lat']}&lon={city['lon']}&appid={API_KEY}&units=metric"
+
+
+def parse_weather(city: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+    """把 API 返回的 JSON 转成一行 CSV_HEADER 结构（线程/异步两种模式共用）。"""
+    main = data.get('main', {})
+    wind = data.get('wind', {})
+    clouds = data.get('clouds', {})
+    weather = (data.get('weather') or [{}])[0]
+    dt_unix = data.get('dt', int(time.time()))
+    dt_iso = datetime.fromtimestamp(dt_unix, tz=timezone.utc).isoformat()
+    return {
+        'timestamp_iso': dt_iso,
+        'timestamp_unix': dt_unix,
+        'city': city['name'],
+        'lat': city['lat'],
+        'lon': city['lon'],
+        'temp': main.get('temp'),
+        'humidity': main.get('humidity'),
+        'pressure': main.get('pressure'),
+        'wind_speed': wind.get('speed'),
+        'wind_deg': wind.get('deg'),
+        'clouds': clouds.get('all'),
+        'weather_main': weather.get('main'),
+        'weather_desc': weather.get('description'),
+    }
+
+
+def handle_failure(city: Dict[str, Any], attempt: int, status, retry_after, err, terminal: bool = False):
+    """记录一次失败；返回重试前的等待秒数，不再重试时返回 None。"""
+    outcome, wait = policy.failure(attempt, status, retry_after, terminal)
+    if outcome == 'retry':
+        logging.warning(f"{city['name']} attempt {attempt} failed: {err}; retry in {wait:g}s")
+        return wait
+    if outcome in ('terminal', 'tripped'):
+        logging.error(f"{city['name']} failed (not retried): {err}")
+        if outcome == 'tripped':  # 只在熔断器刚打开时记一次
+            logging.error(f'{BREAKER_THRESHOLD} consecutive terminal errors, circuit breaker open: skipping remaining requests')
+    else:
+        logging.error(f"{city['name']} all retries failed: {err}")
+    return None
 
 
 def fetch_city(city: Dict[str, Any]) -> Dict[str, Any]:
-    lat = city['lat']
-    lon = city['lon']
-    url = (
-        f'https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}'
-        f'&appid={API_KEY}&units=metric'
-    )
-    last_exc = None
+    url = build_url(city)
     for attempt in range(1, RETRY + 1):
+        if not policy.allow():
+            return {}
+        status = retry_after = None
+        terminal = False
         try:
             resp = session.get(url, timeout=TIMEOUT)
-            if resp.status_code != 200:
-                raise RuntimeError(f'status={resp.status_code} body={resp.text[:120]}')
-            data = resp.json()
-            main = data.get('main', {})
-            wind = data.get('wind', {})
-            clouds = data.get('clouds', {})
-            weather = (data.get('weather') or [{}])[0]
-            dt_unix = data.get('dt', int(time.time()))
-            dt_iso = datetime.fromtimestamp(dt_unix, tz=timezone.utc).isoformat()
-            return {
-                'timestamp_iso': dt_iso,
-                'timestamp_unix': dt_unix,
-                'city': city['name'],
-                'lat': lat,
-                'lon': lon,
-                'temp': main.get('temp'),
-                'humidity': main.get('humidity'),
-                'pressure': main.get('pressure'),
-                'wind_speed': wind.get('speed'),
-                'wind_deg': wind.get('deg'),
-                'clouds': clouds.get('all'),
-                'weather_main': weather.get('main'),
-                'weather_desc': weather.get('description'),
-            }
+            if resp.status_code == 200:
+                row = parse_weather(city, resp.json())
+                policy.success()
+                return row
+            status, retry_after = resp.status_code, resp.headers.get('Retry-After')
+            err = f'status={status} body={resp.text[:120]}'
+        except (requests.RequestException, ValueError) as e:  # 超时/连接错误/不完整的 JSON
+            err = e
+        except Exception as e:  # 其他异常（如响应结构不符）重试也没用
+            err, terminal = e, True
+        wait = handle_failure(city, attempt, status, retry_after, err, terminal)
+        if wait is None:
+            return {}
+        time.sleep(wait)
+    return {}
+
+
+class TokenBucket:
+    """异步令牌桶：按 rate 个/秒补充令牌，最多积攒 burst 个，用来守住 API 配额。
+
+    只在单个事件循环里使用，检查与扣减之间没有 await，因此不需要锁。
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+async def fetch_city_async(http, city: Dict[str, Any], bucket: TokenBucket,
+                           sem: asyncio.Semaphore) -> Dict[str, Any]:
+    """fetch_city 的异步版本：退避用 asyncio.sleep，不会占住线程。"""
+    import aiohttp  # 惰性导入，线程模式下不需要安装
+    url = build_url(city)
+    for attempt in range(1, RETRY + 1):
+        if not policy.allow():
+            return {}
+        status = retry_after = None
+        terminal = False
+        try:
+            await bucket.acquire()
+            async with sem:
+                async with http.get(url, timeout=aiohttp.ClientTimeout(total=TIMEOUT)) as resp:
+                    if resp.status == 200:
+                        data = await resp.json(content_type=None)
+                        row = parse_weather(city, data)
+                        policy.success()
+                        return row
+                    status, retry_after = resp.status, resp.headers.get('Retry-After')
+                    body = await resp.text()
+                    err = f'status={status} body={body[:120]}'
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            err = e
         except Exception as e:
-            last_exc = e
-            wait = BACKOFF ** (attempt - 1)
-            logging.warning(f"{city['name']} attempt {attempt} failed: {e}; retry in {wait}s")
-            time.sleep(wait)
-    logging.error(f"{city['name']} all retries failed: {last_exc}")
+            err, terminal = e, True
+        wait = handle_failure(city, attempt, status, retry_after, err, terminal)
+        if wait is None:
+            return {}
+        await asyncio.sleep(wait)
     return {}
 
 
+async def collect_async(cities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    import aiohttp
+    bucket = TokenBucket(RATE_LIMIT, RATE_BURST)
+    sem = asyncio.Semaphore(ASYNC_CONCURRENCY)
+    connector = aiohttp.TCPConnector(limit=ASYNC_CONCURRENCY)
+    async with aiohttp.ClientSession(connector=connector) as http:
+        rows = await asyncio.gather(*(fetch_city_async(http, c, bucket, sem) for c in cities))
+    return [r for r in rows if r]
+
+
 def worker(q: 'queue.Queue[Dict[str, Any]]', results: List[Dict[str, Any]]):
     while True:
         try:
@@ -166,9 +269,9 @@ def dedupe_and_trim():
         logging.error(f'dedupe/trim 失败: {e}')
 
 
-def run_once(run_idx: int):
+def collect_threaded(cities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     q: 'queue.Queue[Dict[str, Any]]' = queue.Queue()
-    for c in CITIES:
+    for c in cities:
         q.put(c)
     threads = []
     results: List[Dict[str, Any]] = []
@@ -178,15 +281,74 @@ def run_once(run_idx: int):
         threads.append(t)
     for t in threads:
         t.join()
-    if results:
+    return results
+
+
+def collect(cities: List[Dict[str, Any]], mode: str = None) -> List[Dict[str, Any]]:
+    mode = mode or FETCH_MODE
+    if mode == 'async':
+        return asyncio.run(collect_async(cities))
+    return collect_threaded(cities)
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        from weather_store import SegmentStore  # 惰性导入，csv 模式不需要 pyarrow
+        _store = SegmentStore()
+    return _store
+
+
+def store_and_trim(rows: List[Dict[str, Any]]) -> int:
+    store = get_store()
+    written = store.append(rows)
+    dropped = store.expire(MAX_HOURS_KEEP)
+    if dropped:
+        logging.info(f'expire: dropped {dropped} segments older than {MAX_HOURS_KEEP}h')
+    return written
+
+
+_scheduler = None
+
+
+def get_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        from poll_scheduler import PollScheduler
+        _scheduler = PollScheduler()
+    return _scheduler
+
+
+def run_once(run_idx: int):
+    policy.reset()  # 计数与熔断只针对本轮
+    if ADAPTIVE_POLL:
+        scheduler = get_scheduler()
+        cities, skipped = scheduler.plan(CITIES)
+        results = collect(cities) if cities else []
+        counts = scheduler.update(cities, results)
+        logging.info(f"Run {run_idx}: polled {len(cities)}/{len(CITIES)} cities, saved {skipped} requests "
+                     f"(new {counts['changed']}, unchanged {counts['unchanged']}, failed {counts['failed']}; "
+                     f"total saved {scheduler.totals['skipped']})")
+        if not cities:
+            return
+    else:
+        results = collect(CITIES)
+    if results and STORAGE == 'parquet':
+        written = store_and_trim(results)
+        logging.info(f"Run {run_idx}: stored {written} new rows ({len(results) - written} duplicates skipped)")
+    elif results:
         write_rows(results)
         logging.info(f"Run {run_idx}: wrote {len(results)} rows")
     else:
         logging.warning(f"Run {run_idx}: no data collected")
+    logging.info(f'Run {run_idx}: request outcomes {policy.stats()}')
 
 
 def main():
-    logging.info('=== Weather timeseries fetch started ===')
+    logging.info(f'=== Weather timeseries fetch started (mode={FETCH_MODE}, storage={STORAGE}, adaptive={ADAPTIVE_POLL}) ===')
     # 写入 PID 文件
     try:
         with open(PID_FILE, 'w') as pf:
@@ -197,9 +359,13 @@ def main():
     while True:
         start = time.time()
         run_once(run_idx)
-        # 写完一轮后进行去重与截断
-        dedupe_and_trim()
+        # 写完一轮后进行去重与截断（分段存储在写入时已完成）
+        if STORAGE == 'csv':
+            dedupe_and_trim()
         run_idx += 1
+        if policy.is_open:
+            logging.error('Circuit breaker open (auth/quota/URL error), aborting; check OWM_API_KEY / OWM_API_BASE')
+            break
         if MAX_RUNS and run_idx > MAX_RUNS:
             break
         elapsed = time.time() - start
@@ -1,14 +1,45 @@
-import streamlit as st
+import os
 import pandas as pd
+import streamlit as st
+from tide_data import load_tides, downsample
+
+CSV_PATH = "tides.csv"
+PARQUET_PATH = "tides.parquet"
+
+
+# cached per file modification time, so a Streamlit rerun reuses the parsed data
+# and a new tides.csv (e.g. after running tides_csv.py) is picked up automatically
+@st.cache_data
+def cached_tides(mtime):
+    return load_tides(CSV_PATH, PARQUET_PATH)
+
+
+@st.cache_data
+def cached_view(mtime, start, end, width, method):
+    df = cached_tides(mtime)
+    return downsample(df.loc[start:end], width, method)
+
 
 # load csv and display graph
-df = pd.read_csv("tides.csv")
-df["Date"] = pd.to_datetime(df["Date"])
-df.set_index("Date", inplace=True)
+df = cached_tides(os.path.getmtime(CSV_PATH))
 
-# a date range to select a week 
+# a date range to select a week
 if date_range := st.date_input("Select a date range", [df.index.min(), df.index.max()]):
     if len(date_range) == 2:
-        df = df.loc[date_range[0]:date_range[1]]
+        start, end = date_range
+    else:
+        start, end = date_range[0], df.index.max()
+else:
+    start, end = df.index.min(), df.index.max()
+
+# the chart never needs more points than it has pixels
+width = st.number_input("Chart width (points)", min_value=100, max_value=5000, value=1000, step=100)
+method = st.radio("Downsampling", ["lttb", "minmax"], horizontal=True)
+
+# inclusive range: from the start of the first day to the last instant of the end day
+start = pd.Timestamp(start).normalize()
+end = pd.Timestamp(end).normalize() + pd.Timedelta(days=1) - pd.Timedelta(1, 'ns')
 
-st.line_chart(df["Height"])
\ No newline at end of file
+view = cached_view(os.path.getmtime(CSV_PATH), start, end, width, method)
+st.caption(f"{len(df.loc[start:end])} records, showing {len(view)} points")
+st.line_chart(view["Height"])
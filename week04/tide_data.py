@@ -0,0 +1,86 @@
+"""Data layer for display_graph.py: cached loading and downsampling of tides.csv.
+
+- load_tides reads the datetime-indexed binary copy (tides.parquet, written by
+  tides_csv.py) when it is at least as new as tides.csv, otherwise parses the CSV
+  once and refreshes the binary copy
+- lttb / minmax reduce any number of points to roughly the chart's pixel width,
+  so the chart gets the same amount of data whatever the selected date range
+"""
+import os
+
+import numpy as np
+import pandas as pd
+from tides_export import read_tides_csv, write_tides_parquet
+
+
+def load_tides(csv_path='tides.csv', parquet_path='tides.parquet'):
+    """DataFrame with a sorted DatetimeIndex and a Height column."""
+    csv_mtime = os.path.getmtime(csv_path) if os.path.exists(csv_path) else None
+    if os.path.exists(parquet_path) and (csv_mtime is None or os.path.getmtime(parquet_path) >= csv_mtime):
+        try:
+            return pd.read_parquet(parquet_path)
+        except ImportError:
+            pass  # no pyarrow: fall back to the CSV
+
+    df = read_tides_csv(csv_path).sort_values('Date', kind='stable')
+    write_tides_parquet(parquet_path, df)
+    return df.set_index('Date')
+
+
+def minmax(x, y, n_out):
+    """Keep the min and max of each of n_out // 2 equal-count buckets (in time order)."""
+    n = len(y)
+    if n <= n_out or n_out < 4:
+        return x, y
+    buckets = n_out // 2
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    lo_idx = np.empty(buckets, dtype=np.int64)
+    hi_idx = np.empty(buckets, dtype=np.int64)
+    # equal-count buckets: at most two different sizes, reduce each size with one reshape
+    sizes = np.diff(edges)
+    for size in np.unique(sizes):
+        sel = np.nonzero(sizes == size)[0]
+        rows = edges[sel][:, None] + np.arange(size)
+        block = y[rows]
+        lo_idx[sel] = rows[np.arange(len(sel)), block.argmin(axis=1)]
+        hi_idx[sel] = rows[np.arange(len(sel)), block.argmax(axis=1)]
+    idx = np.unique(np.concatenate([lo_idx, hi_idx]))
+    return x[idx], y[idx]
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: keep n_out points that preserve the visual shape.
+
+    x is any numeric or datetime64 array (converted to int64 for the areas); the
+    first and last points are always kept.
+    """
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return x, y
+    xs = x.astype('datetime64[ns]').astype(np.int64).astype(np.float64) if np.issubdtype(x.dtype, np.datetime64) \
+        else np.asarray(x, dtype=np.float64)
+    ys = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # average of the next bucket (the last point for the final bucket)
+        nxt_end = edges[i + 2] if i + 2 < len(edges) else n
+        cx = xs[end:nxt_end].mean() if nxt_end > end else xs[-1]
+        cy = ys[end:nxt_end].mean() if nxt_end > end else ys[-1]
+        bx, by = xs[start:end], ys[start:end]
+        area = np.abs((xs[a] - cx) * (by - ys[a]) - (xs[a] - bx) * (cy - ys[a]))
+        a = start + int(area.argmax())
+        keep[i + 1] = a
+    return x[keep], y[keep]
+
+
+def downsample(df, width, method='lttb', column='Height'):
+    """Reduce df[column] to about `width` points; returns a DataFrame indexed by Date."""
+    x = df.index.to_numpy()
+    y = df[column].to_numpy()
+    fn = lttb if method == 'lttb' else minmax
+    xs, ys = fn(x, y, max(int(width), 4))
+    return pd.DataFrame({column: ys}, index=pd.DatetimeIndex(xs, name=df.index.name))
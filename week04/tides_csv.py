@@ -1,90 +1,38 @@
-import requests
-from lxml import html
-
 import dotenv
 import os
-import datetime
-import matplotlib.pyplot as plt
-from scraping_utils import get_url, parse
+import sys
 
-# load the environment variables
+# load the environment variables before importing the week02 modules, which read
+# some settings (e.g. SCRAPE_CACHE_DIR) at import
 dotenv.load_dotenv()
 
+# scraping_utils and parse_tide_table live in week02
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'week02'))
+
+from scraping_utils import get_url
+from parse_tide_table import parse_tide_table, table_xpaths
+from tides_export import upsert_tides
+
 # get the year and filename from the environment variables
 year = int(os.getenv('YEAR', 2024))
 filename = os.getenv('FILENAME', "crawled-page-{year}.html").format(year=year)
 
-# get page
-page = get_url(os.getenv('URL'), filename)
-
-# parse the page to html
-tree = parse(page, 'html')
-
-# initialize the data list
-data = []
-
-# initialize row counter
-row_num = 0
-
-# iterate over the rows
-for row in tree.xpath(os.getenv('ROW_XPATH')):
-
-    # get the columns
-    columns = row.xpath(os.getenv('COL_XPATH'))
-
-    # get the text content of each column
-    columns = [column.text_content() for column in columns]
-
-    # strip whitespace from each column
-    columns = [column.strip() for column in columns]
+# print every row and record while parsing (VERBOSE=1)
+verbose = os.getenv('VERBOSE', '0') == '1'
 
-    # join the columns into a single string
-    row_string = " ".join(columns).strip()
+# table layout from .env (ROW_XPATH / COL_XPATH)
+row_tag, col_xpath = table_xpaths(os.getenv('ROW_XPATH'), os.getenv('COL_XPATH'))
 
-    # skip empty rows
-    if row_string.strip() == "":
-        continue
+# output files: tides.csv always, tides.parquet for display_graph.py unless disabled
+csv_path = os.getenv('TIDES_CSV', 'tides.csv')
+parquet_path = os.getenv('TIDES_PARQUET', 'tides.parquet') or None
 
-    # increment the row counter
-    row_num += 1
-
-    # print the row
-    print(f'Row {row_num}: {row_string}')
-
-    # get the month and day
-    month = int(columns[0])
-    day = int(columns[1])
-
-    # get the time and value
-    for i in range(2, len(columns), 2):
-
-        # check if the column is not empty
-        if columns[i] != "":
-            
-            # get the time in HHMM format
-            hour = columns[i][:2]
-            minute = columns[i][2:]
-
-            # create the datetime object
-            dt = datetime.datetime(year,month,day,int(hour),int(minute))
-
-            # get the value
-            value = columns[i+1]
-
-            # print the datetime and value
-            print(f'{dt} - {value}')
-
-            # append the datetime and value to the data list
-            data.append((dt, value))
-
-# create csv file
-for record in data:
-    
-    # print the record for debugging purposes
-    print(f'{record[0].strftime("%Y-%m-%d %H:%M")},{record[1]}')
+# get page
+page = get_url(os.getenv('URL'), filename)
 
-    # open the csv file
-    with open('tides.csv', 'a') as f:
+# parse the table rows into datetime64 / float arrays
+times, heights = parse_tide_table(page, year, verbose=verbose, row_tag=row_tag, col_xpath=col_xpath)
 
-        # write the record to the csv file
-        f.write(f'{record[0].strftime("%Y-%m-%d %H:%M")},{record[1]}\n')
\ No newline at end of file
+# merge into tides.csv keyed on timestamp, so rerunning a year does not duplicate rows
+before, after = upsert_tides(times, heights, csv_path, parquet_path)
+print(f'{len(times)} records for {year}: {csv_path} {before} -> {after} rows')
@@ -0,0 +1,68 @@
+"""Write scraped tide records to tides.csv (and tides.parquet) without duplicates.
+
+tides_csv.py used to reopen tides.csv in append mode for every record and call
+strftime twice per record, and every rerun appended the whole year again.
+upsert_tides instead
+- merges the new records with what is already in the file, keyed on the timestamp
+  (new values win), so rerunning the same year leaves the file unchanged
+- formats all timestamps at once with np.datetime_as_string
+- writes the file with a single buffered open, to a temporary name that is then
+  renamed over the old file
+- optionally writes the same table to Parquet for display_graph.py
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+WRITE_BUFFER = 1 << 20
+
+
+def read_tides_csv(path):
+    """Load an existing tides.csv; files written by the old append loop have no header."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return pd.DataFrame({'Date': pd.Series(dtype='datetime64[ns]'), 'Height': pd.Series(dtype='float64')})
+    with open(path, 'r') as f:
+        has_header = f.readline().startswith('Date')
+    df = pd.read_csv(path, header=0 if has_header else None, names=['Date', 'Height'],
+                     dtype={'Height': 'float64'})
+    df['Date'] = pd.to_datetime(df['Date'], format='%Y-%m-%d %H:%M')
+    return df
+
+
+def write_tides_csv(path, times, heights):
+    """One buffered write of the whole table; times is a datetime64 array."""
+    dates = np.char.replace(np.datetime_as_string(times.astype('datetime64[m]'), unit='m'), 'T', ' ')
+    lines = np.char.add(np.char.add(dates, ','), np.char.mod('%g', heights))
+    tmp = path + '.tmp'
+    with open(tmp, 'w', buffering=WRITE_BUFFER) as f:
+        f.write('Date,Height\n')
+        if len(lines):
+            f.write('\n'.join(lines))
+            f.write('\n')
+    os.replace(tmp, path)
+
+
+def write_tides_parquet(path, df):
+    """Datetime-indexed Parquet copy; skipped with a message if pyarrow is not installed."""
+    try:
+        df.set_index('Date').to_parquet(path)
+    except ImportError as e:
+        print(f'Skipping {path}: {e}')
+        return False
+    return True
+
+
+def upsert_tides(times, heights, csv_path='tides.csv', parquet_path=None):
+    """Merge (times, heights) into csv_path keyed on timestamp. Returns (rows before, rows after)."""
+    old = read_tides_csv(csv_path)
+    new = pd.DataFrame({'Date': pd.to_datetime(np.asarray(times, dtype='datetime64[m]')),
+                        'Height': np.asarray(heights, dtype=np.float64)})
+    merged = (pd.concat([old, new], ignore_index=True)
+              .drop_duplicates('Date', keep='last')
+              .sort_values('Date', kind='stable')
+              .reset_index(drop=True))
+    write_tides_csv(csv_path, merged['Date'].to_numpy(), merged['Height'].to_numpy())
+    if parquet_path:
+        write_tides_parquet(parquet_path, merged)
+    return len(old), len(merged)
@@ -1,26 +1,85 @@
-
-import torch
+import argparse
+import time
 import numpy as np
-from diffusers import AudioLDM2Pipeline, DPMSolverMultistepScheduler
-import pyaudio
+from streaming_gen import RATE, Player, StreamingGenerator, StubPipeline
 
-pipeline = AudioLDM2Pipeline.from_pretrained(
-    "cvssp/audioldm2-music", torch_dtype=torch.float16
-)
-pipeline.to("cuda")
-pipeline.scheduler = DPMSolverMultistepScheduler.from_config(
-    pipeline.scheduler.config
-)
-pipeline.enable_model_cpu_offload()
+parser = argparse.ArgumentParser(description='AudioLDM2 音乐生成（默认边生成边播放）')
+parser.add_argument('--no-stream', action='store_true', help='原来的方式：整段生成完再播放')
+parser.add_argument('--stub', action='store_true', help='用小替身 pipeline（CPU，无需 torch / diffusers）')
+parser.add_argument('--null', action='store_true', help='不打开声卡，用虚拟设备按实时速度消耗音频')
+parser.add_argument('--steps', type=int, default=200, help='推理步数')
+parser.add_argument('--length', type=float, default=60, help='总时长（秒）')
+parser.add_argument('--segment', type=float, default=10, help='流式模式每段时长（秒）')
+parser.add_argument('--overlap', type=float, default=1, help='相邻段交叉淡化的时长（秒）')
+parser.add_argument('--prompt', default=None, help='直接给出描述（只生成一次）')
+args = parser.parse_args()
 
-p = pyaudio.PyAudio()
-stream = p.open(format=pyaudio.paFloat32, channels=1, rate=16000, output=True)
+if args.stub:
+    pipeline = StubPipeline()
+else:
+    import torch
+    from diffusers import AudioLDM2Pipeline, DPMSolverMultistepScheduler
 
-while True:
-    prompt = input("Give me a song description: ")
-    audios = pipeline(prompt, 
-            num_inference_steps=200,
-            audio_length_in_s=60
+    pipeline = AudioLDM2Pipeline.from_pretrained(
+        "cvssp/audioldm2-music", torch_dtype=torch.float16
+    )
+    pipeline.to("cuda")
+    pipeline.scheduler = DPMSolverMultistepScheduler.from_config(
+        pipeline.scheduler.config
+    )
+    pipeline.enable_model_cpu_offload()
+
+if not args.null:
+    import pyaudio
+    p = pyaudio.PyAudio()
+
+
+def play_streaming(prompt):
+    player = Player()
+    gen = StreamingGenerator(pipeline, player, rate=RATE, segment_sec=args.segment,
+                             overlap_sec=args.overlap, steps=args.steps)
+    if args.null:
+        from loopback import NullDevice
+        device = NullDevice(rate=RATE, chunk=1024, dtype=np.float32)
+        device.start(lambda *a: None, player.callback)
+    else:
+        stream = p.open(format=pyaudio.paFloat32, channels=1, rate=RATE, output=True,
+                        frames_per_buffer=1024, stream_callback=player.callback)
+        stream.start_stream()
+    gen.start(prompt, args.length)
+    try:
+        while not player.finished.is_set():
+            time.sleep(0.1)
+    finally:
+        gen.stop()
+        if args.null:
+            device.stop()
+        else:
+            stream.stop_stream()
+            stream.close()
+    print(gen.summary())
+
+
+def play_blocking(prompt):
+    stream = None if args.null else p.open(format=pyaudio.paFloat32, channels=1, rate=RATE, output=True)
+    t0 = time.perf_counter()
+    audios = pipeline(prompt,
+            num_inference_steps=args.steps,
+            audio_length_in_s=args.length
         ).audios
+    print(f"Generated in {time.perf_counter() - t0:.1f}s")
     for audio in audios:
-        stream.write(audio.astype(np.float32))
+        if stream is not None:
+            stream.write(audio.astype(np.float32))
+    if stream is not None:
+        stream.close()
+
+
+while True:
+    prompt = args.prompt or input("Give me a song description: ")
+    if args.no_stream:
+        play_blocking(prompt)
+    else:
+        play_streaming(prompt)
+    if args.prompt:
+        break
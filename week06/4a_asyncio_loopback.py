@@ -1,77 +1,11 @@
-import asyncio
-import pyaudio
+from loopback import run_cli
 
 # Parameters
 CHUNK = 1024
-FORMAT = pyaudio.paInt16
-CHANNELS = 1
 RATE = 44100
 
-# Initialize PyAudio
-p = pyaudio.PyAudio()
-
-# Create asyncio queues
-global input_queue, output_queue
-output_queue = asyncio.Queue()
-input_queue = asyncio.Queue()
-
-# Callback function for input stream
-def input_callback(in_data, frame_count, time_info, status):
-    input_queue.put_nowait(in_data)
-    return (None, pyaudio.paContinue)
-
-# Callback function for output stream
-def output_callback(in_data, frame_count, time_info, status):
-    try:
-        data = output_queue.get_nowait()
-    except asyncio.QueueEmpty:
-        data = b'\x00' * CHUNK * 2  # Silence if no data available
-    return (data, pyaudio.paContinue)
-
-# Open input stream
-input_stream = p.open(format=FORMAT,
-                      channels=CHANNELS,
-                      rate=RATE,
-                      input=True,
-                      input_device_index=1,
-                      frames_per_buffer=CHUNK,
-                      stream_callback=input_callback)
-
-# Open output stream
-output_stream = p.open(format=FORMAT,
-                       channels=CHANNELS,
-                       rate=RATE,
-                       output=True,
-                       frames_per_buffer=CHUNK,
-                       stream_callback=output_callback)
-
-async def process_audio():
-    print("Loopback started. Press Ctrl+C to stop.")
-    try:
-        while True:
-            if input_queue.empty():
-                await asyncio.sleep(0.1)
-                continue
-            data = await input_queue.get()
-            await output_queue.put(data)
-    except asyncio.CancelledError:
-        print("Loopback stopped.")
-
-# Start streams
-input_stream.start_stream()
-output_stream.start_stream()
-
-# Run the event loop
-try:
-    asyncio.run(process_audio())
-except KeyboardInterrupt:
-    pass
-finally:
-    # Stop and close streams
-    input_stream.stop_stream()
-    input_stream.close()
-    output_stream.stop_stream()
-    output_stream.close()
-
-    # Terminate PyAudio
-    p.terminate()
+# 音频数据只在两个 PortAudio 回调之间经过抖动缓冲传递，不进事件循环
+# （原来的 asyncio.Queue 不是线程安全的，空闲时 sleep(0.1) 还会多出最多 100 ms 延迟）；
+# 输入、输出各开一个流，asyncio 只负责打印状态
+run_cli('回调 + 抖动缓冲回环，asyncio 只负责打印状态', chunk=CHUNK, target_ms=30.0, rate=RATE,
+        duplex=False, use_asyncio=True)
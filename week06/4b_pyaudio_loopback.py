@@ -1,43 +1,8 @@
-import pyaudio
+from loopback import run_cli
 
 # Parameters
 CHUNK = 256
-FORMAT = pyaudio.paInt16
-CHANNELS = 1
 RATE = 44100
 
-# Initialize PyAudio
-p = pyaudio.PyAudio()
-
-# Open input stream
-input_stream = p.open(format=FORMAT,
-                      channels=CHANNELS,
-                      rate=RATE,
-                      input=True,
-                      input_device_index=1,
-                      frames_per_buffer=CHUNK)
-
-# Open output stream
-output_stream = p.open(format=FORMAT,
-                       channels=CHANNELS,
-                       rate=RATE,
-                       output=True,
-                       frames_per_buffer=CHUNK)
-
-print("Loopback started. Press Ctrl+C to stop.")
-
-try:
-    while True:
-        data = input_stream.read(CHUNK)
-        output_stream.write(data)
-except KeyboardInterrupt:
-    print("Loopback stopped.")
-
-# Close streams
-input_stream.stop_stream()
-input_stream.close()
-output_stream.stop_stream()
-output_stream.close()
-
-# Terminate PyAudio
-p.terminate()
\ No newline at end of file
+# 原来主线程阻塞 read/write；现在用一个全双工回调流，输入直接经过预分配的抖动缓冲送到输出
+run_cli('低延迟回环（全双工回调流 + 抖动缓冲）', chunk=CHUNK, target_ms=10.0, rate=RATE, duplex=True)
@@ -1,9 +1,9 @@
 import asyncio
 import pyaudio
-import time
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
+from ring_buffer import RingBuffer
 
 # Parameters
 FORMAT = pyaudio.paInt16
@@ -14,13 +14,12 @@ ROLLING_WINDOW = 4 * RATE  # 10 seconds rolling window
 
 # Initialize PyAudio
 p = pyaudio.PyAudio()
-audio_queue = asyncio.Queue()
-global buffer
-buffer = np.zeros(ROLLING_WINDOW, dtype=np.int16)
+# 回调直接写入环形缓冲区，绘图时读取最近窗口的视图（不再 np.roll）
+ring = RingBuffer(ROLLING_WINDOW + RATE, dtype=np.int16)
 
 # Callback function for input stream
 def input_callback(in_data, frame_count, time_info, status):
-    audio_queue.put_nowait(in_data)
+    ring.write_bytes(in_data)
     return (None, pyaudio.paContinue)
 
 # Open stream
@@ -32,23 +31,6 @@ stream = p.open(format=FORMAT,
                 input_device_index=1,
                 stream_callback=input_callback)
 
-# Async function to process audio data
-def process_audio():
-    global buffer
-    print("Loopback started. Press Ctrl+C to stop.")
-    while True:
-        if audio_queue.empty():
-            time.sleep(0.01)
-            continue
-        else:
-            data = audio_queue.get_nowait()
-            waveform = np.frombuffer(data, dtype=np.int16)
-            buffer = np.roll(buffer, -len(waveform))
-            buffer[-len(waveform):] = waveform
-        
-  
-
-
 def update_plot():
     fig, ax = plt.subplots()
     x = np.arange(0, ROLLING_WINDOW)
@@ -57,9 +39,7 @@ def update_plot():
     ax.set_ylim(-2**12, 2**12)
 
     def update_frame(frame):
-        global buffer
-        new_data = np.frombuffer(buffer, dtype=np.int16)
-        line.set_ydata(new_data)
+        line.set_ydata(ring.latest(ROLLING_WINDOW))
         return line,
 
     anim = animation.FuncAnimation(fig, update_frame, blit=False, interval=50)
@@ -68,8 +48,7 @@ def update_plot():
 
 # Run the event loop
 async def main():
-    # run process audio in separate thread
-    asyncio.get_running_loop().run_in_executor(None, process_audio)
+    print("Loopback started. Press Ctrl+C to stop.")
     update_plot()
 
 try:
@@ -2,10 +2,11 @@ import pygame
 import pyaudio
 import numpy as np
 import colorsys
-from scipy import signal
 import threading
-import queue
 import time
+from ring_buffer import RingBuffer
+from stft import StreamingSTFT, RunningLevels, display_range, normalize_db
+from envelope import WaveEnvelope
 
 class PygameSpectrogram:
     def __init__(self, width=1200, height=800):
@@ -25,6 +26,7 @@ class PygameSpectrogram:
         # Spectrogram settings
         self.NFFT = 1024
         self.noverlap = 512
+        self.HOP = self.NFFT - self.noverlap  # 可以调小以获得更细的时间分辨率
         self.freq_bins = self.NFFT // 2 + 1
         self.max_freq_display = 8000  # Show up to 8kHz
         self.freq_bin_display = int((self.max_freq_display / (self.RATE / 2)) * self.freq_bins)
@@ -43,10 +45,21 @@ class PygameSpectrogram:
         self.RED = (255, 100, 100)
         
         # Data buffers
-        self.audio_buffer = np.zeros(self.ROLLING_WINDOW, dtype=np.float32)
-        self.spectrogram_history = np.zeros((self.freq_bin_display, self.width))
-        self.spectrogram_smoothed = np.zeros((self.freq_bin_display, self.width))
-        self.audio_queue = queue.Queue()
+        # 回调直接写入环形缓冲区（多留 1 秒余量），audio_buffer 是最近窗口的零拷贝视图
+        self.ring = RingBuffer(self.ROLLING_WINDOW + self.RATE, dtype=np.float32)
+        self.audio_buffer = self.ring.latest(self.ROLLING_WINDOW)
+        # 增量 STFT：每次只变换新到的帧；归一化用滑动分位数
+        self.stft = StreamingSTFT(self.NFFT, self.HOP, self.RATE)
+        self.levels = RunningLevels()
+        # 波形包络：每个屏幕列一个 min/max/RMS，只归约新到的采样
+        self.envelope = WaveEnvelope(self.width, self.ROLLING_WINDOW // self.width)
+        self.wave_x = list(range(self.width))
+        self.wave_band_x = self.wave_x + self.wave_x[::-1]
+        self.wave_band_y = np.empty(2 * self.width, dtype=np.float32)
+        self.waveform_mode = 'rms'  # 'rms' 折线 或 'band' 填充的 min/max 带
+        # 最新一列（平滑后）与每列的最大值；颜色历史保存在 spec_surface 中
+        self.last_column = np.zeros(self.freq_bin_display)
+        self.column_max = np.zeros(self.width)
         
         # Smoothing parameters
         self.temporal_smoothing = 0.7  # How much to blend with previous frame (0-1)
@@ -59,6 +72,12 @@ class PygameSpectrogram:
         self.font = pygame.font.Font(None, 24)
         self.small_font = pygame.font.Font(None, 18)
         
+        # Colormap LUT + persistent spectrogram surface (one pixel per column / frequency bin)
+        self.SPEC_BG = (20, 20, 20)
+        self.color_lut = self.build_color_lut()
+        self.spec_surface = pygame.Surface((self.width, self.freq_bin_display))
+        self.spec_surface.fill(self.SPEC_BG)
+        
     def setup_audio(self):
         """Initialize PyAudio stream"""
         self.p = pyaudio.PyAudio()
@@ -97,49 +116,21 @@ class PygameSpectrogram:
         if status:
             print(f"Audio status: {status}")
         
-        # Convert audio data to numpy array
-        audio_data = np.frombuffer(in_data, dtype=np.float32)
-        
-        # Add to queue for main thread processing
-        try:
-            self.audio_queue.put(audio_data, block=False)
-        except queue.Full:
-            pass  # Drop data if queue is full
+        # Write straight into the ring buffer - no queue hop, no allocation
+        self.ring.write_bytes(in_data)
         
         return (None, pyaudio.paContinue)
     
     def update_audio_data(self):
-        """Process audio data from queue"""
-        # Process all available audio data
-        while not self.audio_queue.empty():
-            try:
-                new_data = self.audio_queue.get_nowait()
-                # Roll buffer and add new data
-                self.audio_buffer = np.roll(self.audio_buffer, -len(new_data))
-                self.audio_buffer[-len(new_data):] = new_data
-            except queue.Empty:
-                break
+        """Refresh the view of the latest rolling window (zero-copy)"""
+        self.audio_buffer = self.ring.latest(self.ROLLING_WINDOW)
     
     def compute_spectrogram(self):
-        """Compute spectrogram from current audio buffer"""
-        if len(self.audio_buffer) < self.NFFT:
-            return
-        
-        # Compute spectrogram using scipy
+        """Transform only the hops that arrived since the last call"""
         try:
-            # Use only the most recent portion of the buffer for better real-time response
-            recent_buffer = self.audio_buffer[-self.RATE:]  # Last 1 second
-            
-            if len(recent_buffer) < self.NFFT:
-                recent_buffer = self.audio_buffer
-            
-            frequencies, times, Sxx = signal.spectrogram(
-                recent_buffer,
-                fs=self.RATE,
-                nperseg=self.NFFT,
-                noverlap=self.noverlap,
-                window='hann'
-            )
+            Sxx = self.stft.update(self.ring)  # (new_frames, freq_bins)
+            if len(Sxx) == 0:
+                return
             
             # Debug: Check if we're getting data
             max_power = np.max(Sxx)
@@ -149,47 +140,30 @@ class PygameSpectrogram:
                 self.debug_counter = 0
             
             if self.debug_counter % 30 == 0:  # Print every second at 30fps
-                print(f"Spectrogram max power: {max_power:.2e}, Shape: {Sxx.shape}")
+                print(f"Spectrogram max power: {max_power:.2e}, New frames: {len(Sxx)}")
             
             # Convert to dB scale with better handling
             Sxx_db = 10 * np.log10(Sxx + 1e-12)  # Smaller epsilon for better sensitivity
             
-            # Adaptive normalization based on current data
-            current_min = np.percentile(Sxx_db, 10)  # 10th percentile
-            current_max = np.percentile(Sxx_db, 95)  # 95th percentile
+            # Adaptive normalization from running 10th/95th percentiles
+            current_min, current_max = self.levels.update(Sxx_db)
             
             # Use adaptive range with fallback
-            min_db = max(current_min, -80)  # Don't go below -80dB
-            max_db = min(current_max, 20)   # Don't go above 20dB
+            min_db, max_db = display_range(current_min, current_max)
             
-            # Ensure we have a reasonable range
-            if max_db - min_db < 20:
-                max_db = min_db + 40
+            # Only the displayed bins of the latest (up to 3) frames are normalized,
+            # with gamma correction to make low values more visible
+            latest = Sxx_db[-3:, :self.freq_bin_display]
+            latest_spectrum = np.mean(normalize_db(latest, min_db, max_db, gamma=0.5), axis=0)
             
-            # Normalize to 0-1 range
-            Sxx_normalized = np.clip((Sxx_db - min_db) / (max_db - min_db), 0, 1)
-            
-            # Apply gamma correction to make low values more visible
-            gamma = 0.5
-            Sxx_normalized = np.power(Sxx_normalized, gamma)
+            # Apply temporal smoothing (per frequency bin, against the previous column) to reduce flickering
+            self.last_column = (
+                self.temporal_smoothing * self.last_column +
+                (1 - self.temporal_smoothing) * latest_spectrum
+            )
             
-            # Update spectrogram history (scroll left, add new column)
-            if times.shape[0] > 0:
-                # Take the latest time slice, or average if multiple
-                if Sxx_normalized.shape[1] > 1:
-                    latest_spectrum = np.mean(Sxx_normalized[:self.freq_bin_display, -3:], axis=1)
-                else:
-                    latest_spectrum = Sxx_normalized[:self.freq_bin_display, -1]
-                
-                # Scroll history left and add new column
-                self.spectrogram_history = np.roll(self.spectrogram_history, -1, axis=1)
-                self.spectrogram_history[:, -1] = latest_spectrum
-                
-                # Apply temporal smoothing to reduce flickering
-                self.spectrogram_smoothed = (
-                    self.temporal_smoothing * self.spectrogram_smoothed + 
-                    (1 - self.temporal_smoothing) * self.spectrogram_history
-                )
+            # Scroll the surface left and paint only the new column
+            self.push_column(self.last_column)
                 
         except Exception as e:
             print(f"Error computing spectrogram: {e}")
@@ -239,6 +213,27 @@ class PygameSpectrogram:
         
         return (max(0, min(255, r)), max(0, min(255, g)), max(0, min(255, b)))
     
+    def build_color_lut(self):
+        """256-entry LUT reproducing value_to_color; values <= 0.1 stay background"""
+        values = np.linspace(0, 1, 256)
+        lut = np.array([self.value_to_color(v) for v in values], dtype=np.uint8)
+        lut[values <= 0.1] = self.SPEC_BG
+        return lut
+    
+    def colorize(self, values):
+        """Map normalized values (any shape) to RGB through the LUT in one step"""
+        idx = np.clip(values * 255, 0, 255).astype(np.uint8)
+        return self.color_lut[idx]
+    
+    def push_column(self, column):
+        """Shift the spectrogram surface one pixel left and write the newest column"""
+        self.spec_surface.scroll(-1, 0)
+        pixels = pygame.surfarray.pixels3d(self.spec_surface)
+        pixels[-1, :, :] = self.colorize(column[::-1])  # high frequencies at the top
+        del pixels  # unlock the surface
+        self.column_max[:-1] = self.column_max[1:]
+        self.column_max[-1] = column.max()
+    
     def draw_spectrogram(self):
         """Draw the spectrogram"""
         spec_rect = pygame.Rect(0, 0, self.width, self.spec_height)
@@ -247,7 +242,7 @@ class PygameSpectrogram:
         pygame.draw.rect(self.screen, (20, 20, 20), spec_rect)
         
         # Check if we have any data
-        max_value = np.max(self.spectrogram_smoothed)
+        max_value = np.max(self.column_max)
         if max_value < 1e-6:
             # Draw "no signal" message
             no_signal_text = self.font.render("No audio signal detected - make some noise!", True, (100, 100, 100))
@@ -255,25 +250,9 @@ class PygameSpectrogram:
             self.screen.blit(no_signal_text, text_rect)
             return
         
-        # Draw spectrogram pixels with improved scaling
-        pixel_size = max(1, min(2, self.width // 600))  # Smaller pixels for smoother look
-        
-        for x in range(0, self.width, pixel_size):
-            for y in range(0, min(self.freq_bin_display, self.spec_height), pixel_size):
-                if x < self.spectrogram_smoothed.shape[1] and y < self.spectrogram_smoothed.shape[0]:
-                    value = self.spectrogram_smoothed[y, x]
-                    
-                    # Skip very low values for performance
-                    if value > 0.1:
-                        color = self.value_to_color(value)
-                        
-                        # Calculate position (flip Y axis)
-                        draw_y = self.spec_height - (y * self.spec_height // self.freq_bin_display) - pixel_size
-                        draw_y = max(0, min(self.spec_height - pixel_size, draw_y))
-                        
-                        # Draw pixel
-                        pixel_rect = pygame.Rect(x, draw_y, pixel_size, pixel_size)
-                        pygame.draw.rect(self.screen, color, pixel_rect)
+        # Scale the persistent surface to the spectrogram area and blit once
+        scaled = pygame.transform.scale(self.spec_surface, (self.width, self.spec_height))
+        self.screen.blit(scaled, (0, 0))
         
         # Draw frequency labels
         label_y_positions = [0.1, 0.3, 0.5, 0.7, 0.9]
@@ -296,29 +275,21 @@ class PygameSpectrogram:
         # Clear waveform area
         pygame.draw.rect(self.screen, self.BLACK, wave_rect)
         
-        # Draw waveform
-        if len(self.audio_buffer) > 1:
-            # Downsample for display
-            samples_per_pixel = len(self.audio_buffer) // self.width
-            if samples_per_pixel > 0:
-                points = []
-                for x in range(self.width):
-                    start_idx = x * samples_per_pixel
-                    end_idx = min(start_idx + samples_per_pixel, len(self.audio_buffer))
-                    
-                    if end_idx > start_idx:
-                        # Use RMS for each pixel to show energy
-                        segment = self.audio_buffer[start_idx:end_idx]
-                        rms = np.sqrt(np.mean(segment**2))
-                        
-                        # Scale to waveform area
-                        y = wave_y_start + self.wave_height // 2 - int(rms * self.wave_height * 10)
-                        y = max(wave_y_start, min(wave_y_start + self.wave_height, y))
-                        points.append((x, y))
-                
-                # Draw waveform line
-                if len(points) > 1:
-                    pygame.draw.lines(self.screen, self.GREEN, False, points, 1)
+        # Draw waveform from the incrementally maintained envelope
+        self.envelope.update(self.ring)
+        center = wave_y_start + self.wave_height // 2
+        lo, hi = wave_y_start, wave_y_start + self.wave_height
+        if self.waveform_mode == 'band':
+            # Filled min/max band: max outline left->right, then min outline right->left
+            band = self.wave_band_y
+            band[:self.width] = center - self.envelope.maxs * (self.wave_height / 2)
+            band[self.width:] = center - self.envelope.mins[::-1] * (self.wave_height / 2)
+            y = np.clip(band, lo, hi).astype(np.int32)
+            pygame.draw.polygon(self.screen, self.GREEN, list(zip(self.wave_band_x, y.tolist())))
+        else:
+            # Use RMS for each pixel to show energy
+            y = np.clip(center - (self.envelope.rms * self.wave_height * 10).astype(np.int32), lo, hi)
+            pygame.draw.lines(self.screen, self.GREEN, False, list(zip(self.wave_x, y.tolist())), 1)
         
         # Draw center line
         center_y = wave_y_start + self.wave_height // 2
@@ -342,7 +313,7 @@ class PygameSpectrogram:
         
         # Calculate audio level
         audio_level = np.sqrt(np.mean(self.audio_buffer[-1000:]**2))  # RMS of recent samples
-        spec_max = np.max(self.spectrogram_smoothed)
+        spec_max = np.max(self.column_max)
         
         info_lines = [
             f"Audio Status: {status_text}",
@@ -351,7 +322,7 @@ class PygameSpectrogram:
             f"Spec Max: {spec_max:.4f}",
             f"Smoothing: {self.temporal_smoothing:.2f}",
             f"Frequency Range: 0 - {self.max_freq_display/1000:.1f} kHz",
-            "Controls: ↑/↓ adjust smoothing, R reset, ESC quit"
+            "Controls: ↑/↓ adjust smoothing, W waveform mode, R reset, ESC quit"
         ]
         
         for i, line in enumerate(info_lines):
@@ -383,6 +354,9 @@ class PygameSpectrogram:
                         # Decrease smoothing (more responsive, more flickering)
                         self.temporal_smoothing = max(0.1, self.temporal_smoothing - 0.05)
                         print(f"Smoothing: {self.temporal_smoothing:.2f}")
+                    elif event.key == pygame.K_w:
+                        # Toggle RMS line / min-max band
+                        self.waveform_mode = 'band' if self.waveform_mode == 'rms' else 'rms'
                     elif event.key == pygame.K_r:
                         # Reset smoothing to default
                         self.temporal_smoothing = 0.7
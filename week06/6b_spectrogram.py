@@ -4,6 +4,8 @@ import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 import sys
 import warnings
+from ring_buffer import RingBuffer
+from live_spectrogram import LiveView
 
 # Suppress matplotlib warnings
 warnings.filterwarnings('ignore')
@@ -14,6 +16,7 @@ CHANNELS = 1
 RATE = 44100
 CHUNK = 1024
 ROLLING_WINDOW = 2 * RATE  # 2 seconds
+LEGACY = '--legacy' in sys.argv  # 原来的 ax2.clear() + specgram 路径，便于对比
 
 def find_input_device():
     """Find a working input device"""
@@ -42,7 +45,13 @@ def find_input_device():
 
 # Initialize
 p, input_device_index = find_input_device()
-buffer = np.zeros(ROLLING_WINDOW, dtype=np.float32)
+# 回调线程直接写入环形缓冲区，update_plot 只读取最近窗口的视图
+ring = RingBuffer(ROLLING_WINDOW + RATE, dtype=np.float32)
+buffer = ring.latest(ROLLING_WINDOW)
+
+def input_callback(in_data, frame_count, time_info, status):
+    ring.write_bytes(in_data)
+    return (None, pyaudio.paContinue)
 
 # Open stream
 try:
@@ -51,7 +60,8 @@ try:
                     rate=RATE,
                     input=True,
                     frames_per_buffer=CHUNK,
-                    input_device_index=input_device_index)
+                    input_device_index=input_device_index,
+                    stream_callback=input_callback)
     print("Audio stream opened successfully")
 except Exception as e:
     print(f"Error: {e}")
@@ -72,20 +82,16 @@ ax2.set_ylabel('Frequency (Hz)')
 ax2.set_xlabel('Time (s)')
 ax2.set_title('Spectrogram - ALWAYS VISIBLE')
 
+if not LEGACY:
+    # 快速路径：坐标轴、标题、色条只画一次，动态内容都是 animated 艺术家，由 blit 刷新
+    view = LiveView(fig, ax1, ax2, line, ring, ROLLING_WINDOW, RATE)
+
 def update_plot(frame):
     global buffer
     
     try:
-        # Read audio
-        chunk = stream.read(CHUNK, exception_on_overflow=False)
-        new_data = np.frombuffer(chunk, dtype=np.float32)
-        
-        if len(new_data) == 0:
-            return line,
-        
-        # Update buffer
-        buffer = np.roll(buffer, -len(new_data))
-        buffer[-len(new_data):] = new_data
+        # Latest window from the ring buffer (filled by input_callback)
+        buffer = ring.latest(ROLLING_WINDOW)
         
         # Update waveform
         line.set_ydata(buffer)
@@ -164,7 +170,10 @@ print("Make some noise to see better results!")
 plt.tight_layout()
 
 try:
-    ani = animation.FuncAnimation(fig, update_plot, interval=100, blit=False, cache_frame_data=False)
+    if LEGACY:
+        ani = animation.FuncAnimation(fig, update_plot, interval=100, blit=False, cache_frame_data=False)
+    else:
+        ani = animation.FuncAnimation(fig, view.update, interval=100, blit=True, cache_frame_data=False)
     plt.show()
 except KeyboardInterrupt:
     print("Stopped by user")
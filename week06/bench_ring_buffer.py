@@ -0,0 +1,55 @@
+"""对比每个音频回调里 np.roll 整个滚动窗口 与 RingBuffer.write 的开销。
+
+只模拟回调里的缓冲区更新部分，不需要音频设备。
+用法: python bench_ring_buffer.py [窗口采样数]
+"""
+import sys
+import time
+
+import numpy as np
+
+from ring_buffer import RingBuffer
+
+RATE = 44100
+WINDOW = int(sys.argv[1]) if len(sys.argv) > 1 else 4 * RATE
+CALLBACKS = 2000
+
+
+def bench_roll(chunk):
+    buffer = np.zeros(WINDOW, dtype=np.float32)
+    block = np.random.rand(chunk).astype(np.float32)
+    lat = np.empty(CALLBACKS)
+    cpu0 = time.process_time()
+    for i in range(CALLBACKS):
+        t0 = time.perf_counter()
+        buffer = np.roll(buffer, -chunk)
+        buffer[-chunk:] = block
+        lat[i] = time.perf_counter() - t0
+    return lat, time.process_time() - cpu0
+
+
+def bench_ring(chunk):
+    ring = RingBuffer(WINDOW + RATE, dtype=np.float32)
+    raw = np.random.rand(chunk).astype(np.float32).tobytes()
+    lat = np.empty(CALLBACKS)
+    cpu0 = time.process_time()
+    for i in range(CALLBACKS):
+        t0 = time.perf_counter()
+        ring.write_bytes(raw)
+        lat[i] = time.perf_counter() - t0
+    return lat, time.process_time() - cpu0
+
+
+def main():
+    print(f'window={WINDOW} samples, {CALLBACKS} callbacks per run')
+    print(f'{"chunk":>6} {"method":>8} {"mean us":>9} {"p99 us":>9} {"cpu % of realtime":>18}')
+    for chunk in (64, 128, 256, 512, 1024):
+        audio_sec = CALLBACKS * chunk / RATE
+        for name, fn in (('np.roll', bench_roll), ('ring', bench_ring)):
+            lat, cpu = fn(chunk)
+            print(f'{chunk:>6} {name:>8} {lat.mean() * 1e6:9.1f} {np.percentile(lat, 99) * 1e6:9.1f} '
+                  f'{cpu / audio_sec * 100:17.2f}%')
+
+
+if __name__ == '__main__':
+    main()
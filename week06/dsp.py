@@ -0,0 +1,306 @@
+"""按块处理的 DSP 效果链，给 loopback.LoopbackEngine（4a / 4b 回环脚本）用。
+
+- 每个效果（Stage）在 process(x) 里原地修改一个 float32 块，状态和临时数组都在构造时分配好
+- Chain 负责 int16 <-> float32 转换（同样用预分配的工作缓冲），float32 块直接原地处理
+- 每一级都计时（平均 / 最大耗时），整条链超过 CHUNK / RATE × budget 就记一次 deadline miss
+
+效果: Gain, Biquad (RBJ cookbook EQ), Delay（反馈延迟）, Reverb（Schroeder：4 个梳状 + 2 个全通）,
+RingMod（环形调制）。
+
+命令行写法（--fx，逗号分隔，冒号分隔参数）:
+    gain:6                      增益 (dB)
+    eq:peak:1000:1.0:6          类型(lowpass/highpass/peak/lowshelf/highshelf):频率:Q:增益dB
+    delay:250:0.4:0.5           延迟ms:反馈:湿声比例
+    reverb:0.3                  湿声比例
+    ring:30                     载波频率 Hz
+"""
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+class Stage(ABC):
+    name = 'stage'
+
+    @abstractmethod
+    def process(self, x):
+        """原地处理一个 float32 块。"""
+
+
+class Gain(Stage):
+    name = 'gain'
+
+    def __init__(self, db=0.0):
+        self.factor = np.float32(10 ** (db / 20))
+
+    def process(self, x):
+        x *= self.factor
+
+
+class Biquad(Stage):
+    """RBJ cookbook 二阶 EQ，按 BLOCK 个采样一段用矩阵乘法计算（纯 NumPy，状态跨块连续）。"""
+    name = 'eq'
+    BLOCK = 64
+
+    def __init__(self, kind, freq, q=0.707, gain_db=0.0, rate=44100):
+        self.name = f'eq:{kind}'
+        a = 10 ** (gain_db / 40)
+        w0 = 2 * np.pi * freq / rate
+        cw, alpha = np.cos(w0), np.sin(w0) / (2 * q)
+        if kind == 'lowpass':
+            b = [(1 - cw) / 2, 1 - cw, (1 - cw) / 2]
+            den = [1 + alpha, -2 * cw, 1 - alpha]
+        elif kind == 'highpass':
+            b = [(1 + cw) / 2, -(1 + cw), (1 + cw) / 2]
+            den = [1 + alpha, -2 * cw, 1 - alpha]
+        elif kind == 'peak':
+            b = [1 + alpha * a, -2 * cw, 1 - alpha * a]
+            den = [1 + alpha / a, -2 * cw, 1 - alpha / a]
+        elif kind in ('lowshelf', 'highshelf'):
+            s = 1 if kind == 'lowshelf' else -1
+            sq = 2 * np.sqrt(a) * alpha
+            b = [a * ((a + 1) - s * (a - 1) * cw + sq), s * 2 * a * ((a - 1) - s * (a + 1) * cw),
+                 a * ((a + 1) - s * (a - 1) * cw - sq)]
+            den = [(a + 1) + s * (a - 1) * cw + sq, -s * 2 * ((a - 1) + s * (a + 1) * cw),
+                   (a + 1) + s * (a - 1) * cw - sq]
+        else:
+            raise ValueError(f'未知的 EQ 类型: {kind}')
+        self.b = np.array(b) / den[0]
+        self.a = np.array(den) / den[0]
+        self.zi = np.zeros(2)  # 转置直接 II 型的状态
+        self.mats = {self.BLOCK: self._block_matrix(self.BLOCK)}
+        self.u = np.zeros(self.BLOCK + 2)  # [x; 状态]
+        self.v = np.zeros(self.BLOCK + 2)  # [y; 新状态]
+
+    def _block_matrix(self, m):
+        """m 个采样的块矩阵 M: [y; 新状态] = M @ [x; 状态]。
+
+        转置直接 II 型写成状态空间 s' = A s + B x, y = C s + D x（C = [1, 0]，D = b0），
+        展开 m 步: y[k] = C A^k s + D x[k] + Σ_{j<k} C A^(k-1-j) B x[j]，
+        新状态 = A^m s + Σ_j A^(m-1-j) B x[j]。
+        """
+        b0, b1, b2 = self.b
+        _, a1, a2 = self.a
+        A = np.array([[-a1, 1.0], [-a2, 0.0]])
+        B = np.array([b1 - a1 * b0, b2 - a2 * b0])
+        powers = [np.eye(2)]
+        for _ in range(m):
+            powers.append(A @ powers[-1])
+        h = np.array([b0] + [powers[k][0] @ B for k in range(m - 1)])  # 冲激响应
+        M = np.zeros((m + 2, m + 2))
+        for k in range(m):
+            M[k, :k + 1] = h[k::-1]
+            M[k, m:] = powers[k][0]
+            M[m:, k] = powers[m - 1 - k] @ B
+        M[m:, m:] = powers[m]
+        return M
+
+    def process(self, x):
+        # 按 BLOCK 个采样一段做一次矩阵-向量乘法，没有逐采样的 Python 循环；
+        # 输入/输出都在预分配的 float64 缓冲里，块尾不足 BLOCK 的长度第一次用到时建一次矩阵
+        for s in range(0, len(x), self.BLOCK):
+            e = min(s + self.BLOCK, len(x))
+            m = e - s
+            M = self.mats.get(m)
+            if M is None:
+                M = self.mats[m] = self._block_matrix(m)
+            u, v = self.u[:m + 2], self.v[:m + 2]
+            u[:m] = x[s:e]
+            u[m:] = self.zi
+            np.dot(M, u, out=v)
+            x[s:e] = v[:m]
+            self.zi[:] = v[m:]
+
+
+class _FeedbackLine:
+    """v[n] = x[n] + g * v[n - D] 的循环缓冲实现。
+
+    按长度 ≤ D 的子块处理，这样子块需要的 v[n - D] 全部来自之前已经写入的部分，
+    每个子块都是一次向量运算。
+    """
+
+    def __init__(self, delay, max_block):
+        self.delay = max(1, int(delay))
+        self.size = self.delay + max_block
+        self.buf = np.zeros(self.size, dtype=np.float32)
+        self.pos = 0  # 下一个写入位置
+
+    def _copy_out(self, start, out):
+        n = len(out)
+        first = min(n, self.size - start)
+        out[:first] = self.buf[start:start + first]
+        out[first:] = self.buf[:n - first]
+
+    def _copy_in(self, start, data):
+        n = len(data)
+        first = min(n, self.size - start)
+        self.buf[start:start + first] = data[:first]
+        self.buf[:n - first] = data[first:]
+
+    def run(self, x, g, v, tap):
+        """对块 x 计算 v，并把 v[n - D] 写进 tap（v、tap 是与 x 等长的预分配数组）。"""
+        d = self.delay
+        for s in range(0, len(x), d):
+            e = min(s + d, len(x))
+            self._copy_out((self.pos - d) % self.size, tap[s:e])
+            np.multiply(tap[s:e], g, out=v[s:e])
+            v[s:e] += x[s:e]
+            self._copy_in(self.pos, v[s:e])
+            self.pos = (self.pos + e - s) % self.size
+
+
+class Delay(Stage):
+    name = 'delay'
+
+    def __init__(self, ms=250.0, feedback=0.4, mix=0.5, rate=44100, max_block=4096):
+        self.line = _FeedbackLine(rate * ms / 1000, max_block)
+        self.feedback = np.float32(feedback)
+        self.mix = np.float32(mix)
+        self.v = np.zeros(max_block, dtype=np.float32)
+        self.tap = np.zeros(max_block, dtype=np.float32)
+
+    def process(self, x):
+        n = len(x)
+        tap = self.tap[:n]
+        self.line.run(x, self.feedback, self.v[:n], tap)
+        tap *= self.mix
+        x += tap
+
+
+class Reverb(Stage):
+    """Schroeder 混响：4 个并联反馈梳状滤波器 + 2 个串联全通滤波器。"""
+    name = 'reverb'
+
+    COMBS = ((29.7, 0.805), (37.1, 0.827), (41.1, 0.783), (43.7, 0.764))  # (ms, 反馈)
+    ALLPASSES = ((5.0, 0.7), (1.7, 0.7))
+
+    def __init__(self, mix=0.3, rate=44100, max_block=4096):
+        self.mix = np.float32(mix)
+        self.combs = [(_FeedbackLine(rate * ms / 1000, max_block), np.float32(g)) for ms, g in self.COMBS]
+        self.allpasses = [(_FeedbackLine(rate * ms / 1000, max_block), np.float32(g)) for ms, g in self.ALLPASSES]
+        self.v = np.zeros(max_block, dtype=np.float32)
+        self.tap = np.zeros(max_block, dtype=np.float32)
+        self.wet = np.zeros(max_block, dtype=np.float32)
+        self.stage = np.zeros(max_block, dtype=np.float32)
+
+    def process(self, x):
+        n = len(x)
+        v, tap, wet, stage = self.v[:n], self.tap[:n], self.wet[:n], self.stage[:n]
+        wet[:] = 0
+        for line, g in self.combs:
+            line.run(x, g, v, tap)
+            wet += tap
+        wet *= 0.25
+        for line, g in self.allpasses:
+            # y[n] = -g v[n] + v[n - D]
+            stage[:] = wet
+            line.run(stage, g, v, tap)
+            np.multiply(v, -g, out=wet)
+            wet += tap
+        wet *= self.mix
+        x *= 1 - self.mix
+        x += wet
+
+
+class RingMod(Stage):
+    """环形调制：乘一个正弦载波，相位跨块连续。"""
+    name = 'ring'
+
+    def __init__(self, freq=30.0, mix=1.0, rate=44100, max_block=4096):
+        self.step = 2 * np.pi * freq / rate
+        self.mix = np.float32(mix)
+        self.phase = 0.0
+        self.idx = np.arange(max_block, dtype=np.float64)
+        self.carrier = np.zeros(max_block, dtype=np.float64)
+
+    def process(self, x):
+        n = len(x)
+        c = self.carrier[:n]
+        np.multiply(self.idx[:n], self.step, out=c)
+        c += self.phase
+        np.sin(c, out=c)
+        self.phase = (self.phase + n * self.step) % (2 * np.pi)
+        # x * (1 - mix + mix * c)
+        c *= self.mix
+        c += 1 - self.mix
+        x *= c
+
+
+class Chain:
+    """原地处理 int16 / float32 块的效果链，带每级计时和 deadline miss 计数。"""
+
+    def __init__(self, stages, rate=44100, chunk=256, budget=1.0, max_block=4096):
+        self.stages = list(stages)
+        self.rate = rate
+        self.chunk = chunk
+        self.budget = budget
+        self.work = np.zeros(max_block, dtype=np.float32)
+        self.total = np.zeros(len(self.stages))
+        self.worst = np.zeros(len(self.stages))
+        self.blocks = 0
+        self.misses = 0
+        self.worst_block = 0.0
+
+    def __call__(self, block):
+        self.process(block)
+
+    def process(self, block):
+        n = len(block)
+        t_start = time.perf_counter()
+        if block.dtype == np.float32:
+            x = block
+        else:
+            scale = float(np.iinfo(block.dtype).max + 1)
+            x = self.work[:n]
+            np.multiply(block, 1 / scale, out=x)
+        t = t_start
+        for i, stage in enumerate(self.stages):
+            stage.process(x)
+            now = time.perf_counter()
+            dt = now - t
+            self.total[i] += dt
+            if dt > self.worst[i]:
+                self.worst[i] = dt
+            t = now
+        if x is not block:
+            info = np.iinfo(block.dtype)
+            x *= scale
+            np.clip(x, info.min, info.max, out=x)
+            block[:] = x
+        elapsed = time.perf_counter() - t_start
+        self.worst_block = max(self.worst_block, elapsed)
+        self.blocks += 1
+        if elapsed > self.budget * n / self.rate:
+            self.misses += 1
+
+    def report(self):
+        """每级平均 / 最大耗时 (µs) 和 deadline miss 次数。"""
+        blocks = max(self.blocks, 1)
+        parts = ' '.join(f'{s.name} {self.total[i] / blocks * 1e6:.0f}/{self.worst[i] * 1e6:.0f}us'
+                         for i, s in enumerate(self.stages))
+        deadline = self.chunk / self.rate * 1e6
+        return (f'fx {parts} | worst block {self.worst_block * 1e6:.0f}us of {deadline:.0f}us, '
+                f'misses {self.misses}/{self.blocks}')
+
+
+def parse_chain(spec, rate=44100, chunk=256, budget=1.0):
+    """按 --fx 字符串构造 Chain，例如 'gain:6,eq:peak:1000:1:6,delay:250:0.4:0.5,reverb:0.3,ring:30'。"""
+    max_block = max(4096, 4 * chunk)
+    stages = []
+    for item in filter(None, (s.strip() for s in spec.split(','))):
+        name, *params = item.split(':')
+        if name == 'gain':
+            stages.append(Gain(*map(float, params)))
+        elif name == 'eq':
+            kind, *rest = params
+            stages.append(Biquad(kind, *map(float, rest), rate=rate))
+        elif name == 'delay':
+            stages.append(Delay(*map(float, params), rate=rate, max_block=max_block))
+        elif name == 'reverb':
+            stages.append(Reverb(*map(float, params), rate=rate, max_block=max_block))
+        elif name == 'ring':
+            stages.append(RingMod(*map(float, params), rate=rate, max_block=max_block))
+        else:
+            raise ValueError(f'未知的效果: {name}')
+    return Chain(stages, rate, chunk, budget=budget, max_block=max_block)
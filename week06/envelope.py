@@ -0,0 +1,45 @@
+"""波形显示用的 min / max / RMS 包络，按屏幕列增量计算。
+
+draw_waveform 原来每帧对 self.width 个切片逐个求 RMS（Python 循环扫一遍 17 万个采样）。
+WaveEnvelope 把流按 samples_per_column 个采样一列对齐，只对新凑齐的列做一次
+reshape + 归约，已有的列直接左移复用。
+"""
+import numpy as np
+
+
+class WaveEnvelope:
+    def __init__(self, columns, samples_per_column):
+        self.columns = columns
+        self.spc = max(1, samples_per_column)
+        self.mins = np.zeros(columns, dtype=np.float32)
+        self.maxs = np.zeros(columns, dtype=np.float32)
+        self.rms = np.zeros(columns, dtype=np.float32)
+        self.next_start = None  # 下一列在整个流中的起始采样位置
+
+    def _push(self, arr, new):
+        k = len(new)
+        if k >= self.columns:
+            arr[:] = new[-self.columns:]
+        else:
+            arr[:-k] = arr[k:]
+            arr[-k:] = new
+
+    def update(self, ring):
+        """归约 ring 中上次之后新到的完整列，返回新增列数。"""
+        spc = self.spc
+        write_pos = ring.write_pos
+        if self.next_start is None:
+            self.next_start = max(0, write_pos - self.columns * spc) // spc * spc
+        earliest = write_pos - ring.capacity
+        if self.next_start < earliest:
+            self.next_start = -(-earliest // spc) * spc
+        k = min((write_pos - self.next_start) // spc, self.columns)
+        if k <= 0:
+            return 0
+        end = write_pos - (write_pos - self.next_start) % spc
+        blocks = ring.view(end, k * spc).reshape(k, spc)
+        self._push(self.mins, blocks.min(axis=1))
+        self._push(self.maxs, blocks.max(axis=1))
+        self._push(self.rms, np.sqrt(np.einsum('ij,ij->i', blocks, blocks) / spc))
+        self.next_start = end
+        return k
@@ -0,0 +1,161 @@
+"""matplotlib 实时频谱图的快速路径，给 5_spectrogram.py / 6b_spectrogram.py 共用（LiveView）。
+
+原来的 update_plot 每 100 ms：ax2.clear() + ax2.specgram()（重建整张图和所有刻度），
+拷贝整个 2 秒缓冲区做放大，再加一段同样长度的 np.random.normal 噪声防止 log(0)。
+这里：
+- 只创建一个 AxesImage，之后只 set_data
+- stft.StreamingSTFT 只变换上一帧之后新凑齐的 FFT 列，旧列左移复用
+- log(0) 用 dB 计算里的 epsilon 处理（取 vmin 对应的功率），不再生成噪声
+- 放大倍数直接加到 dB 上（x1000 = +60 dB），不再拷贝采样
+- 所有动态内容都是 animated 艺术家，配合 FuncAnimation(blit=True)
+- FrameTimer 统计每一步耗时，显示在图上
+- 波形按屏幕列画 min/max 包络（锯齿折线），88200 个点的折线光栅化是每帧最贵的一步
+
+与 specgram 的细微差别：STFT 用周期 Hann 窗并去均值（与 PygameSpectrogram 相同），
+specgram 默认是对称 Hann 窗、不去趋势，显示上几乎看不出区别。
+"""
+import time
+
+import numpy as np
+
+from envelope import WaveEnvelope
+from stft import StreamingSTFT
+
+WAVE_COLUMNS = 1200  # 波形包络的列数（大致是屏幕宽度）
+
+
+class FrameTimer:
+    """每帧各阶段耗时的指数平均，外加两次 update 之间的间隔（包含 blit 绘制）。"""
+
+    def __init__(self, alpha=0.1):
+        self.alpha = alpha
+        self.stages = {}
+        self.interval = 0.0
+        self._frame_start = None
+        self._last = None
+
+    def start(self):
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self.interval += self.alpha * ((now - self._frame_start) - self.interval)
+        self._frame_start = self._last = now
+
+    def mark(self, name):
+        now = time.perf_counter()
+        prev = self.stages.get(name, now - self._last)
+        self.stages[name] = prev + self.alpha * ((now - self._last) - prev)
+        self._last = now
+
+    def text(self):
+        parts = ' '.join(f'{k} {v * 1e3:.1f}' for k, v in self.stages.items())
+        total = sum(self.stages.values()) * 1e3
+        fps = 1.0 / self.interval if self.interval > 0 else 0.0
+        return f'update {total:.1f} ms ({parts}) | frame {self.interval * 1e3:.0f} ms, {fps:.1f} fps'
+
+
+class LiveSpectrogram:
+    def __init__(self, ax, window, rate, nfft=512, hop=256, max_freq=4000,
+                 cmap='hot', vmin=-140, vmax=-40):
+        self.rate = rate
+        self.nfft = nfft
+        self.columns = (window - nfft) // hop + 1
+        self.bins = min(nfft // 2 + 1, int(max_freq * nfft / rate) + 2)
+        self.stft = StreamingSTFT(nfft, hop, rate, max_frames=self.columns)
+        # dB 计算的下限：低于 vmin 的功率反正显示成同一种颜色
+        self.eps = 10.0 ** (vmin / 10)
+        self.db = np.full((self.bins, self.columns), vmin, dtype=np.float32)
+        self._shown = np.empty_like(self.db)
+        self.image = ax.imshow(self.db, origin='lower', aspect='auto', cmap=cmap,
+                               vmin=vmin, vmax=vmax, interpolation='nearest',
+                               extent=(0, window / rate, 0, self.bins * rate / nfft),
+                               animated=True)
+        ax.set_ylim(0, max_freq)
+
+    def update(self, ring, gain_db=0.0):
+        """变换 ring 中的新帧并刷新图像，返回新增列数。"""
+        power = self.stft.update(ring)  # (新帧数, bins)
+        k = len(power)
+        if k:
+            new = 10 * np.log10(power[:, :self.bins].T + self.eps)
+            if k >= self.columns:
+                self.db[:] = new[:, -self.columns:]
+            else:
+                self.db[:, :-k] = self.db[:, k:]
+                self.db[:, -k:] = new
+        # 放大只影响显示：功率乘 gain² 等于 dB 加 gain_db
+        if gain_db:
+            np.add(self.db, gain_db, out=self._shown)
+            self.image.set_data(self._shown)
+        else:
+            self.image.set_data(self.db)
+        return k
+
+
+class LiveView:
+    """波形 + 频谱图两个子图的快速刷新：update(frame) 直接给 FuncAnimation(blit=True) 用。
+
+    坐标轴、标题、色条只画一次；line 是 ax1 上已有的波形折线，这里换成包络数据。
+    """
+
+    def __init__(self, fig, ax1, ax2, line, ring, window, rate):
+        self.fig = fig
+        self.ax1 = ax1
+        self.ring = ring
+        self.window = window
+        self.line = line
+        self.envelope = WaveEnvelope(WAVE_COLUMNS, window // WAVE_COLUMNS)
+        self.wave_y = np.empty(2 * WAVE_COLUMNS, dtype=np.float32)
+        line.set_data(np.repeat(np.arange(WAVE_COLUMNS) * self.envelope.spc, 2), self.wave_y)
+        line.set_animated(True)
+        self.wave_limit = 0.001
+        ax1.set_ylim(-self.wave_limit, self.wave_limit)
+        self.spec = LiveSpectrogram(ax2, window, rate, nfft=512, hop=256, max_freq=4000,
+                                    cmap='hot', vmin=-140, vmax=-40)
+        fig.colorbar(self.spec.image, ax=ax2, label='Power (dB)')
+        self.wave_text = ax1.text(0.01, 0.95, '', transform=ax1.transAxes, va='top', fontsize=9, animated=True)
+        self.spec_text = ax2.text(0.01, 0.95, '', transform=ax2.transAxes, va='top', fontsize=9,
+                                  color='white', animated=True)
+        self.hud_text = ax2.text(0.01, 0.03, '', transform=ax2.transAxes, va='bottom', fontsize=8,
+                                 color='cyan', family='monospace', animated=True)
+        self.timer = FrameTimer()
+
+    def update(self, frame):
+        timer = self.timer
+        try:
+            timer.start()
+            buffer = self.ring.latest(self.window)
+            self.envelope.update(self.ring)
+            self.wave_y[0::2] = self.envelope.mins
+            self.wave_y[1::2] = self.envelope.maxs
+            self.line.set_ydata(self.wave_y)
+            rms = np.sqrt(np.dot(buffer, buffer) / len(buffer))
+            max_amp = max(buffer.max(), -buffer.min())
+            timer.mark('wave')
+
+            # 纵轴只在信号越界或明显变小时才改；改了就整图重画一次，blit 随之重新缓存背景
+            target = max_amp * 1.2 if max_amp > 1e-6 else 0.001
+            if target > self.wave_limit or target < self.wave_limit / 4:
+                self.wave_limit = target
+                self.ax1.set_ylim(-target, target)
+                self.fig.canvas.draw()
+            timer.mark('axes')
+
+            # 放大直接加在 dB 上：x10,000 = +80 dB，x1,000 = +60 dB
+            if rms < 1e-4:
+                gain_db, amplification_text = 80, " (Amplified x10,000)"
+            elif rms < 1e-3:
+                gain_db, amplification_text = 60, " (Amplified x1,000)"
+            else:
+                gain_db, amplification_text = 0, ""
+            self.spec.update(self.ring, gain_db)
+            timer.mark('fft')
+
+            self.wave_text.set_text(f'RMS: {rms:.2e}, Max: {max_amp:.2e}')
+            self.spec_text.set_text(f'Spectrogram{amplification_text} (RMS: {rms:.2e})')
+            self.hud_text.set_text(timer.text())
+            timer.mark('text')
+            return self.line, self.spec.image, self.wave_text, self.spec_text, self.hud_text
+
+        except Exception as e:
+            print(f"Update error: {e}")
+            return self.line,
@@ -0,0 +1,380 @@
+"""低延迟回环引擎：输入回调 -> 抖动缓冲 -> 输出回调，中间不经过事件循环。
+
+4a_asyncio_loopback.py 原来在 PortAudio 回调线程里调用 asyncio.Queue（不是线程安全的），
+消费端空闲时 await asyncio.sleep(0.1)，最多平白多出 100 ms 延迟；4b 用阻塞读写。
+这里：
+- JitterBuffer 基于 ring_buffer.RingBuffer（预分配、单生产者/单消费者），
+  输入回调写、输出回调读，两边都不分配内存也不加锁
+- 目标延迟可配置：缓冲先攒到 target 再开始输出；积压超过 target + slack 时丢掉多余部分，
+  避免两个设备时钟漂移让延迟越积越大
+- underrun（输出时数据不够，补静音并重新缓冲）/ overrun（写方追上未读数据）/ 丢弃采样数都有计数
+- LoopbackEngine.measure_latency() 注入一个脉冲，录下输入流，用互相关找回来的位置，
+  得到 输出 -> 设备 -> 输入 的往返延迟
+- process 可以挂一个按块原地处理的效果链（dsp.Chain），在输出回调里对要播放的块调用
+- NullDevice 是一个虚拟声卡（输出经过固定延迟回到输入），不需要 PyAudio 和硬件也能跑整个引擎
+
+- run_cli() 是 4a / 4b 共用的命令行入口，两者只在设备打开方式和默认参数上不同
+
+用法:
+    python loopback.py --measure     # 在虚拟设备上跑回环并测一次往返延迟
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+from ring_buffer import RingBuffer
+
+PA_CONTINUE = 0  # pyaudio.paContinue（这里不导入 pyaudio，虚拟设备不需要它）
+
+
+class JitterBuffer:
+    def __init__(self, capacity, target, slack=None, dtype=np.int16, chunk=0):
+        self.ring = RingBuffer(capacity, dtype)
+        # 目标至少一块：比回调块还小的目标每次读完都会见底，反复 underrun / 重新缓冲
+        self.target = max(int(target), int(chunk))
+        # 超过 target + slack 才丢数据，默认容忍一个 target 的波动，且至少一块（输入成块到达）
+        self.slack = max(self.target if slack is None else int(slack), int(chunk))
+        self.read_pos = 0
+        self.primed = False
+        self.underruns = 0
+        self.overruns = 0
+        self.dropped = 0
+        self.fill_at_read = 0  # 最近一次读取时缓冲里的采样数
+        self._silence = np.zeros(capacity, dtype=self.ring.dtype)
+
+    def write(self, data):
+        """生产者（输入回调）调用。"""
+        self.ring.write(data)
+
+    def fill(self):
+        return self.ring.write_pos - self.read_pos
+
+    def read(self, n):
+        """消费者（输出回调）调用，总是返回 n 个采样的视图（不够时是静音）。"""
+        write_pos = self.ring.write_pos
+        fill = write_pos - self.read_pos
+        if fill > self.ring.capacity:
+            # 写方已经覆盖了还没读的数据
+            self.overruns += 1
+            self.read_pos = write_pos - self.target
+            fill = self.target
+        if not self.primed:
+            if fill < max(self.target, n):
+                return self._silence[:n]
+            self.primed = True
+        if fill < n:
+            self.underruns += 1
+            self.primed = False
+            return self._silence[:n]
+        if fill > self.target + self.slack + n:
+            skip = fill - self.target - n
+            self.dropped += skip
+            self.read_pos += skip
+            fill -= skip
+        self.fill_at_read = fill
+        self.read_pos += n
+        return self.ring.view(self.read_pos, n)
+
+    def stats(self):
+        return {'fill': self.fill_at_read, 'underruns': self.underruns,
+                'overruns': self.overruns, 'dropped': self.dropped}
+
+
+class LoopbackEngine:
+    """PyAudio 回调形式的回环：input_callback / output_callback 可以给两个独立的流。"""
+
+    def __init__(self, rate=44100, chunk=256, target_ms=20.0, capacity_ms=500.0, dtype=np.int16,
+                 process=None):
+        self.rate = rate
+        self.chunk = chunk
+        self.dtype = np.dtype(dtype)
+        target = int(rate * target_ms / 1000)
+        capacity = max(int(rate * capacity_ms / 1000), 4 * (target + chunk))
+        self.buffer = JitterBuffer(capacity, target, dtype=self.dtype, chunk=chunk)
+        self._out = np.zeros(capacity, dtype=self.dtype)
+        self.process = process  # 原地处理输出块的回调，例如 dsp.Chain
+        # 两个流各自的采样计数，以及第一次回调时的时钟（用来把两边的位置对齐）
+        self.in_pos = 0
+        self.out_pos = 0
+        self._in_t0 = None
+        self._out_t0 = None
+        # 延迟测量状态
+        self.probe = None
+        self._probe_at = None     # 脉冲在输出流中的位置（采样）
+        self._capture = None
+        self._capture_start = None
+        self._captured = 0
+        self._measure_done = threading.Event()
+
+    @staticmethod
+    def _clock(time_info):
+        t = time_info.get('current_time', 0.0) if time_info else 0.0
+        return t if t else time.perf_counter()
+
+    def input_callback(self, in_data, frame_count, time_info, status):
+        if self._in_t0 is None:
+            self._in_t0 = self._clock(time_info)
+        data = np.frombuffer(in_data, dtype=self.dtype)
+        if self._capture is not None and not self._measure_done.is_set():
+            if self._capture_start is None:
+                self._capture_start = self.in_pos
+            take = min(len(data), len(self._capture) - self._captured)
+            self._capture[self._captured:self._captured + take] = data[:take]
+            self._captured += take
+            if self._captured == len(self._capture):
+                self._measure_done.set()
+        self.buffer.write(data)
+        self.in_pos += len(data)
+        return (None, PA_CONTINUE)
+
+    def output_callback(self, in_data, frame_count, time_info, status):
+        if self._out_t0 is None:
+            self._out_t0 = self._clock(time_info)
+        out = self._out[:frame_count]
+        if self._capture is not None and not self._measure_done.is_set():
+            # 测量期间不回放输入，只发脉冲，避免脉冲绕回环反复出现
+            self.buffer.read(frame_count)
+            out[:] = 0
+            if self._probe_at is None and self._capture_start is not None:
+                k = min(len(self.probe), frame_count)
+                out[:k] = self.probe[:k]
+                self._probe_at = self.out_pos
+        else:
+            out[:] = self.buffer.read(frame_count)
+            if self.process is not None:
+                self.process(out)
+        self.out_pos += frame_count
+        return (out.tobytes(), PA_CONTINUE)
+
+    def duplex_callback(self, in_data, frame_count, time_info, status):
+        """同一个全双工流时用这个回调。"""
+        self.input_callback(in_data, frame_count, time_info, status)
+        return self.output_callback(None, frame_count, time_info, status)
+
+    def measure_latency(self, window_sec=1.0, timeout=5.0, amplitude=0.5):
+        """注入脉冲并在输入里找回来，返回往返延迟（秒）；没检测到返回 None。
+
+        流必须已经在运行。延迟 = 输入流中脉冲出现的位置 - 输出流中写入脉冲的位置，
+        两边的采样计数按各自第一次回调的时钟对齐。
+        """
+        scale = np.iinfo(self.dtype).max if self.dtype.kind == 'i' else 1.0
+        self.probe = np.array([amplitude * scale], dtype=self.dtype)
+        self._capture = np.zeros(int(window_sec * self.rate), dtype=self.dtype)
+        self._capture_start = None
+        self._probe_at = None
+        self._captured = 0
+        self._measure_done.clear()
+        try:
+            if not self._measure_done.wait(timeout) or self._probe_at is None:
+                return None
+            x = self._capture.astype(np.float64)
+            n = len(x) + len(self.probe)
+            nfft = 1 << (n - 1).bit_length()
+            corr = np.fft.irfft(np.fft.rfft(x, nfft) * np.conj(np.fft.rfft(self.probe.astype(np.float64), nfft)), nfft)[:len(x)]
+            peak = int(np.argmax(np.abs(corr)))
+            if np.abs(corr[peak]) < 6 * (np.median(np.abs(corr)) + 1e-12):
+                return None
+            offset = (self._in_t0 - self._out_t0) * self.rate
+            lag = self._capture_start + peak + offset - self._probe_at
+            return lag / self.rate
+        finally:
+            self._capture = None
+            self._measure_done.set()
+
+    def buffer_latency(self):
+        """抖动缓冲本身带来的延迟（秒）：最近一次读取时排在缓冲里的采样（含正在读的这一块）。"""
+        return self.buffer.fill_at_read / self.rate
+
+    def stats(self):
+        s = self.buffer.stats()
+        s['buffer_ms'] = self.buffer_latency() * 1000
+        return s
+
+
+class NullDevice:
+    """虚拟声卡：输出的采样经过 latency 个采样的延迟回到输入（再乘 gain、加噪声）。
+
+    用一个线程按块驱动两个回调，realtime=True 时按真实时间节拍走；
+    jitter > 0 时输入块会随机攒几块再一起交付，模拟调度抖动。
+    """
+
+    def __init__(self, rate=44100, chunk=256, latency=2048, gain=1.0, noise=0.0,
+                 jitter=0.0, realtime=True, dtype=np.int16, seed=0):
+        self.rate = rate
+        self.chunk = chunk
+        self.latency = latency
+        self.gain = gain
+        self.noise = noise
+        self.jitter = jitter
+        self.realtime = realtime
+        self.dtype = np.dtype(dtype)
+        self.rng = np.random.default_rng(seed)
+        self._line = RingBuffer(latency + 4 * chunk, self.dtype)
+        self._line.write(np.zeros(latency, dtype=self.dtype))
+        self._thread = None
+        self._stop = threading.Event()
+
+    def run(self, input_callback, output_callback, seconds=None):
+        blocks = None if seconds is None else int(seconds * self.rate / self.chunk)
+        pending = []
+        i = 0
+        start = time.perf_counter()
+        scale = np.iinfo(self.dtype).max if self.dtype.kind == 'i' else 1.0
+        while not self._stop.is_set() and (blocks is None or i < blocks):
+            t = i * self.chunk / self.rate
+            info = {'current_time': t + 1.0}
+            out, _ = output_callback(None, self.chunk, info, 0)
+            played = np.frombuffer(out, dtype=self.dtype)
+            self._line.write(played)
+            heard = self._line.view(self._line.write_pos - self.latency, self.chunk).astype(np.float64)
+            heard *= self.gain
+            if self.noise:
+                heard += self.rng.normal(0, self.noise * scale, self.chunk)
+            if self.dtype.kind == 'i':
+                heard = np.clip(heard, np.iinfo(self.dtype).min, np.iinfo(self.dtype).max)
+            pending.append((heard.astype(self.dtype).tobytes(), info))
+            if not self.jitter or self.rng.random() >= self.jitter:
+                for data, block_info in pending:
+                    input_callback(data, self.chunk, block_info, 0)
+                pending.clear()
+            i += 1
+            if self.realtime:
+                delay = start + i * self.chunk / self.rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+    def start(self, input_callback, output_callback):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, args=(input_callback, output_callback), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def open_pyaudio(engine, input_device=None, channels=1, duplex=False):
+    """用 PyAudio 打开并启动回调流，返回关闭函数。
+
+    duplex=False 时输入、输出各一个流（input_callback / output_callback）；
+    duplex=True 时用一个全双工流（duplex_callback），两个方向共用同一个回调和时钟。
+    """
+    import pyaudio
+
+    p = pyaudio.PyAudio()
+    common = dict(format=pyaudio.paInt16, channels=channels, rate=engine.rate, frames_per_buffer=engine.chunk)
+    if duplex:
+        streams = [p.open(input=True, output=True, input_device_index=input_device,
+                          stream_callback=engine.duplex_callback, **common)]
+    else:
+        streams = [p.open(input=True, input_device_index=input_device,
+                          stream_callback=engine.input_callback, **common),
+                   p.open(output=True, stream_callback=engine.output_callback, **common)]
+    for s in streams:
+        s.start_stream()
+
+    def close():
+        for s in streams:
+            s.stop_stream()
+            s.close()
+        p.terminate()
+    return close
+
+
+def _print_round_trip(rt):
+    print(f"Round trip: {rt * 1000:.1f} ms" if rt is not None else "Round trip: no impulse detected")
+
+
+def _print_stats(engine, fx):
+    s = engine.stats()
+    print(f"buffer {s['buffer_ms']:.1f} ms | underruns {s['underruns']} "
+          f"overruns {s['overruns']} dropped {s['dropped']}")
+    if fx is not None:
+        print(fx.report())
+
+
+def _monitor(engine, fx, measure):
+    if measure:
+        time.sleep(0.5)
+        _print_round_trip(engine.measure_latency())
+    while True:
+        time.sleep(1.0)
+        _print_stats(engine, fx)
+
+
+async def _monitor_async(engine, fx, measure):
+    # 事件循环只负责打印状态；测量在线程里等，不阻塞循环
+    if measure:
+        await asyncio.sleep(0.5)
+        _print_round_trip(await asyncio.to_thread(engine.measure_latency))
+    while True:
+        await asyncio.sleep(1.0)
+        _print_stats(engine, fx)
+
+
+def run_cli(description, chunk=256, target_ms=10.0, rate=44100, duplex=False, use_asyncio=False):
+    """4a / 4b 回环脚本共用的入口：解析参数、挂效果链、打开设备、每秒打印状态，直到 Ctrl+C。"""
+    from dsp import parse_chain
+
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--input-device', type=int, default=1, help='输入设备编号（见 list_devices.py）')
+    parser.add_argument('--chunk', type=int, default=chunk)
+    parser.add_argument('--target-ms', type=float, default=target_ms, help='抖动缓冲目标延迟')
+    parser.add_argument('--measure', action='store_true', help='启动后测一次往返延迟')
+    parser.add_argument('--null', action='store_true', help='用虚拟设备代替声卡')
+    parser.add_argument('--fx', default='', help="效果链，例如 'gain:6,eq:peak:1000:1:6,delay:250:0.4:0.5,reverb:0.3,ring:30'")
+    parser.add_argument('--budget', type=float, default=0.5, help='效果链可用的时间占 CHUNK/RATE 的比例，超过记一次 deadline miss')
+    args = parser.parse_args()
+
+    fx = parse_chain(args.fx, rate, args.chunk, budget=args.budget) if args.fx else None
+    engine = LoopbackEngine(rate=rate, chunk=args.chunk, target_ms=args.target_ms, dtype=np.int16, process=fx)
+    if args.null:
+        device = NullDevice(rate=rate, chunk=args.chunk, gain=0.5, noise=1e-3)
+        device.start(engine.input_callback, engine.output_callback)
+        close = device.stop
+    else:
+        close = open_pyaudio(engine, args.input_device, duplex=duplex)
+
+    print("Loopback started. Press Ctrl+C to stop.")
+    try:
+        if use_asyncio:
+            asyncio.run(_monitor_async(engine, fx, args.measure))
+        else:
+            _monitor(engine, fx, args.measure)
+    except KeyboardInterrupt:
+        print("Loopback stopped.")
+    finally:
+        close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='在虚拟设备上运行抖动缓冲回环并测量往返延迟')
+    parser.add_argument('--latency', type=int, default=2048, help='虚拟设备的往返延迟（采样）')
+    parser.add_argument('--chunk', type=int, default=256)
+    parser.add_argument('--target-ms', type=float, default=20.0)
+    parser.add_argument('--jitter', type=float, default=0.2, help='输入块被延后交付的概率')
+    parser.add_argument('--measure', action='store_true', help='测量往返延迟')
+    parser.add_argument('--seconds', type=float, default=3.0)
+    args = parser.parse_args()
+
+    engine = LoopbackEngine(chunk=args.chunk, target_ms=args.target_ms)
+    device = NullDevice(chunk=args.chunk, latency=args.latency, gain=0.5, noise=1e-3, jitter=args.jitter)
+    device.start(engine.input_callback, engine.output_callback)
+    try:
+        if args.measure:
+            time.sleep(0.2)
+            rt = engine.measure_latency()
+            expected = args.latency / engine.rate * 1000
+            print(f'Round trip: {rt * 1000:.2f} ms (device {expected:.2f} ms)' if rt is not None else 'No impulse detected')
+        time.sleep(args.seconds)
+        print(engine.stats())
+    finally:
+        device.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""离线频谱图：批量处理录好的 WAV 文件，不需要声卡或显示器。
+
+- WAV 数据段用 np.memmap 映射，按块读取，几个小时的录音也不会整个读进内存
+- STFT 分块计算（stft.StreamingSTFT.transform），dB / gamma 归一化与
+  6a_spectrogram_pygame.py 相同（滑动 10%/95% 分位数，限制在 [-80, 20] dB，gamma 0.5）
+- 输出按时间切片的 PNG，或一个 (帧数, 频率) 的 .npy memmap
+- 多个文件用进程池并行
+
+用法:
+    python offline_spectrogram.py rec1.wav rec2.wav --out-dir spectrograms --tile-sec 60
+    python offline_spectrogram.py recordings/*.wav --format npy --workers 8
+"""
+import argparse
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from stft import StreamingSTFT, RunningLevels, display_range, normalize_db
+
+BLOCK_FRAMES = 2048  # 每次变换的 STFT 帧数
+
+
+def open_wav(path):
+    """解析 RIFF 头并把 data 段映射为 (帧数, 声道) 的 memmap，返回 (rate, samples)。"""
+    with open(path, 'rb') as f:
+        riff, _, wave = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave != b'WAVE':
+            raise ValueError(f'{path}: 不是 WAV 文件')
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f'{path}: 没有 data 段')
+            cid, size = struct.unpack('<4sI', header)
+            if cid == b'fmt ':
+                body = f.read(size)
+                tag, channels, rate, _, _, bits = struct.unpack('<HHIIHH', body[:16])
+                if tag == 0xFFFE:  # WAVE_FORMAT_EXTENSIBLE：真实格式在子格式 GUID 的前两个字节
+                    tag = struct.unpack('<H', body[24:26])[0]
+                fmt = (tag, channels, rate, bits)
+            elif cid == b'data':
+                offset = f.tell()
+                break
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+    if fmt is None:
+        raise ValueError(f'{path}: 缺少 fmt 段')
+    tag, channels, rate, bits = fmt
+    dtypes = {(1, 16): '<i2', (1, 32): '<i4', (3, 32): '<f4', (3, 64): '<f8'}
+    if (tag, bits) not in dtypes:
+        raise ValueError(f'{path}: 不支持的格式 tag={tag} bits={bits}')
+    dtype = np.dtype(dtypes[(tag, bits)])
+    n = size // (dtype.itemsize * channels)
+    samples = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(n, channels))
+    return rate, samples
+
+
+def to_float_mono(block):
+    """与 PyAudio paFloat32 输入同一尺度：整数 PCM 缩放到 [-1, 1)，多声道取平均。"""
+    x = block.astype(np.float32)
+    if block.dtype.kind == 'i':
+        x /= float(np.iinfo(block.dtype).max + 1)
+    return x.mean(axis=1) if x.shape[1] > 1 else x[:, 0]
+
+
+def spectrogram_blocks(samples, nfft, hop, rate):
+    """按块产出 (帧数, bins) 的功率谱，整体等价于对全部采样做一次 STFT。"""
+    total = (len(samples) - nfft) // hop + 1
+    stft = StreamingSTFT(nfft, hop, rate, max_frames=BLOCK_FRAMES)
+    for f0 in range(0, max(total, 0), BLOCK_FRAMES):
+        k = min(BLOCK_FRAMES, total - f0)
+        start = f0 * hop
+        chunk = to_float_mono(samples[start:start + (k - 1) * hop + nfft])
+        yield stft.transform(chunk)
+
+
+def render_file(path, out_dir, fmt='png', nfft=1024, hop=512, max_freq=8000, tile_sec=60, cmap='magma'):
+    rate, samples = open_wav(path)
+    bins = min(nfft // 2 + 1, int(max_freq / (rate / 2) * (nfft // 2 + 1)))
+    total = max((len(samples) - nfft) // hop + 1, 0)
+    stem = os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0])
+    levels = RunningLevels()
+    if fmt == 'npy':
+        out = np.lib.format.open_memmap(stem + '.npy', mode='w+', dtype=np.float16, shape=(total, bins))
+    else:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        lut = plt.colormaps.get_cmap(cmap)
+        tile_cols = max(1, int(tile_sec * rate / hop))
+        tile = np.empty((tile_cols, bins), dtype=np.float32)
+        filled, tile_idx = 0, 0
+    row = 0
+    for power in spectrogram_blocks(samples, nfft, hop, rate):
+        db = 10 * np.log10(power + 1e-12)
+        # 与实时版本一样按块更新滑动分位数，再归一化这一块
+        min_db, max_db = display_range(*levels.update(db))
+        norm = normalize_db(db[:, :bins], min_db, max_db, gamma=0.5)
+        if fmt == 'npy':
+            out[row:row + len(norm)] = norm
+        else:
+            i = 0
+            while i < len(norm):
+                take = min(tile_cols - filled, len(norm) - i)
+                tile[filled:filled + take] = norm[i:i + take]
+                filled += take
+                i += take
+                if filled == tile_cols:
+                    plt.imsave(f'{stem}_{tile_idx:04d}.png', tile.T[::-1], cmap=lut, vmin=0, vmax=1)
+                    filled, tile_idx = 0, tile_idx + 1
+        row += len(norm)
+    if fmt == 'npy':
+        out.flush()
+        return path, row, stem + '.npy'
+    if filled:
+        plt.imsave(f'{stem}_{tile_idx:04d}.png', tile[:filled].T[::-1], cmap=lut, vmin=0, vmax=1)
+        tile_idx += 1
+    return path, row, f'{tile_idx} tiles'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='WAV 文件离线频谱图（无需音频设备）')
+    parser.add_argument('files', nargs='+', help='WAV 文件')
+    parser.add_argument('--out-dir', default='spectrograms', help='输出目录')
+    parser.add_argument('--format', choices=['png', 'npy'], default='png', help='PNG 切片或 .npy memmap')
+    parser.add_argument('--nfft', type=int, default=1024)
+    parser.add_argument('--hop', type=int, default=512)
+    parser.add_argument('--max-freq', type=float, default=8000, help='保留的最高频率 (Hz)')
+    parser.add_argument('--tile-sec', type=float, default=60, help='每张 PNG 覆盖的秒数')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='并行进程数')
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    jobs = [(f, args.out_dir, args.format, args.nfft, args.hop, args.max_freq, args.tile_sec) for f in args.files]
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(jobs)))) as pool:
+        futures = [pool.submit(render_file, *job) for job in jobs]
+        for fut in futures:
+            try:
+                path, frames, result = fut.result()
+                print(f'{path}: {frames} frames -> {result}')
+            except Exception as e:
+                print(f'Error: {e}')
+
+
+if __name__ == '__main__':
+    main()
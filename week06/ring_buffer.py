@@ -0,0 +1,67 @@
+"""单生产者 / 单消费者的无锁环形缓冲区，给实时音频可视化脚本共用。
+
+之前各脚本每来一块音频就 np.roll 整个滚动窗口（十几万个采样的拷贝 + 重新分配）。
+这里预先分配 2 × capacity 的存储，每次写入同时写到 i 和 i + capacity 两个位置（镜像），
+所以任意长度 ≤ capacity 的"最近 n 个采样"都是一段连续的切片，读取时零拷贝。
+
+- 写入方（PyAudio 回调线程）只调用 write()，先写数据再推进 write_pos
+- write_pos 是单调递增的采样计数，读取方用它判断有多少新数据
+- 读取方拿到的是视图；如果读得比写慢一圈以上，最旧的部分可能已被覆盖，
+  所以 capacity 应比实际要显示的窗口多留一些余量
+"""
+import numpy as np
+
+
+class RingBuffer:
+    def __init__(self, capacity, dtype=np.float32):
+        self.capacity = int(capacity)
+        self.dtype = np.dtype(dtype)
+        self._buf = np.zeros(2 * self.capacity, dtype=self.dtype)
+        self.write_pos = 0  # 累计写入的采样数（只增不减）
+
+    def write(self, data):
+        """写入一块采样（生产者线程调用）。"""
+        n = len(data)
+        if n == 0:
+            return
+        cap = self.capacity
+        if n > cap:
+            data = data[-cap:]
+        m = len(data)
+        pos = (self.write_pos + n - m) % cap
+        first = min(m, cap - pos)
+        buf = self._buf
+        buf[pos:pos + first] = data[:first]
+        buf[pos + cap:pos + cap + first] = data[:first]
+        rest = m - first
+        if rest:
+            buf[:rest] = data[first:]
+            buf[cap:cap + rest] = data[first:]
+        # 数据写完后再发布新的游标，读取方看到游标时数据已经就绪
+        self.write_pos += n
+
+    def write_bytes(self, raw):
+        """直接写 PyAudio 回调给的 bytes。"""
+        self.write(np.frombuffer(raw, dtype=self.dtype))
+
+    def view(self, end_pos, n):
+        """以绝对位置 end_pos 结尾、长 n 的连续视图（调用方保证 n ≤ capacity 且数据未被覆盖）。"""
+        end = end_pos % self.capacity + self.capacity
+        return self._buf[end - n:end]
+
+    def latest(self, n=None):
+        """最近 n 个采样（默认整个容量）的连续只读视图，按时间顺序排列。"""
+        n = self.capacity if n is None else min(int(n), self.capacity)
+        view = self.view(self.write_pos, n)
+        view.flags.writeable = False
+        return view
+
+    def read_since(self, cursor):
+        """返回 (cursor 之后的新采样视图, 新游标)。落后超过 capacity 时只给最近 capacity 个。"""
+        end_pos = self.write_pos
+        n = min(end_pos - cursor, self.capacity)
+        if n <= 0:
+            return self._buf[:0], end_pos
+        view = self.view(end_pos, n)
+        view.flags.writeable = False
+        return view, end_pos
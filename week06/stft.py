@@ -0,0 +1,116 @@
+"""增量短时傅里叶变换 (STFT)，配合 ring_buffer.RingBuffer 使用。
+
+PygameSpectrogram.compute_spectrogram 原来每次对最近 1 秒重新跑 scipy.signal.spectrogram
+（约 85 个重叠 FFT），只为了取最后 3 列。StreamingSTFT 记住下一帧的起始采样位置，
+每次只变换上次调用之后新凑齐的帧：
+- Hann 窗（与 scipy 的 window='hann' 相同的周期窗）预先算好
+- 分帧用 sliding_window_view（不拷贝），rfft 写进预分配的输出缓冲
+- 功率谱缩放与 scipy.signal.spectrogram 默认参数一致（去均值, scaling='density'）
+- RunningLevels 用指数滑动平均跟踪 10%/95% 分位数，代替对整张谱图做 np.percentile
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def hann(n):
+    """周期 Hann 窗，等价于 scipy.signal.get_window('hann', n)。"""
+    return (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n) / n)).astype(np.float32)
+
+
+class StreamingSTFT:
+    def __init__(self, nfft=1024, hop=512, rate=44100, max_frames=256):
+        self.nfft = nfft
+        self.hop = hop
+        self.rate = rate
+        self.bins = nfft // 2 + 1
+        self.window = hann(nfft)
+        # density 缩放系数；单边谱除 DC / Nyquist 外乘 2
+        self.scale = np.full(self.bins, 2.0 / (rate * np.sum(self.window.astype(np.float64) ** 2)))
+        self.scale[0] /= 2
+        if nfft % 2 == 0:
+            self.scale[-1] /= 2
+        self.max_frames = max_frames
+        self._frames = np.empty((max_frames, nfft), dtype=np.float32)
+        self._spec = np.empty((max_frames, self.bins), dtype=np.complex64)
+        self._power = np.empty((max_frames, self.bins), dtype=np.float64)
+        self.next_start = None  # 下一帧在整个流中的起始采样位置
+
+    def _rfft(self, frames, k):
+        try:
+            return np.fft.rfft(frames, axis=1, out=self._spec[:k])
+        except TypeError:  # NumPy < 2.0 没有 out 参数
+            return np.fft.rfft(frames, axis=1)
+
+    def transform(self, samples):
+        """对一段连续采样分帧变换，返回 (帧数, bins) 的功率谱视图（下次调用前有效）。"""
+        k = min((len(samples) - self.nfft) // self.hop + 1, self.max_frames) if len(samples) >= self.nfft else 0
+        if k <= 0:
+            return self._power[:0]
+        # 只取最后 k 帧（积压太多时丢掉最旧的）
+        start = len(samples) - self.nfft - (k - 1) * self.hop
+        view = sliding_window_view(samples[start:], self.nfft)[::self.hop][:k]
+        frames = self._frames[:k]
+        np.subtract(view, view.mean(axis=1, keepdims=True), out=frames)
+        frames *= self.window
+        spec = self._rfft(frames, k)
+        power = self._power[:k]
+        np.multiply(spec.real, spec.real, out=power)
+        power += spec.imag.astype(np.float64) ** 2
+        power *= self.scale
+        return power
+
+    def update(self, ring):
+        """从环形缓冲区取出上次之后新凑齐的帧并变换，返回 (帧数, bins) 功率谱。"""
+        write_pos = ring.write_pos
+        if self.next_start is None:
+            # 第一次调用：从当前位置往前对齐一帧开始
+            self.next_start = max(0, write_pos - self.nfft)
+        # 落后超过缓冲区容量时跳到可用的最早位置
+        earliest = write_pos - ring.capacity
+        if self.next_start < earliest:
+            self.next_start = earliest + (self.next_start - earliest) % self.hop
+        n_frames = (write_pos - self.next_start - self.nfft) // self.hop + 1
+        if n_frames <= 0:
+            return self._power[:0]
+        n_frames = min(n_frames, self.max_frames)
+        end = self.next_start + self.nfft + (n_frames - 1) * self.hop
+        samples = ring.view(end, end - self.next_start)
+        self.next_start += n_frames * self.hop
+        return self.transform(samples)
+
+
+class RunningLevels:
+    """dB 归一化用的滑动统计：对新列的 10%/95% 分位数做指数平均。"""
+
+    def __init__(self, low_pct=10, high_pct=95, alpha=0.05, init=(-80.0, -20.0)):
+        self.low_pct = low_pct
+        self.high_pct = high_pct
+        self.alpha = alpha
+        self.low, self.high = init
+        self._seeded = False
+
+    def update(self, db_columns):
+        if db_columns.size == 0:
+            return self.low, self.high
+        lo, hi = np.percentile(db_columns, [self.low_pct, self.high_pct])
+        if not self._seeded:
+            self.low, self.high, self._seeded = lo, hi, True
+        else:
+            a = self.alpha
+            self.low += a * (lo - self.low)
+            self.high += a * (hi - self.high)
+        return self.low, self.high
+
+
+def display_range(current_min, current_max):
+    """PygameSpectrogram 的显示范围规则：限制在 [-80, 20] dB，且至少 20 dB 宽。"""
+    min_db = max(current_min, -80)  # Don't go below -80dB
+    max_db = min(current_max, 20)   # Don't go above 20dB
+    if max_db - min_db < 20:
+        max_db = min_db + 40
+    return min_db, max_db
+
+
+def normalize_db(db, min_db, max_db, gamma=0.5):
+    """dB -> [0, 1]，再做 gamma 校正让弱信号更明显。"""
+    return np.power(np.clip((db - min_db) / (max_db - min_db), 0, 1), gamma)
@@ -0,0 +1,172 @@
+"""AudioLDM2 流式生成播放：后台线程按短片段生成，交叠部分交叉淡化，边生成边播放。
+
+2_gen_audio.py 原来一次要 60 秒、200 步，整段生成完才 stream.write，用户要干等几分钟。
+这里：
+- StreamingGenerator 在后台线程里逐段调用 pipeline（每段 segment_sec 秒，相邻段交叠 overlap_sec 秒），
+  交叠区用等功率淡入淡出拼接，拼好的部分切成小块放进 queue.Queue
+- Player.callback 是 PyAudio 输出回调，从队列取块；第一段生成完就开始出声，
+  队列空了补静音并记一次 underrun（整块静音或块尾补零都算，另记补了多少静音）
+- 每段打印进度、生成耗时、实时率 (RTF = 生成耗时 / 音频时长，< 1 说明比播放快) 和缓冲余量
+- StubPipeline 是一个和 AudioLDM2Pipeline 调用方式相同的小替身（合成音 + 按步数 sleep），
+  在 CPU 上、没有 torch / diffusers 也能跑通整个流程
+"""
+import queue
+import threading
+import time
+import zlib
+
+import numpy as np
+
+RATE = 16000  # AudioLDM2 输出采样率
+
+
+class StubPipeline:
+    """AudioLDM2Pipeline 的替身：pipeline(prompt, num_inference_steps=..., audio_length_in_s=...).audios"""
+
+    class Output:
+        def __init__(self, audios):
+            self.audios = audios
+
+    def __init__(self, rate=RATE, sec_per_step=0.002):
+        self.rate = rate
+        self.sec_per_step = sec_per_step
+        self.calls = 0
+
+    def __call__(self, prompt, num_inference_steps=50, audio_length_in_s=5.0, **kwargs):
+        # 模拟推理耗时：与步数和片段长度成正比
+        time.sleep(self.sec_per_step * num_inference_steps * audio_length_in_s / 5)
+        seed = zlib.crc32(prompt.encode()) + self.calls
+        self.calls += 1
+        rng = np.random.default_rng(seed)
+        t = np.arange(int(audio_length_in_s * self.rate)) / self.rate
+        notes = 220 * 2 ** (rng.integers(0, 12, size=4) / 12)
+        audio = sum(np.sin(2 * np.pi * f * t) for f in notes) * 0.1
+        audio += rng.normal(0, 0.01, len(t))
+        return self.Output([audio.astype(np.float32)])
+
+
+class Player:
+    """PyAudio 输出回调：从队列取 float32 块，不够时补静音。"""
+
+    def __init__(self, maxsize=0):
+        self.queue = queue.Queue(maxsize)
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._out = np.zeros(0, dtype=np.float32)
+        self.played = 0
+        self.underruns = 0
+        self.silence = 0  # 开始播放后、结束前补进去的静音采样数
+        self.started = threading.Event()  # 第一块音频出声时置位
+        self.finished = threading.Event()  # 收到结束标记（None）并播完时置位
+
+    def callback(self, in_data, frame_count, time_info, status):
+        if len(self._out) < frame_count:
+            self._out = np.zeros(frame_count, dtype=np.float32)
+        out = self._out[:frame_count]
+        filled = 0
+        while filled < frame_count:
+            if not len(self._pending):
+                try:
+                    block = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if block is None:
+                    self.finished.set()
+                    break
+                self._pending = block
+            take = min(frame_count - filled, len(self._pending))
+            out[filled:filled + take] = self._pending[:take]
+            self._pending = self._pending[take:]
+            filled += take
+        if filled:
+            self.started.set()
+        # 队列在块中途取空也是听得见的断音，和整块静音一样计数
+        if filled < frame_count and self.started.is_set() and not self.finished.is_set():
+            self.underruns += 1
+            self.silence += frame_count - filled
+        out[filled:] = 0
+        self.played += filled
+        return (out.tobytes(), 0)  # 0 = pyaudio.paContinue
+
+    def underrun_text(self, rate):
+        return f'underruns {self.underruns} ({self.silence / rate * 1000:.0f} ms silence)'
+
+
+class StreamingGenerator:
+    def __init__(self, pipeline, player, rate=RATE, segment_sec=10.0, overlap_sec=1.0,
+                 steps=50, block=2048, log=print):
+        if overlap_sec >= segment_sec:
+            raise ValueError('overlap_sec 必须小于 segment_sec')
+        self.pipeline = pipeline
+        self.player = player
+        self.rate = rate
+        self.segment = int(segment_sec * rate)
+        self.overlap = int(overlap_sec * rate)
+        self.steps = steps
+        self.block = block
+        self.log = log
+        # 等功率交叉淡化曲线
+        phase = np.linspace(0, np.pi / 2, self.overlap, dtype=np.float32)
+        self.fade_in = np.sin(phase)
+        self.fade_out = np.cos(phase)
+        self.metrics = []
+        self.first_audio_at = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def segments_for(self, total_sec):
+        total = int(total_sec * self.rate)
+        hop = self.segment - self.overlap
+        return max(1, -(-(total - self.overlap) // hop))
+
+    def _emit(self, audio):
+        for s in range(0, len(audio), self.block):
+            self.player.queue.put(audio[s:s + self.block])
+
+    def run(self, prompt, total_sec):
+        total = int(total_sec * self.rate)
+        n = self.segments_for(total_sec)
+        t_start = time.perf_counter()
+        emitted = 0
+        tail = None
+        for i in range(n):
+            if self._stop.is_set():
+                break
+            t0 = time.perf_counter()
+            audio = self.pipeline(prompt, num_inference_steps=self.steps,
+                                  audio_length_in_s=self.segment / self.rate).audios[0]
+            gen = time.perf_counter() - t0
+            audio = np.asarray(audio, dtype=np.float32)[:self.segment]
+            if tail is not None and self.overlap:
+                audio[:self.overlap] = tail * self.fade_out + audio[:self.overlap] * self.fade_in
+            last = i == n - 1
+            body = audio if last or not self.overlap else audio[:-self.overlap]
+            tail = None if last else audio[len(audio) - self.overlap:].copy()
+            body = body[:max(0, total - emitted)]
+            self._emit(body)
+            emitted += len(body)
+            if self.first_audio_at is None:
+                self.first_audio_at = time.perf_counter() - t_start
+            rtf = gen / (self.segment / self.rate)
+            ahead = (emitted - self.player.played) / self.rate  # 已生成未播放的秒数
+            self.metrics.append({'segment': i, 'gen_sec': gen, 'rtf': rtf, 'ahead_sec': ahead})
+            self.log(f'[{i + 1}/{n}] {emitted / self.rate:.1f}/{total_sec:.0f}s generated '
+                     f'({emitted / total:.0%}), segment {gen:.1f}s, RTF {rtf:.2f}, '
+                     f'buffered {ahead:.1f}s, {self.player.underrun_text(self.rate)}')
+        self.player.queue.put(None)
+
+    def start(self, prompt, total_sec):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, args=(prompt, total_sec), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def summary(self):
+        if not self.metrics:
+            return 'no segments generated'
+        rtf = np.mean([m['rtf'] for m in self.metrics])
+        return (f'first audio after {self.first_audio_at:.1f}s, mean RTF {rtf:.2f}, '
+                f'{len(self.metrics)} segments, {self.player.underrun_text(self.rate)}')
@@ -1,24 +1,236 @@
-import torchaudio as ta
-from chatterbox.tts import ChatterboxTTS
-from chatterbox.mtl_tts import ChatterboxMultilingualTTS
-import torch
-
-# English example
-device = "cuda" if torch.cuda.is_available() else "cpu"
-model = ChatterboxTTS.from_pretrained(device=device)
-
-text = "Ezreal and Jinx teamed up with Ahri, Yasuo, and Teemo to take down the enemy's Nexus in an epic late-game pentakill."
-wav = model.generate(text)
-ta.save("test-english.wav", wav, model.sr)
-
-# Multilingual examples
-multilingual_model = ChatterboxMultilingualTTS.from_pretrained(device=device)
-
-chinese_text = "你好，今天天气真不错，希望你有一个愉快的周末。"
-wav_chinese = multilingual_model.generate(chinese_text, language_id="zh")
-ta.save("test-chinese.wav", wav_chinese, model.sr)
-
-# If you want to synthesize with a different voice, specify the audio prompt
-# AUDIO_PROMPT_PATH = "YOUR_FILE.wav"
-# wav = model.generate(text, audio_prompt_path=AUDIO_PROMPT_PATH)
-# ta.save("test-2.wav", wav, model.sr)
\ No newline at end of file
+"""Chatterbox TTS 批量合成。
+
+原来导入时就加载 ChatterboxTTS 和 ChatterboxMultilingualTTS，各合成一句写死的句子。
+现在：
+- 每个模型只在第一次用到时加载一次（ModelPool）
+- 从 JSONL 读取记录：{"text": ..., "language_id": "zh", "audio_prompt": "voice.wav"}
+  （language_id 默认 "en"，audio_prompt 可省略）
+- 按 (语言, 音色) 分组，同一组只准备一次音色条件，模型连续复用
+- 输出按内容哈希缓存（文本 + 语言 + 音色文件内容），重复的句子直接跳过
+- WAV 写盘放到 I/O 线程池里，和 GPU 合成并行
+- 报告 句/秒 和实时率 (RTF = 合成耗时 / 音频时长)
+
+用法:
+    python wav_voice.py                       # 原来的两句示例
+    python wav_voice.py lines.jsonl --out-dir tts_out --io-workers 4
+    python wav_voice.py lines.jsonl --stub    # 不加载模型，用替身跑通流程
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+
+import numpy as np
+
+
+class StubTTS:
+    """Chatterbox 模型的替身：相同的 generate / prepare_conditionals 接口，输出一段合成音。"""
+    sr = 24000
+    conds = 'default'
+
+    def __init__(self, sec_per_char=0.0005):
+        self.sec_per_char = sec_per_char
+
+    def prepare_conditionals(self, wav_fpath, exaggeration=0.5):
+        self.conds = wav_fpath
+
+    def generate(self, text, language_id=None, audio_prompt_path=None):
+        time.sleep(self.sec_per_char * len(text))
+        t = np.arange(int(0.06 * len(text) * self.sr)) / self.sr
+        return (0.1 * np.sin(2 * np.pi * (200 + len(text) % 200) * t)).astype(np.float32)[None, :]
+
+
+class ModelPool:
+    """英文用 ChatterboxTTS，其它语言用 ChatterboxMultilingualTTS，各加载一次。"""
+
+    def __init__(self, device=None, stub=False):
+        self.device = device
+        self.stub = stub
+        self._models = {}
+        self._default_conds = {}
+
+    def get(self, language_id):
+        kind = 'en' if language_id == 'en' else 'mtl'
+        if kind not in self._models:
+            if self.stub:
+                self._models[kind] = StubTTS()
+            else:
+                import torch
+                if self.device is None:
+                    self.device = "cuda" if torch.cuda.is_available() else "cpu"
+                if kind == 'en':
+                    from chatterbox.tts import ChatterboxTTS
+                    self._models[kind] = ChatterboxTTS.from_pretrained(device=self.device)
+                else:
+                    from chatterbox.mtl_tts import ChatterboxMultilingualTTS
+                    self._models[kind] = ChatterboxMultilingualTTS.from_pretrained(device=self.device)
+            # from_pretrained 自带的默认音色；prepare_conditionals 会覆盖它，没有音色的组要换回来
+            self._default_conds[kind] = getattr(self._models[kind], 'conds', None)
+        return kind, self._models[kind]
+
+    def use_voice(self, kind, voice):
+        model = self._models[kind]
+        if voice:
+            model.prepare_conditionals(voice)
+        elif self._default_conds.get(kind) is not None:
+            model.conds = self._default_conds[kind]
+
+
+_digests = {}  # 音色文件路径 -> 内容哈希，同一批里每个文件只读一次
+
+
+def _file_digest(path):
+    if path not in _digests:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        _digests[path] = h.hexdigest()
+    return _digests[path]
+
+
+def cache_key(text, language_id, audio_prompt):
+    """按内容算的缓存键：文本、语言、音色文件内容（不是路径）。"""
+    voice = _file_digest(audio_prompt) if audio_prompt else ''
+    payload = json.dumps([text, language_id, voice], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:24]
+
+
+def load_records(path):
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            r = json.loads(line)
+            if not r.get('text'):
+                print(f'Skipping line {line_no}: no text')
+                continue
+            records.append({'line': line_no, 'text': r['text'],
+                            'language_id': r.get('language_id') or 'en',
+                            'audio_prompt': r.get('audio_prompt') or None})
+    return records
+
+
+def save_wav(path, wav, sr):
+    """写 WAV：torch 张量用 torchaudio（与原来一致），NumPy 数组用标准库 wave 写 16 位 PCM。"""
+    if hasattr(wav, 'cpu'):
+        import torchaudio as ta
+        ta.save(path, wav.cpu(), sr)
+        return
+    pcm = (np.clip(np.asarray(wav).reshape(-1), -1, 1) * 32767).astype('<i2')
+    with wave.open(path, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sr)
+        w.writeframes(pcm.tobytes())
+
+
+def synthesize_batch(records, out_dir, pool, io_workers=4):
+    """合成所有记录，返回 (manifest 行列表, 统计字典)。"""
+    os.makedirs(out_dir, exist_ok=True)
+    for r in records:
+        r['key'] = cache_key(r['text'], r['language_id'], r['audio_prompt'])
+        r['wav'] = os.path.join(out_dir, r['key'] + '.wav')
+    stats = {'records': len(records), 'synthesized': 0, 'cached': 0, 'audio_sec': 0.0, 'synth_sec': 0.0}
+    todo, seen = [], set()
+    for r in records:
+        if os.path.exists(r['wav']) or r['key'] in seen:
+            continue
+        seen.add(r['key'])
+        todo.append(r)
+    stats['cached'] = len(records) - len(todo)
+    # 同一语言、同一音色排在一起：模型连续复用，音色条件只准备一次
+    todo.sort(key=lambda r: (r['language_id'], r['audio_prompt'] or ''))
+
+    t_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=io_workers) as io:
+        writes = []
+        for (lang, voice), group in groupby(todo, key=lambda r: (r['language_id'], r['audio_prompt'])):
+            kind, model = pool.get(lang)
+            pool.use_voice(kind, voice)
+            for r in group:
+                t0 = time.perf_counter()
+                if kind == 'en':
+                    wav = model.generate(r['text'])
+                else:
+                    wav = model.generate(r['text'], language_id=lang)
+                stats['synth_sec'] += time.perf_counter() - t0
+                stats['audio_sec'] += wav.shape[-1] / model.sr
+                stats['synthesized'] += 1
+                # 先写临时文件再改名，中途退出不会留下半个 WAV 被当成缓存
+                tmp = r['wav'] + '.part'
+                writes.append(io.submit(lambda tmp=tmp, r=r, wav=wav, sr=model.sr:
+                                        (save_wav(tmp, wav, sr), os.replace(tmp, r['wav']))))
+                done = stats['synthesized']
+                if done % 50 == 0:
+                    elapsed = time.perf_counter() - t_start
+                    print(f'{done}/{len(todo)} synthesized, {done / elapsed:.2f} sentences/s')
+        for w in writes:
+            w.result()
+    stats['wall_sec'] = time.perf_counter() - t_start
+    manifest = [{'line': r['line'], 'text': r['text'], 'language_id': r['language_id'], 'wav': r['wav']}
+                for r in records]
+    return manifest, stats
+
+
+def demo():
+    """原来的两句示例。"""
+    import torchaudio as ta
+    pool = ModelPool()
+
+    # English example
+    _, model = pool.get('en')
+    text = "Ezreal and Jinx teamed up with Ahri, Yasuo, and Teemo to take down the enemy's Nexus in an epic late-game pentakill."
+    wav = model.generate(text)
+    ta.save("test-english.wav", wav, model.sr)
+
+    # Multilingual examples
+    _, multilingual_model = pool.get('zh')
+    chinese_text = "你好，今天天气真不错，希望你有一个愉快的周末。"
+    wav_chinese = multilingual_model.generate(chinese_text, language_id="zh")
+    ta.save("test-chinese.wav", wav_chinese, model.sr)
+
+    # If you want to synthesize with a different voice, specify the audio prompt
+    # AUDIO_PROMPT_PATH = "YOUR_FILE.wav"
+    # wav = model.generate(text, audio_prompt_path=AUDIO_PROMPT_PATH)
+    # ta.save("test-2.wav", wav, model.sr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Chatterbox TTS 批量合成')
+    parser.add_argument('jsonl', nargs='?', help='输入 JSONL（text / language_id / audio_prompt）；省略则运行示例')
+    parser.add_argument('--out-dir', default='tts_out', help='输出目录（同时是缓存目录）')
+    parser.add_argument('--manifest', default=None, help='输出清单 JSONL，默认 <out-dir>/manifest.jsonl')
+    parser.add_argument('--io-workers', type=int, default=4, help='写 WAV 的线程数')
+    parser.add_argument('--device', default=None, help='cuda / cpu（默认自动）')
+    parser.add_argument('--stub', action='store_true', help='不加载模型，用替身跑通流程')
+    args = parser.parse_args()
+
+    if not args.jsonl:
+        demo()
+        return
+
+    records = load_records(args.jsonl)
+    manifest, stats = synthesize_batch(records, args.out_dir, ModelPool(args.device, stub=args.stub),
+                                       io_workers=args.io_workers)
+    manifest_path = args.manifest or os.path.join(args.out_dir, 'manifest.jsonl')
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        for row in manifest:
+            f.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+    n = stats['synthesized']
+    rate = n / stats['wall_sec'] if stats['wall_sec'] > 0 else 0.0
+    rtf = stats['synth_sec'] / stats['audio_sec'] if stats['audio_sec'] > 0 else 0.0
+    print(f"{stats['records']} records: {n} synthesized, {stats['cached']} cached")
+    print(f"{rate:.2f} sentences/s, {stats['audio_sec']:.1f}s audio, RTF {rtf:.3f}")
+    print(f"Manifest: {manifest_path}")
+
+
+if __name__ == '__main__':
+    main()